@@ -1,10 +1,48 @@
+import os
 import numpy as np
 import torch
-import config
 import torch.nn as nn
 import torch.optim as optim
-from collections import deque
 import random
+from replay_buffer import ReplayBuffer, PrioritizedReplayBuffer
+from profiling import profiler
+from sim_config import SimConfig
+
+def parse_cpu_list(text):
+    """CPU ids from a list like '0-3,8,10-11'"""
+    cpus = []
+    for part in text.split(','):
+        if '-' in part:
+            first, last = part.split('-')
+            cpus.extend(range(int(first), int(last) + 1))
+        elif part.strip():
+            cpus.append(int(part))
+    return cpus
+
+
+def configure_torch_threads(num_threads=None, interop_threads=None, cpus=None):
+    """Per-process CPU settings: pin to `cpus` and set torch's intra-op / inter-op thread counts.
+
+    None leaves a setting alone, except that pinning without a thread count uses
+    one intra-op thread per pinned CPU (torch would otherwise size its pool for
+    the whole machine). Inter-op threads can only be changed before torch starts
+    any parallel work; a late change is reported and skipped.
+    """
+    if cpus is not None:
+        if hasattr(os, 'sched_setaffinity'):
+            os.sched_setaffinity(0, cpus)
+            if num_threads is None:
+                num_threads = len(cpus)
+        else:
+            print("CPU affinity is not supported on this platform; ignoring it")
+    if num_threads is not None and torch.get_num_threads() != num_threads:
+        torch.set_num_threads(num_threads)
+    if interop_threads is not None and torch.get_num_interop_threads() != interop_threads:
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError:
+            print(f"Inter-op threads already started; keeping {torch.get_num_interop_threads()}")
+
 
 # caluation of q 
 class DQNAgent (nn.Module):
@@ -19,20 +57,93 @@ class DQNAgent (nn.Module):
         x = torch.relu(self.fc2(x))
         return self.fc3(x)
     
+class NumpyPolicy:
+    """NumPy copy of a `DQNAgent` for action selection.
+
+    A forward pass of this 8-64-64-4 MLP is a few microseconds of math, far less
+    than the cost of building tensors and dispatching torch ops for it. On CPU
+    the arrays are views of the network's parameters, so in-place optimizer and
+    `load_state_dict` updates show up without copying; on other devices (or
+    after parameters are rebound) call `sync` to refresh them.
+    """
+
+    def __init__(self, network, state_size):
+        self.network = network
+        # reusable single-state input
+        self._state = np.empty(state_size, dtype=np.float32)
+        self.sync()
+
+    def sync(self):
+        """(Re)bind the weights to the network's current parameters"""
+        layers = (self.network.fc1, self.network.fc2, self.network.fc3)
+        self.layers = [(layer.weight.detach().cpu().numpy(), layer.bias.detach().cpu().numpy()) for layer in layers]
+
+    def q_values(self, states):
+        """Q-values of a (K, state_size) float32 batch"""
+        (w1, b1), (w2, b2), (w3, b3) = self.layers
+        x = states @ w1.T
+        x += b1
+        np.maximum(x, 0, out=x)
+        x = x @ w2.T
+        x += b2
+        np.maximum(x, 0, out=x)
+        x = x @ w3.T
+        x += b3
+        return x
+
+    def act(self, state):
+        """Greedy action for one state"""
+        # matrix-vector products: cheaper than a (1, n) batch for a single state
+        (w1, b1), (w2, b2), (w3, b3) = self.layers
+        x = self._state
+        x[:] = state
+        x = w1.dot(x)
+        x += b1
+        np.maximum(x, 0, out=x)
+        x = w2.dot(x)
+        x += b2
+        np.maximum(x, 0, out=x)
+        x = w3.dot(x)
+        x += b3
+        return int(x.argmax())
+
+    def act_batch(self, states):
+        """Greedy actions for a (K, state_size) batch"""
+        return self.q_values(np.asarray(states, dtype=np.float32)).argmax(axis=1)
+
+
 class Agent:
     #: Stores past experiences
-    def __init__(self, state_size, action_size, learning_rate=0.0001):
+    def __init__(self, state_size, action_size, learning_rate=0.0001, sim=None):
             self.state_size = state_size
             self.action_size = action_size
-            self.memory = deque(maxlen=2000)
+            # hyperparameters from a SimConfig (config.py snapshot unless given)
+            if sim is None:
+                sim = SimConfig.from_config()
+            self.sim = sim
+
+            self.prioritized = sim.prioritized_replay
+            if self.prioritized:
+                self.memory = PrioritizedReplayBuffer(sim.memory_size, state_size, alpha=sim.per_alpha,
+                                                      beta_start=sim.per_beta_start, beta_steps=sim.per_beta_steps,
+                                                      epsilon=sim.per_epsilon)
+            else:
+                self.memory = ReplayBuffer(sim.memory_size, state_size)
             
-            # Exploration rate
-            self.epsilon = 1.0
-            self.epsilon_min = 0.01
-            self.epsilon_decay = 0.995
+            # Exploration rate, decayed once per environment step (transition), so the schedule
+            # is measured in experience whether it comes from one arena, K arenas or several actors
+            self.epsilon = sim.epsilon_start
+            self.epsilon_min = sim.epsilon_min
+            self.epsilon_decay = sim.epsilon_decay
+
+            # update schedule: `gradient_steps` replays of `batch_size` every `train_every` env steps
+            self.train_every = max(1, sim.train_every_n_steps)
+            self.gradient_steps = sim.gradient_steps
+            self.batch_size = sim.batch_size
+            self.env_steps = 0
             
             # Discount factor
-            self.gamma = 0.95
+            self.gamma = sim.gamma
             self.learning_rate = learning_rate
             
             # Neural networks
@@ -44,13 +155,28 @@ class Agent:
             self.target_network = DQNAgent(state_size, action_size).to(self.device)
             #copy weights from main to target
             self.target_network.load_state_dict(self.q_network.state_dict())
+            # parameter lists for the fused soft update
+            self.tau = sim.target_update_frequency
+            self._q_params = list(self.q_network.parameters())
+            self._target_params = list(self.target_network.parameters())
             
             self.optimizer = optim.Adam(self.q_network.parameters(), lr=learning_rate)
             self.loss_fn = nn.MSELoss()
 
+            # action selection through a NumPy copy of q_network; its arrays alias the
+            # parameters on CPU, elsewhere they are re-copied every `policy_sync_every` updates
+            self.fast_inference = sim.fast_inference
+            self.policy = NumpyPolicy(self.q_network, state_size)
+            self.policy_sync_every = max(1, sim.policy_sync_every)
+            self._policy_aliased = self.device.type == 'cpu'
+            self.updates = 0
+
 
     def remember(self, state, action, reward, next_state, done):
-        self.memory.append((state, action, reward, next_state, done))
+        self.memory.add(state, action, reward, next_state, done)
+
+    def remember_batch(self, states, actions, rewards, next_states, dones):
+        self.memory.add_batch(states, actions, rewards, next_states, dones)
 
     def act(self, state):
         #start with random action for exploration
@@ -58,52 +184,96 @@ class Agent:
             return random.randrange(self.action_size)
         
         # the next best action based on q values
-        state = torch.FloatTensor(state).unsqueeze(0).to(self.device)
-        with torch.no_grad():
+        if self.fast_inference:
+            return self.policy.act(state)
+        state = torch.as_tensor(np.asarray(state, dtype=np.float32)).unsqueeze(0).to(self.device)
+        with torch.inference_mode():
             q_values = self.q_network(state)
         return torch.argmax(q_values).item()
 
+    def act_batch(self, states):
+        """Epsilon-greedy actions for a (K, state_size) batch in one forward pass"""
+        if self.fast_inference:
+            actions = self.policy.act_batch(states)
+        else:
+            states = torch.as_tensor(np.asarray(states, dtype=np.float32)).to(self.device)
+            with torch.inference_mode():
+                actions = torch.argmax(self.q_network(states), dim=1).cpu().numpy()
+
+        # explore independently per row
+        explore = np.random.rand(len(actions)) <= self.epsilon
+        actions[explore] = np.random.randint(self.action_size, size=int(np.count_nonzero(explore)))
+        return actions
+
     # Backwards-compatible API: some modules expect `choose_action`
     def choose_action(self, state):
         return self.act(state)
     
-    def replay(self, batch_size):
+    def decay_epsilon(self, env_steps=1):
+        """Decay epsilon for `env_steps` environment steps"""
+        if self.epsilon > self.epsilon_min:
+            self.epsilon = max(self.epsilon_min, self.epsilon * self.epsilon_decay ** env_steps)
+
+    def step(self, env_steps=1):
+        """Account for `env_steps` new transitions: decay epsilon and run the gradient steps now due.
+
+        Every `train_every` env steps (transitions, so K per step of a K-arena
+        vector env) the agent runs `gradient_steps` replays of `batch_size`, once
+        the buffer holds more than a batch. Returns the number of replays run.
+        """
+        self.decay_epsilon(env_steps)
+        due = (self.env_steps + env_steps) // self.train_every - self.env_steps // self.train_every
+        self.env_steps += env_steps
+        if not due or len(self.memory) <= self.batch_size:
+            return 0
+        updates = due * self.gradient_steps
+        for _ in range(updates):
+            self.replay(self.batch_size)
+        return updates
+
+    def replay(self, batch_size=None):
+        """One gradient step on a sampled batch (plus the soft target update)"""
+        if batch_size is None:
+            batch_size = self.batch_size
         if len(self.memory) < batch_size:
             return
         #start training with random samples from memory
-        minibatch = random.sample(self.memory, batch_size)
-        
-        #get batches information
-        states = torch.FloatTensor([experience[0] for experience in minibatch]).to(self.device)
-        actions = torch.LongTensor([experience[1] for experience in minibatch]).unsqueeze(1).to(self.device)
-        rewards = torch.FloatTensor([experience[2] for experience in minibatch]).to(self.device)
-        next_states = torch.FloatTensor([experience[3] for experience in minibatch]).to(self.device)
-        dones = torch.FloatTensor([float(experience[4]) for experience in minibatch]).to(self.device)
-        
-        # Current Q values
-        q_values = self.q_network(states).gather(1, actions).squeeze()
-        
-        # Target Q values
-        with torch.no_grad():
-            next_q_values = self.target_network(next_states).max(1)[0]
-            target_q_values = rewards + (self.gamma * next_q_values * (1 - dones))
+        with profiler.phase('replay.sample'):
+            indices = self.memory.sample_indices(batch_size)
+        with profiler.phase('replay.tensors'):
+            states, actions, rewards, next_states, dones = self.memory.get_batch(indices, self.device)
+            if self.prioritized:
+                weights = self.memory.importance_weights(indices, self.device)
+            actions = actions.unsqueeze(1)
         
-        # Compute loss
-        loss = self.loss_fn(q_values, target_q_values)
+        with profiler.phase('replay.forward'):
+            # Current Q values
+            q_values = self.q_network(states).gather(1, actions).squeeze()
+            
+            # Target Q values
+            with torch.no_grad():
+                next_q_values = self.target_network(next_states).max(1)[0]
+                target_q_values = rewards + (self.gamma * next_q_values * (1 - dones))
+            
+            # Compute loss, weighting each sample by its importance-sampling weight under prioritized replay
+            if self.prioritized:
+                td_errors = target_q_values - q_values
+                loss = (weights * td_errors.pow(2)).mean()
+                self.memory.update_priorities(indices, td_errors.detach().abs().cpu().numpy())
+            else:
+                loss = self.loss_fn(q_values, target_q_values)
         
-        # Optimize the model
-        self.optimizer.zero_grad()
-        loss.backward()
-        self.optimizer.step()
+        with profiler.phase('replay.backward'):
+            # Optimize the model
+            self.optimizer.zero_grad()
+            loss.backward()
+            self.optimizer.step()
+            self.updates += 1
         
-        # Soft-update target network towards q_network
-        try:
-            tau = getattr(config, 'TARGET_UPDATE_FREQUENCY', 0.01)
-            for target_param, param in zip(self.target_network.parameters(), self.q_network.parameters()):
-                target_param.data.copy_(tau * param.data + (1.0 - tau) * target_param.data)
-        except Exception:
-            pass
+        with profiler.phase('replay.soft_update'):
+            # Soft-update target network towards q_network: target += tau * (q - target), all tensors at once
+            with torch.no_grad():
+                torch._foreach_lerp_(self._target_params, self._q_params, self.tau)
 
-        # Decay epsilon
-        if self.epsilon > self.epsilon_min:
-            self.epsilon *= self.epsilon_decay
\ No newline at end of file
+        if not self._policy_aliased and self.updates % self.policy_sync_every == 0:
+            self.policy.sync()
\ No newline at end of file
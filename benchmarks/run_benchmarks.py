@@ -0,0 +1,278 @@
+"""Seeded micro-benchmarks for the environment, agent and evolution hot paths.
+
+Run from the repository root:
+
+    python -m benchmarks.run_benchmarks                 # full suite
+    python -m benchmarks.run_benchmarks --quick         # smaller sizes, fewer repeats
+    python -m benchmarks.run_benchmarks --filter replay --json out.json
+    python -m benchmarks.run_benchmarks --compare old.json
+
+Prints a table and writes the results (with commit and library versions) as
+JSON so runs can be compared across commits.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+# allow `python benchmarks/run_benchmarks.py` as well as `-m`
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import numpy as np
+import torch
+
+import config
+import kernels
+from agent import Agent
+from collision_detector import CollisionDetector, SpatialGrid
+from GameEnvironment import GameEnvironment
+from vector_env import VectorGameEnvironment
+
+SEED = 1234
+
+
+def seed_everything(seed=SEED):
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+
+
+def time_calls(fn, calls, repeats):
+    """Run `fn` `calls` times per repeat; return per-call seconds of every repeat"""
+    fn()  # warm-up
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        samples.append((time.perf_counter() - start) / calls)
+    return samples
+
+
+def make_env(num_fish):
+    seed_everything()
+    env = GameEnvironment(config.WINDOW_WIDTH, config.WINDOW_HEIGHT, num_fish)
+    # keep the population steady for the measurement
+    env.Max_steps = 10**9
+    return env
+
+
+def bench_env_step(num_fish):
+    env = make_env(num_fish)
+    return lambda: env.step(np.random.randint(config.ACTION_SIZE))
+
+
+def bench_get_state(num_fish):
+    env = make_env(num_fish)
+    return env.get_state
+
+
+def bench_compute_reward(num_fish):
+    env = make_env(num_fish)
+    return env.compute_reward
+
+
+def bench_vector_step(num_envs, num_fish=config.NUM_FISH):
+    seed_everything()
+    env = VectorGameEnvironment(num_envs, config.WINDOW_WIDTH, config.WINDOW_HEIGHT, num_fish)
+    return lambda: env.step(np.random.randint(config.ACTION_SIZE, size=num_envs))
+
+
+def without_kernels(fn):
+    """`fn` run on the NumPy path: the compiled kernels are switched off for each call"""
+    def call():
+        enabled = kernels.ENABLED
+        kernels.ENABLED = False
+        try:
+            return fn()
+        finally:
+            kernels.ENABLED = enabled
+    return call
+
+
+def bench_ball_collisions(num_fish, use_grid, compiled=False):
+    env = make_env(num_fish)
+    env.grid.rebuild(env.population.x, env.population.y)
+    grid = env.grid if use_grid else None
+    check = lambda: CollisionDetector.check_ball_population_collisions(env.ball, env.population, grid)
+    # the kernel ignores the grid, so the grid / no-grid cases only differ on the NumPy path
+    return check if compiled else without_kernels(check)
+
+
+def bench_grid_rebuild(num_fish):
+    env = make_env(num_fish)
+    return lambda: env.grid.rebuild(env.population.x, env.population.y)
+
+
+def bench_fish_pairs(num_fish):
+    env = make_env(num_fish)
+    env.grid.rebuild(env.population.x, env.population.y)
+    return lambda: CollisionDetector.check_population_fish_fish_collisions(env.population, env.grid)
+
+
+def bench_closest_fish(num_fish):
+    env = make_env(num_fish)
+    fish_list = env.fish_list
+    return lambda: CollisionDetector.closest_fish(env.ball, fish_list)
+
+
+def make_agent(epsilon, fill=0):
+    seed_everything()
+    agent = Agent(config.STATE_SIZE, config.ACTION_SIZE, config.LEARNING_RATE)
+    agent.epsilon = epsilon
+    if fill:
+        states = np.random.rand(fill, config.STATE_SIZE).astype(np.float32)
+        agent.remember_batch(states, np.random.randint(config.ACTION_SIZE, size=fill), np.random.rand(fill),
+                             np.roll(states, 1, axis=0), np.random.rand(fill) < 0.01)
+    return agent
+
+
+def bench_agent_act(fast):
+    agent = make_agent(epsilon=0.0)
+    agent.fast_inference = fast
+    state = np.random.rand(config.STATE_SIZE).astype(np.float32)
+    return lambda: agent.act(state)
+
+
+def bench_agent_act_batch(batch, fast):
+    agent = make_agent(epsilon=0.0)
+    agent.fast_inference = fast
+    states = np.random.rand(batch, config.STATE_SIZE).astype(np.float32)
+    return lambda: agent.act_batch(states)
+
+
+def bench_agent_replay(batch_size):
+    agent = make_agent(epsilon=1.0, fill=config.MEMORY_SIZE)
+    return lambda: agent.replay(batch_size)
+
+
+def bench_env_reset(num_fish):
+    env = make_env(num_fish)
+    for _ in range(10):
+        env.step(np.random.randint(config.ACTION_SIZE))
+    return env.reset
+
+
+def scenarios(quick):
+    """(name, params, factory, calls) for every benchmark"""
+    fish_sizes = [10, 1000] if quick else [10, 100, 1000, 10000]
+    big = 1000 if quick else 10000
+    batch_sizes = [32, 128] if quick else [32, 128, 512]
+    out = []
+    for n in fish_sizes:
+        out.append(('env.step', {'num_fish': n}, lambda n=n: bench_env_step(n), 200))
+    for n in (10, big):
+        out.append(('env.get_state', {'num_fish': n}, lambda n=n: bench_get_state(n), 2000))
+        out.append(('env.compute_reward', {'num_fish': n}, lambda n=n: bench_compute_reward(n), 2000))
+    for k in ((4, 16) if quick else (4, 16, 64)):
+        out.append(('vector_env.step', {'num_envs': k, 'num_fish': config.NUM_FISH}, lambda k=k: bench_vector_step(k), 200))
+    for n in (100, big):
+        out.append(('collisions.ball_population', {'num_fish': n, 'grid': False}, lambda n=n: bench_ball_collisions(n, False), 1000))
+        out.append(('collisions.ball_population', {'num_fish': n, 'grid': True}, lambda n=n: bench_ball_collisions(n, True), 1000))
+        if kernels.ENABLED:
+            out.append(('collisions.ball_population', {'num_fish': n, 'numba': True},
+                        lambda n=n: bench_ball_collisions(n, False, compiled=True), 1000))
+        out.append(('collisions.grid_rebuild', {'num_fish': n}, lambda n=n: bench_grid_rebuild(n), 500))
+        out.append(('collisions.fish_pairs', {'num_fish': n}, lambda n=n: bench_fish_pairs(n), 50))
+    out.append(('collisions.closest_fish', {'num_fish': 100}, lambda: bench_closest_fish(100), 500))
+    for fast in (True, False):
+        out.append(('agent.act', {'fast': fast}, lambda fast=fast: bench_agent_act(fast), 2000))
+    for b in (16, 256):
+        for fast in (True, False):
+            out.append(('agent.act_batch', {'batch': b, 'fast': fast},
+                        lambda b=b, fast=fast: bench_agent_act_batch(b, fast), 1000))
+    for b in batch_sizes:
+        out.append(('agent.replay', {'batch_size': b}, lambda b=b: bench_agent_replay(b), 200))
+    for n in (10, big):
+        out.append(('env.reset', {'num_fish': n}, lambda n=n: bench_env_reset(n), 20))
+    return out
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def format_params(params):
+    return ", ".join(f"{k}={v}" for k, v in params.items())
+
+
+def print_table(results, baseline=None):
+    header = f"{'benchmark':<30}{'params':<28}{'median us':>12}{'min us':>12}{'calls/sec':>14}"
+    if baseline:
+        header += f"{'vs base':>10}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        line = (f"{r['name']:<30}{format_params(r['params']):<28}{r['median_us']:>12.1f}"
+                f"{r['min_us']:>12.1f}{r['calls_per_sec']:>14.0f}")
+        if baseline:
+            base = baseline.get((r['name'], format_params(r['params'])))
+            line += f"{base / r['median_us']:>9.2f}x" if base else f"{'-':>10}"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--quick', action='store_true', help='smaller sizes and fewer repeats')
+    parser.add_argument('--filter', default=None, help='only run benchmarks whose name contains this text')
+    parser.add_argument('--repeats', type=int, default=None, help='timed repeats per benchmark')
+    parser.add_argument('--json', default='bench_results.json', help='where to write the JSON results')
+    parser.add_argument('--compare', default=None, help='earlier JSON results to compare against')
+    args = parser.parse_args(argv)
+
+    repeats = args.repeats or (3 if args.quick else 5)
+    results = []
+    for name, params, factory, calls in scenarios(args.quick):
+        if args.filter and args.filter not in name:
+            continue
+        calls = max(1, calls // 4) if args.quick else calls
+        samples = time_calls(factory(), calls, repeats)
+        median = float(np.median(samples))
+        results.append({
+            'name': name,
+            'params': params,
+            'calls': calls,
+            'repeats': repeats,
+            'median_us': median * 1e6,
+            'min_us': float(np.min(samples)) * 1e6,
+            'calls_per_sec': 1.0 / median if median > 0 else float('inf'),
+        })
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        baseline = {(r['name'], format_params(r['params'])): r['median_us'] for r in previous['results']}
+    print_table(results, baseline)
+
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'seed': SEED,
+        'quick': args.quick,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'torch': torch.__version__,
+        'torch_threads': torch.get_num_threads(),
+        'machine': platform.machine(),
+        'results': results,
+    }
+    with open(args.json, 'w') as f:
+        json.dump(report, f, indent=4)
+    print(f"\nResults saved: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
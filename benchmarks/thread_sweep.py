@@ -0,0 +1,114 @@
+"""Measure Agent.replay / Agent.act throughput across torch thread settings.
+
+Run from the repository root:
+
+    python -m benchmarks.thread_sweep                      # 1, 2, 4, ... up to the usable CPUs
+    python -m benchmarks.thread_sweep --threads 1,2,4 --interop 1,2 --batch-size 128
+
+Every setting runs in a fresh process (torch's inter-op pool can only be sized
+once per process). Prints the throughput table and recommends the setting for
+the fastest single run and for packing several runs side by side.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# allow `python benchmarks/thread_sweep.py` as well as `-m`
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def usable_cpus():
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def default_thread_counts():
+    counts = []
+    n = 1
+    while n < usable_cpus():
+        counts.append(n)
+        n *= 2
+    return counts + [usable_cpus()]
+
+
+def measure(threads, interop, batch_size, repeats):
+    """Worker side: apply the thread settings and time replay and act in this process"""
+    from agent import configure_torch_threads
+    configure_torch_threads(threads, interop)
+
+    import numpy as np
+    from benchmarks.run_benchmarks import make_agent, time_calls
+    import config
+
+    agent = make_agent(epsilon=0.0, fill=config.MEMORY_SIZE)
+    state = np.random.rand(config.STATE_SIZE).astype(np.float32)
+    replay = float(np.median(time_calls(lambda: agent.replay(batch_size), 100, repeats)))
+    agent.fast_inference = False
+    act_torch = float(np.median(time_calls(lambda: agent.act(state), 1000, repeats)))
+    agent.fast_inference = True
+    act_fast = float(np.median(time_calls(lambda: agent.act(state), 1000, repeats)))
+    return {'threads': threads, 'interop': interop, 'replay_per_sec': 1.0 / replay,
+            'act_torch_per_sec': 1.0 / act_torch, 'act_fast_per_sec': 1.0 / act_fast}
+
+
+def run_setting(threads, interop, batch_size, repeats):
+    # one subprocess per setting so every run starts with fresh thread pools
+    output = subprocess.check_output(
+        [sys.executable, '-m', 'benchmarks.thread_sweep', '--worker', '--threads', str(threads),
+         '--interop', str(interop), '--batch-size', str(batch_size), '--repeats', str(repeats)],
+        cwd=ROOT, text=True)
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', default=None, help='comma-separated intra-op thread counts to try')
+    parser.add_argument('--interop', default='1', help='comma-separated inter-op thread counts to try')
+    parser.add_argument('--batch-size', type=int, default=None, help='replay batch size (default BATCH_SIZE)')
+    parser.add_argument('--repeats', type=int, default=5, help='timed repeats per measurement')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.batch_size is None:
+        import config
+        args.batch_size = config.BATCH_SIZE
+
+    if args.worker:
+        print(json.dumps(measure(int(args.threads), int(args.interop), args.batch_size, args.repeats)))
+        return
+
+    thread_counts = [int(t) for t in args.threads.split(',')] if args.threads else default_thread_counts()
+    interop_counts = [int(t) for t in args.interop.split(',')]
+    cpus = usable_cpus()
+
+    print(f"{cpus} usable CPUs, replay batch size {args.batch_size}")
+    header = (f"{'threads':>8}{'interop':>8}{'replay/s':>12}{'replay/s/thread':>17}"
+              f"{'act torch/s':>14}{'act fast/s':>13}")
+    print(header)
+    print("-" * len(header))
+    results = []
+    for threads in thread_counts:
+        for interop in interop_counts:
+            r = run_setting(threads, interop, args.batch_size, args.repeats)
+            results.append(r)
+            print(f"{threads:>8}{interop:>8}{r['replay_per_sec']:>12.0f}{r['replay_per_sec'] / threads:>17.0f}"
+                  f"{r['act_torch_per_sec']:>14.0f}{r['act_fast_per_sec']:>13.0f}")
+
+    fastest = max(results, key=lambda r: r['replay_per_sec'])
+    # packing: cpus // threads runs side by side, each at its measured single-run rate
+    packed = max(results, key=lambda r: (cpus // r['threads']) * r['replay_per_sec'])
+    print(f"\nFastest single run: TORCH_NUM_THREADS = {fastest['threads']}, "
+          f"TORCH_INTEROP_THREADS = {fastest['interop']} ({fastest['replay_per_sec']:.0f} replays/s)")
+    print(f"Most total throughput when packing runs: TORCH_NUM_THREADS = {packed['threads']}, "
+          f"TORCH_INTEROP_THREADS = {packed['interop']}, {cpus // packed['threads']} runs per host "
+          f"(pin each with --cpus), ~{(cpus // packed['threads']) * packed['replay_per_sec']:.0f} replays/s in total")
+
+
+if __name__ == "__main__":
+    main()
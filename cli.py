@@ -0,0 +1,204 @@
+"""Command-line entry point.
+
+    python cli.py train [--resume latest] [--headless] [--envs 8 | --workers 4] [--threads 2 --cpus 0-1]
+                        [--sim-config sim.json] [--set num_fish=50 --set ball_speed=5]
+    python cli.py evaluate [--model models/model_ep50_....pt] [--episodes 20] [--render] [--set ...]
+    python cli.py benchmark [--sweep] [benchmark options, e.g. --quick --filter replay]
+    python cli.py inspect-stats [models/logs/run_...] [--last 100]
+    python cli.py replay-trajectory run.traj --frames frames/
+
+Only this module and `config` load up front; every subcommand imports what it
+needs (torch, pygame, the simulation) when it runs, so quick jobs such as
+`inspect-stats` start without paying for torch or SDL.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import config
+
+
+def load_sim(args):
+    # SimConfig from config.py, an optional JSON settings file and --set overrides
+    from sim_config import SimConfig, parse_overrides
+
+    try:
+        overrides = parse_overrides(args.set)
+        if args.sim_config:
+            return SimConfig.from_file(args.sim_config, **overrides)
+        return SimConfig.from_config(**overrides)
+    except (TypeError, ValueError) as error:
+        raise SystemExit(f"invalid simulation settings: {error}")
+
+
+def apply_thread_settings():
+    # thread pools and pinning for this process, once before any torch work (all None = torch defaults)
+    from agent import configure_torch_threads
+    configure_torch_threads(config.TORCH_NUM_THREADS, config.TORCH_INTEROP_THREADS, config.CPU_AFFINITY)
+
+
+def cmd_train(args, rest):
+    # command-line settings override config.py before anything reads them
+    if args.headless:
+        config.RENDER_GAME = False
+    if args.envs is not None:
+        config.NUM_ENVS = args.envs
+    if args.workers is not None:
+        config.NUM_WORKERS = args.workers
+    if args.threads is not None:
+        config.TORCH_NUM_THREADS = args.threads
+    if args.interop_threads is not None:
+        config.TORCH_INTEROP_THREADS = args.interop_threads
+    if args.cpus is not None:
+        from agent import parse_cpu_list
+        config.CPU_AFFINITY = parse_cpu_list(args.cpus)
+
+    sim = load_sim(args)
+    apply_thread_settings()
+    if args.workers is not None:
+        if args.resume:
+            raise SystemExit("--resume is not supported with --workers")
+        import parallel_train
+        parallel_train.train_parallel(sim)
+        return
+    import main as training
+    training.main(args.resume, sim)
+
+
+def cmd_evaluate(args, rest):
+    from evaluate import evaluate
+    from utills import ModelManager
+
+    apply_thread_settings()
+    model = args.model
+    if model == 'latest':
+        model = ModelManager().latest_model()
+        if model is None:
+            raise SystemExit("no saved models in models/")
+    summary = evaluate(model, args.episodes, args.render, sim=load_sim(args))
+    print(json.dumps(summary, indent=4))
+
+
+def cmd_benchmark(args, rest):
+    if args.sweep:
+        from benchmarks import thread_sweep
+        thread_sweep.main(rest)
+    else:
+        from benchmarks import run_benchmarks
+        run_benchmarks.main(rest)
+
+
+def latest_run(log_dir):
+    runs = [os.path.join(log_dir, name) for name in os.listdir(log_dir) if name.startswith('run_')]
+    return max(runs, key=os.path.getmtime) if runs else None
+
+
+def cmd_inspect_stats(args, rest):
+    import numpy as np
+    from log_store import read_log
+
+    path = args.path or config.STATS_LOG_DIR
+    if path is None:
+        raise SystemExit("no stats path given and STATS_LOG_DIR is None")
+    if not os.path.exists(path):
+        raise SystemExit(f"no such stats file or log directory: {path}")
+    if path.endswith('.json'):
+        with open(path) as f:
+            print(json.dumps(json.load(f), indent=4))
+        return
+    if not any(name.startswith('episodes_') for name in os.listdir(path)):
+        path = latest_run(path)
+        if path is None:
+            raise SystemExit(f"no run logs in {args.path or config.STATS_LOG_DIR}")
+
+    try:
+        episodes = read_log(path, 'episodes')
+    except FileNotFoundError:
+        raise SystemExit(f"no episode log in {path} (written every SAVE_MODEL_EVERY_N_EPISODES episodes)")
+    rewards = episodes['reward']
+    recent = rewards[-args.last:]
+    print(f"Run: {path}")
+    print(f"episodes: {len(episodes)}")
+    print(f"reward: mean {rewards.mean():.2f} | std {rewards.std():.2f} | median {np.median(rewards):.2f} | "
+          f"min {rewards.min():.2f} | max {rewards.max():.2f}")
+    print(f"last {len(recent)} episodes: mean reward {recent.mean():.2f} | "
+          f"mean fish eaten {episodes['fish_eaten'][-args.last:].mean():.2f}")
+    print(f"total fish eaten: {int(episodes['fish_eaten'].sum())} | mean steps: {episodes['steps'].mean():.1f}")
+
+    try:
+        generations = read_log(path, 'generations')
+    except FileNotFoundError:
+        return
+    last = generations[-1]
+    means = " | ".join(f"{name[:-len('_mean')]} {last[name]:.2f}" for name in generations.dtype.names
+                       if name.endswith('_mean'))
+    print(f"generations: {len(generations)} | latest (gen {last['generation']}) means: {means}")
+
+
+def cmd_replay_trajectory(args, rest):
+    import replay_trajectory
+    replay_trajectory.main(rest)
+
+
+def add_sim_arguments(parser):
+    parser.add_argument('--sim-config', default=None,
+                        help='JSON file of simulation settings (SimConfig field names) overriding config.py')
+    parser.add_argument('--set', action='append', default=[], metavar='NAME=VALUE',
+                        help='override one simulation setting, e.g. --set num_fish=50 (repeatable)')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Fish and ball training tools")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    train = commands.add_parser('train', help='train the ball agent (see main.py)')
+    train.add_argument('--resume', default=None,
+                       help="training state directory saved with SAVE_TRAINING_STATE, or 'latest'")
+    train.add_argument('--headless', action='store_true', help='train without rendering (RENDER_GAME = False)')
+    train.add_argument('--envs', type=int, default=None, help='arenas stepped in lockstep (NUM_ENVS)')
+    train.add_argument('--workers', type=int, default=None,
+                       help='headless actor processes feeding one learner (NUM_WORKERS, see parallel_train.py)')
+    train.add_argument('--threads', type=int, default=None, help='torch intra-op threads (TORCH_NUM_THREADS)')
+    train.add_argument('--interop-threads', type=int, default=None,
+                       help='torch inter-op threads (TORCH_INTEROP_THREADS)')
+    train.add_argument('--cpus', default=None, help="CPUs to pin to, e.g. '0-3' (CPU_AFFINITY)")
+    add_sim_arguments(train)
+    train.set_defaults(handler=cmd_train)
+
+    evaluate = commands.add_parser('evaluate', help='play a saved model greedily and report its statistics')
+    evaluate.add_argument('--model', default='latest', help="model checkpoint, or 'latest'")
+    evaluate.add_argument('--episodes', type=int, default=10, help='episodes to play')
+    evaluate.add_argument('--render', action='store_true', help='show the episodes in a window')
+    add_sim_arguments(evaluate)
+    evaluate.set_defaults(handler=cmd_evaluate)
+
+    # options of the wrapped tools pass straight through (their own --help included)
+    benchmark = commands.add_parser('benchmark', add_help=False,
+                                    help='micro-benchmarks (benchmarks/run_benchmarks.py), or the thread sweep with --sweep')
+    benchmark.add_argument('--sweep', action='store_true', help='run benchmarks/thread_sweep.py instead')
+    benchmark.set_defaults(handler=cmd_benchmark)
+
+    inspect = commands.add_parser('inspect-stats', help='summarize a run\'s episode / generation logs or a stats JSON')
+    inspect.add_argument('path', nargs='?', default=None,
+                         help='run log directory, a directory of runs (newest is used) or a stats .json file')
+    inspect.add_argument('--last', type=int, default=100, help='episodes in the "recent" averages')
+    inspect.set_defaults(handler=cmd_inspect_stats)
+
+    replay = commands.add_parser('replay-trajectory', add_help=False,
+                                 help='render a recorded trajectory file (replay_trajectory.py)')
+    replay.set_defaults(handler=cmd_replay_trajectory)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args, rest = parser.parse_known_args(argv)
+    if rest and args.command not in ('benchmark', 'replay-trajectory'):
+        parser.error(f"unrecognized arguments: {' '.join(rest)}")
+    args.handler(args, rest)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
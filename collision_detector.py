@@ -1,4 +1,130 @@
 import numpy as np
+import kernels
+
+
+class SpatialGrid:
+    """Uniform grid that buckets points by cell for near-linear proximity queries.
+
+    `rebuild` sorts the points by cell id once per tick (a counting-sort layout:
+    `order` holds point indices grouped by cell and `cell_start[c]:cell_start[c + 1]`
+    is the slice of cell c). Radius and pair queries then only touch the cells
+    overlapping the query circle; a row of cells is one contiguous slice.
+    """
+
+    def __init__(self, width, height, cell_size):
+        self.width = width
+        self.height = height
+        self.cell_size = float(cell_size)
+        self.cols = max(1, int(np.ceil(width / self.cell_size)))
+        self.rows = max(1, int(np.ceil(height / self.cell_size)))
+        self.x = np.zeros(0)
+        self.y = np.zeros(0)
+        self.order = np.zeros(0, dtype=np.int64)
+        self.cell_start = np.zeros(self.cols * self.rows + 1, dtype=np.int64)
+
+    @staticmethod
+    def cell_size_for(fish_radius, ball_radius, perception_radius=None):
+        """Cell size covering the largest contact distance (so contacts only need adjacent
+        cells), grown to a quarter of the largest perception radius so perception queries
+        stay within a few rings of cells"""
+        cell = max(2 * fish_radius, ball_radius + fish_radius)
+        if perception_radius is not None and np.size(perception_radius):
+            cell = max(cell, float(np.max(perception_radius)) / 4.0)
+        return cell
+
+    def _cell_coords(self, x, y):
+        cx = np.clip((np.asarray(x) // self.cell_size).astype(np.int64), 0, self.cols - 1)
+        cy = np.clip((np.asarray(y) // self.cell_size).astype(np.int64), 0, self.rows - 1)
+        return cx, cy
+
+    def _cell_range(self, x, y):
+        # scalar cell coordinates, clamped to the grid
+        return (min(max(int(x // self.cell_size), 0), self.cols - 1),
+                min(max(int(y // self.cell_size), 0), self.rows - 1))
+
+    def rebuild(self, x, y):
+        """Bucket the points (x[i], y[i]) into cells"""
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+        cx, cy = self._cell_coords(self.x, self.y)
+        self.cells = cy * self.cols + cx
+        self.order = np.argsort(self.cells, kind='stable')
+        self.cell_start = np.zeros(self.cols * self.rows + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.cells, minlength=self.cols * self.rows), out=self.cell_start[1:])
+
+    def _candidates(self, x, y, radius):
+        # point indices in every cell overlapping the query circle's bounding box
+        cx0, cy0 = self._cell_range(x - radius, y - radius)
+        cx1, cy1 = self._cell_range(x + radius, y + radius)
+        chunks = []
+        for cy in range(cy0, cy1 + 1):
+            first = cy * self.cols + cx0
+            last = cy * self.cols + cx1
+            chunks.append(self.order[self.cell_start[first]:self.cell_start[last + 1]])
+        return np.concatenate(chunks) if chunks else self.order[:0]
+
+    def query_radius(self, x, y, radius):
+        """Indices of points strictly closer than `radius` to (x, y)"""
+        candidates = self._candidates(x, y, radius)
+        dx = self.x[candidates] - x
+        dy = self.y[candidates] - y
+        return candidates[dx * dx + dy * dy < radius * radius]
+
+    def neighbors(self, index, radius):
+        """Indices of the other points strictly closer than `radius` to point `index`"""
+        found = self.query_radius(self.x[index], self.y[index], radius)
+        return found[found != index]
+
+    def pairs_within(self, radius):
+        """All pairs (i, j), i < j, of points strictly closer than `radius`, as two index arrays"""
+        n = len(self.x)
+        if n < 2:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty
+
+        ring = int(np.ceil(radius / self.cell_size))
+        sorted_cells = self.cells[self.order]
+        cx = sorted_cells % self.cols
+        cy = sorted_cells // self.cols
+        rank = np.arange(n)
+
+        firsts = []
+        seconds = []
+        # visit half of the neighborhood so each pair of cells is seen once
+        for dy in range(0, ring + 1):
+            for dx in range(-ring, ring + 1):
+                if dy == 0 and dx < 0:
+                    continue
+                ncx = cx + dx
+                ncy = cy + dy
+                valid = (ncx >= 0) & (ncx < self.cols) & (ncy < self.rows)
+                neighbor = np.where(valid, ncy * self.cols + ncx, 0)
+                begins = np.where(valid, self.cell_start[neighbor], 0)
+                ends = np.where(valid, self.cell_start[neighbor + 1], 0)
+                if dx == 0 and dy == 0:
+                    # same cell: only points after this one in sorted order
+                    begins = rank + 1
+
+                counts = np.maximum(ends - begins, 0)
+                total = int(counts.sum())
+                if total == 0:
+                    continue
+                src = np.repeat(rank, counts)
+                offsets = np.repeat(begins - (np.cumsum(counts) - counts), counts)
+                firsts.append(src)
+                seconds.append(np.arange(total) + offsets)
+
+        if not firsts:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty
+        i = self.order[np.concatenate(firsts)]
+        j = self.order[np.concatenate(seconds)]
+        dx = self.x[i] - self.x[j]
+        dy = self.y[i] - self.y[j]
+        close = dx * dx + dy * dy < radius * radius
+        i = i[close]
+        j = j[close]
+        return np.minimum(i, j), np.maximum(i, j)
 
 
 class CollisionDetector:
@@ -30,6 +156,51 @@ class CollisionDetector:
                 collided.append(fish)
         return collided
 
+    @staticmethod
+    def check_ball_population_collisions(ball, population, grid=None):
+        """Vectorized ball-fish collision test, return boolean mask over the population.
+
+        With a `SpatialGrid` rebuilt from the population positions only fish in cells
+        near the ball are tested; the compiled kernel (when enabled) checks every fish
+        in one pass and ignores the grid.
+        """
+        if kernels.ENABLED:
+            collided = np.empty(len(population), dtype=bool)
+            kernels.within_radius(population.x, population.y, float(ball.x), float(ball.y),
+                                  float(ball.radius + population.radius), collided)
+            return collided
+        if grid is None:
+            return population.distances_to(ball.x, ball.y) < (ball.radius + population.radius)
+        collided = np.zeros(len(population), dtype=bool)
+        collided[grid.query_radius(ball.x, ball.y, ball.radius + population.radius)] = True
+        return collided
+
+    @staticmethod
+    def check_population_fish_fish_collisions(population, grid):
+        """Colliding fish pairs of a population as (i, j) index arrays, using a rebuilt `SpatialGrid`"""
+        return grid.pairs_within(2 * population.radius)
+
+    @staticmethod
+    def resolve_population_fish_fish_collisions(population, pairs):
+        """Swap velocities of every colliding pair, one pair after another (`resolve_fish_fish_collision`).
+
+        A fish in several pairs passes its velocity along the chain, so the pairs
+        are resolved in (i, j) order whatever order the grid found them in.
+        """
+        i, j = pairs
+        if len(i) == 0:
+            return
+        order = np.lexsort((j, i))
+        i = np.ascontiguousarray(i[order], dtype=np.int64)
+        j = np.ascontiguousarray(j[order], dtype=np.int64)
+        if kernels.ENABLED:
+            kernels.swap_velocities(population.vx, population.vy, i, j)
+            return
+        vx, vy = population.vx, population.vy
+        for a, b in zip(i.tolist(), j.tolist()):
+            vx[a], vx[b] = vx[b], vx[a]
+            vy[a], vy[b] = vy[b], vy[a]
+
     @staticmethod
     def check_boundary_collision(entity, width, height):
         """Check if entity collides with boundary"""
@@ -79,16 +250,14 @@ class CollisionDetector:
         if not fish_list:
             return None, float('inf')
 
-        closest_fish = min(fish_list, key=lambda f: CollisionDetector.distance(ball, f))
-        closest_dist = CollisionDetector.distance(ball, closest_fish)
+        distances = CollisionDetector.get_all_fish_distances(ball.x, ball.y, fish_list)
+        closest = int(np.argmin(distances))
 
-        return closest_fish, closest_dist
+        return fish_list[closest], distances[closest]
 
     @staticmethod
     def get_all_fish_distances(ball_x, ball_y, fish_list):
         """Return distances to all fish"""
-        distances = []
-        for fish in fish_list:
-            dist = CollisionDetector.distance_between(ball_x, ball_y, fish.x, fish.y)
-            distances.append(dist)
-        return distances
\ No newline at end of file
+        xs = np.fromiter((fish.x for fish in fish_list), dtype=np.float64, count=len(fish_list))
+        ys = np.fromiter((fish.y for fish in fish_list), dtype=np.float64, count=len(fish_list))
+        return CollisionDetector.distance_between(ball_x, ball_y, xs, ys)
\ No newline at end of file
@@ -9,6 +9,7 @@ TITLE = "fish and ball"
 
 # Game properties
 NUM_FISH = 10
+MAX_STEPS = 1000  # ticks per episode
 
 # Ball properties
 BALL_RADIUS = 28
@@ -21,6 +22,7 @@ FISH_MIN_SPEED = -2
 FISH_MAX_SPEED = 5
 FISH_DIRECTION_CHANGE_MIN = 30
 FISH_DIRECTION_CHANGE_MAX = 100
+FISH_COLLISIONS = False  # fish bounce off each other (velocity swap) when they touch
 
 # Agent / DQN
 STATE_SIZE = 8
@@ -31,8 +33,22 @@ BATCH_SIZE = 32
 GAMMA = 0.95
 EPSILON_START = 1.0
 EPSILON_MIN = 0.01
-EPSILON_DECAY = 0.995
+EPSILON_DECAY = 0.995  # per environment step (transition): NUM_ENVS arenas or NUM_WORKERS actors decay it once each
 TARGET_UPDATE_FREQUENCY = 0.01
+TRAIN_EVERY_N_STEPS = 1  # env steps (transitions) between updates
+GRADIENT_STEPS = 1       # replays of BATCH_SIZE per update; replay ratio = GRADIENT_STEPS / TRAIN_EVERY_N_STEPS
+FAST_INFERENCE = True    # act through a NumPy copy of the q-network instead of torch
+POLICY_SYNC_EVERY = 1    # gradient steps between NumPy policy refreshes (GPU only; on CPU it shares the weights)
+TORCH_NUM_THREADS = None      # intra-op threads per process (None = torch default, all cores); see benchmarks/thread_sweep.py
+TORCH_INTEROP_THREADS = None  # inter-op threads per process (None = torch default)
+CPU_AFFINITY = None           # CPU ids to pin the training process to, e.g. [0, 1, 2, 3] (Linux)
+
+# Prioritized experience replay
+PRIORITIZED_REPLAY = False
+PER_ALPHA = 0.6          # how strongly TD error shapes sampling (0 = uniform)
+PER_BETA_START = 0.4     # initial importance-sampling correction, annealed to 1
+PER_BETA_STEPS = 100000  # replay calls over which beta reaches 1
+PER_EPSILON = 1e-5       # keeps every transition sampleable
 
 # Rewards
 REWARD_SURVIVAL = 0.01
@@ -46,11 +62,35 @@ COLOR_BALL = (255, 100, 100)
 COLOR_FISH = (100, 150, 255)
 COLOR_TEXT = (255, 255, 255)
 FONT_SIZE = 36
+FISH_SPRITE_HEADINGS = 72  # pre-rendered fish rotations (5 degree steps)
 
 # Training / Misc
 SAVE_MODEL_EVERY_N_EPISODES = 50
+CHECKPOINT_ASYNC = True            # write checkpoints on a background thread (ModelManager)
+CHECKPOINT_KEEP = 5                # newest checkpoints kept in models/ (None keeps all)
+CHECKPOINT_REPLAY_BUFFER = False   # include the replay buffer contents in checkpoints
+SAVE_TRAINING_STATE = True         # also save a resumable training state (python main.py --resume ...) with each periodic save
+STATS_LOG_DIR = 'models/logs'  # per-run episode/generation logs (chunked .npy, see log_store.py); None keeps them in memory
+STATS_CHUNK_SIZE = 4096        # rows per log chunk file
 RENDER_GAME = True
+RENDER_EVERY_N_STEPS = 1  # draw one frame every N environment steps
+RENDER_MAX_FPS = 0        # wall-clock cap on drawn frames per second (0 = no cap)
+RENDER_THROTTLE = True    # hold drawn frames to FPS; False lets the simulation run unthrottled
+TRAJECTORY_PATH = None    # file to record ball/fish positions to (see trajectory.py), None to disable
+TRAJECTORY_EVERY_N_TICKS = 1  # record one tick in N
+ACTION_REPEAT = 1         # ticks each agent action is held for (frame skip), in every environment
 VERBOSE = True
+NUM_ENVS = 1  # arenas stepped in lockstep; > 1 trains headless on a VectorGameEnvironment
+USE_NUMBA = True       # compiled fish/collision kernels (kernels.py) when numba is installed
+PROFILE = False        # per-phase timers in the training loop, env step and replay (reported with VERBOSE prints)
+PROFILE_WINDOW = 1000  # most recent samples per phase used for the latency percentiles
+
+# Parallel actor/learner training (parallel_train.py)
+NUM_WORKERS = 4               # actor processes, each with its own environment
+WORKER_FLUSH_EVERY = 64       # transitions an actor batches before writing to the shared buffer
+WEIGHT_SYNC_EVERY = 500       # actor steps between pulls of the learner's weights
+LEARNER_PUBLISH_EVERY = 50    # learner updates between weight publishes
+PARALLEL_REPORT_SECONDS = 10  # interval of the per-worker steps/sec report
 # Ball assist and growth
 BALL_AUTO_CHASE = True
 # Moderate chase strength so fish have a chance to flee
@@ -1,13 +1,18 @@
 import numpy as np
-import config
+import kernels
+from sim_config import SimConfig
 #ball entity
 class Ball:
-    def __init__(self, position, radius, width, height):
+    def __init__(self, position, radius, width, height, sim=None):
+        if sim is None:
+            sim = SimConfig.from_config()
         self.x, self.y = position
         self.position = np.array(position)
         self.vx, self.vy = 0, 0
         self.radius = radius
-        self.speed = config.BALL_SPEED
+        self.speed = sim.ball_speed
+        self.max_speed = float(sim.ball_max_speed)
+        self.max_speed_sq = self.max_speed * self.max_speed
         self.width = width
         self.height = height
     #get ball position and update
@@ -30,15 +35,10 @@ class Ball:
             self.y = self.height - self.radius
             self.vy = -abs(self.vy)
 
-        # Clamp ball velocity to a configurable maximum speed
-        try:
-            max_speed = float(config.BALL_MAX_SPEED)
-        except Exception:
-            max_speed = float(self.speed)
-
-        vel_mag = (self.vx ** 2 + self.vy ** 2) ** 0.5
-        if vel_mag > max_speed and vel_mag > 1e-8:
-            scale = max_speed / vel_mag
+        # Clamp ball velocity to the configured maximum speed (squared test, root only when clamping)
+        vel_sq = self.vx * self.vx + self.vy * self.vy
+        if vel_sq > self.max_speed_sq and vel_sq > 1e-16:
+            scale = self.max_speed / vel_sq ** 0.5
             self.vx *= scale
             self.vy *= scale
 
@@ -46,43 +46,376 @@ class Ball:
     
 
     
-class Fish:
-    def __init__(self, position, width, height, genome=None):
-        self.x, self.y = position
+# genome fields shared by every fish, in storage order
+GENOME_KEYS = ('perception_radius', 'panic_multiplier', 'flee_speed', 'max_speed', 'steering_smoothness')
+
+
+def random_genomes(count, sim=None):
+    """Randomize `count` genomes within the `SimConfig` init bounds, as a (count, len(GENOME_KEYS)) array"""
+    if sim is None:
+        sim = SimConfig.from_config()
+    return np.random.uniform(sim.genome_init_lower, sim.genome_init_upper, size=(count, len(GENOME_KEYS)))
+
+
+def random_genome(sim=None):
+    """Randomize a genome within configured bounds"""
+    return genome_to_dict(random_genomes(1, sim)[0])
+
+
+def genome_to_dict(row):
+    """Genome dict from one row of a genome array"""
+    return {key: float(value) for key, value in zip(GENOME_KEYS, row)}
+
+
+def genomes_to_array(genomes, sim=None):
+    """(N, len(GENOME_KEYS)) array from a list of genome dicts; missing fields take `sim.genome_defaults`"""
+    if sim is None:
+        sim = SimConfig.from_config()
+    defaults = sim.genome_defaults
+    return np.array([[float(g.get(key, default)) for key, default in zip(GENOME_KEYS, defaults)] for g in genomes],
+                    dtype=np.float64).reshape(-1, len(GENOME_KEYS))
+
+
+class FishPopulation:
+    """Structure-of-arrays storage for a fish population.
+
+    Positions, velocities, age, fitness and the genome fields live in contiguous
+    NumPy arrays so the per-tick wander, flee, speed clamp, boundary reflection
+    and fitness update run as vectorized operations. `Fish` objects are views
+    into these arrays (see `views`), created only when first asked for.
+    """
+
+    # per-fish arrays, kept aligned by index
+    ARRAYS = ('x', 'y', 'vx', 'vy', 'direction_change_counter', 'age', 'fitness') + GENOME_KEYS
+
+    def __init__(self, positions, width, height, genomes=None, sim=None):
+        if sim is None:
+            sim = SimConfig.from_config()
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+        count = len(positions)
+        self.sim = sim
         self.width = width
         self.height = height
-        self.size = config.FISH_SIZE
-        # initial random movement
-        self.vx = np.random.uniform(config.FISH_MIN_SPEED, config.FISH_MAX_SPEED)
-        self.vy = np.random.uniform(config.FISH_MIN_SPEED, config.FISH_MAX_SPEED)
-        self.direction_change_counter = 0
+        self.size = sim.fish_size
         self.radius = self.size
 
-        # genome: a dict with behavioral parameters
-        if genome is None:
-            # randomize a genome within configured bounds
-            self.genome = {
-                'perception_radius': float(np.random.uniform(config.FISH_PERCEPTION_MIN, config.FISH_PERCEPTION_MAX)),
-                'panic_multiplier': float(np.random.uniform(config.FISH_PANIC_MIN, config.FISH_PANIC_MAX)),
-                'flee_speed': float(np.random.uniform(config.FLEE_MIN_SPEED, config.FLEE_MAX_SPEED)),
-                'max_speed': float(np.random.uniform(config.FISH_MAX_SPEED * 0.5, config.FISH_MAX_SPEED)),
-                'steering_smoothness': float(np.random.uniform(config.FISH_STEERING_MIN, config.FISH_STEERING_MAX))
-            }
+        self.x = positions[:, 0].copy()
+        self.y = positions[:, 1].copy()
+        # initial random movement
+        self.vx = np.random.uniform(sim.fish_min_speed, sim.fish_max_speed, size=count)
+        self.vy = np.random.uniform(sim.fish_min_speed, sim.fish_max_speed, size=count)
+        self.direction_change_counter = np.zeros(count, dtype=np.int64)
+        # age in steps and fitness for evolutionary selection
+        self.age = np.zeros(count, dtype=np.int64)
+        self.fitness = np.zeros(count, dtype=np.float64)
+
+        # genomes: an (N, len(GENOME_KEYS)) array or a list of genome dicts
+        if genomes is None:
+            genomes = random_genomes(count, sim)
+        elif not isinstance(genomes, np.ndarray):
+            genomes = genomes_to_array(genomes, sim)
+        for col, key in enumerate(GENOME_KEYS):
+            setattr(self, key, np.array(genomes[:, col], dtype=np.float64))
+
+        self._views = None
+
+    def __len__(self):
+        return len(self.x)
+
+    def take(self, indices):
+        """Return a new population holding copies of the selected fish"""
+        population = FishPopulation.__new__(FishPopulation)
+        population.sim = self.sim
+        population.width = self.width
+        population.height = self.height
+        population.size = self.size
+        population.radius = self.radius
+        for name in self.ARRAYS:
+            setattr(population, name, getattr(self, name)[indices].copy())
+        population._views = None
+        return population
+
+    @property
+    def views(self):
+        """One `Fish` view per fish, index-aligned with the arrays"""
+        if self._views is None:
+            self._views = [Fish._view(self, i) for i in range(len(self))]
+        return self._views
+
+    def remove(self, mask):
+        """Drop the fish selected by boolean `mask` and return their (now detached) views"""
+        mask = np.asarray(mask, dtype=bool)
+        removed = []
+        if self._views is not None:
+            removed = [self._views[i] for i in np.flatnonzero(mask)]
+            # removed views keep their last values in a standalone population
+            for fish in removed:
+                fish._detach()
+
+        keep = ~mask
+        for name in self.ARRAYS:
+            setattr(self, name, getattr(self, name)[keep])
+
+        if self._views is not None:
+            self._views = [fish for fish, dead in zip(self._views, mask) if not dead]
+            for i, fish in enumerate(self._views):
+                fish._index = i
+        return removed
+
+    def state_dict(self):
+        """Copies of the per-fish arrays, for checkpointing"""
+        return {name: getattr(self, name).copy() for name in self.ARRAYS}
+
+    def load_state_dict(self, state):
+        """Replace every fish with the ones in `state` (from `state_dict`)"""
+        for name in self.ARRAYS:
+            setattr(self, name, np.array(state[name]))
+        self._views = None
+
+    def genome(self, index):
+        """Genome dict of a single fish"""
+        return {key: float(getattr(self, key)[index]) for key in GENOME_KEYS}
+
+    def genome_array(self, indices=slice(None)):
+        """Genomes of the selected fish as an (N, len(GENOME_KEYS)) array"""
+        return np.column_stack([getattr(self, key)[indices] for key in GENOME_KEYS])
+
+    def distances_to(self, x, y):
+        """Euclidean distance from point (x, y) to every fish"""
+        return np.hypot(self.x - x, self.y - y)
+
+    def nearest(self, x, y):
+        """(distances, index of the closest fish or -1) from point (x, y)"""
+        if kernels.ENABLED:
+            distances = np.empty(len(self))
+            return distances, kernels.nearest(self.x, self.y, float(x), float(y), distances)
+        distances = self.distances_to(x, y)
+        return distances, int(np.argmin(distances)) if len(distances) else -1
+
+    def update_positions(self, active=None):
+        """Move every fish, randomly re-pick wander velocities and reflect off the bounds.
+
+        Only fish in the optional boolean `active` mask move and re-pick wander
+        velocities; the others keep their velocity and direction-change counter.
+        """
+        count = len(self)
+        sim = self.sim
+        min_speed, max_speed = sim.fish_min_speed, sim.fish_max_speed
+        # per-fish direction-change threshold, uniform over [MIN, MAX); drawn as floats,
+        # which is several times cheaper than a bounded np.random.randint
+        low, high = sim.fish_direction_change_min, sim.fish_direction_change_max
+        draws = np.random.random(count)
+        if kernels.ENABLED:
+            use_active = active is not None
+            active = np.asarray(active, dtype=bool) if use_active else np.zeros(0, dtype=bool)
+            change = np.empty(count, dtype=bool)
+            num_change = kernels.wander_step(self.x, self.y, self.vx, self.vy, self.direction_change_counter,
+                                             draws, low, high, use_active, active, change)
+            if num_change:
+                self.vx[change] = np.random.uniform(min_speed, max_speed, size=num_change)
+                self.vy[change] = np.random.uniform(min_speed, max_speed, size=num_change)
+            kernels.reflect(self.x, self.y, self.vx, self.vy, float(self.radius), float(self.width), float(self.height))
+            return
+
+        if active is None:
+            self.x += self.vx
+            self.y += self.vy
+            self.direction_change_counter += 1
+            change = self.direction_change_counter >= low + (draws * (high - low)).astype(np.int64)
         else:
-            # copy genome provided
-            self.genome = dict(genome)
+            np.add(self.x, self.vx, out=self.x, where=active)
+            np.add(self.y, self.vy, out=self.y, where=active)
+            self.direction_change_counter += active
+            change = active & (self.direction_change_counter >= low + (draws * (high - low)).astype(np.int64))
+        num_change = int(np.count_nonzero(change))
+        if num_change:
+            self.vx[change] = np.random.uniform(min_speed, max_speed, size=num_change)
+            self.vy[change] = np.random.uniform(min_speed, max_speed, size=num_change)
+            self.direction_change_counter[change] = 0
+
+        # collision with boundaries (fish inside the bounds are unaffected by the clip)
+        r = self.radius
+        hit_x = (self.x - r < 0) | (self.x + r > self.width)
+        np.negative(self.vx, out=self.vx, where=hit_x)
+        np.clip(self.x, r, self.width - r, out=self.x)
+        hit_y = (self.y - r < 0) | (self.y + r > self.height)
+        np.negative(self.vy, out=self.vy, where=hit_y)
+        np.clip(self.y, r, self.height - r, out=self.y)
+
+    def flee(self, ball, diag, active=None):
+        """Age every fish, update fitness and steer fish that perceive the ball away from it.
+
+        `ball` needs `x`, `y`, `vx`, `vy` given either as scalars or as per-fish arrays
+        (one ball per arena when several arenas share a population). Only fish in the
+        optional boolean `active` mask are aged, scored and steered.
+        """
+        ball_x, ball_y, ball_vx, ball_vy = (np.broadcast_to(np.asarray(v, dtype=np.float64), self.x.shape)
+                                            for v in (ball.x, ball.y, ball.vx, ball.vy))
+        if kernels.ENABLED:
+            self._flee_kernel(ball_x, ball_y, ball_vx, ball_vy, diag, active)
+            return
+
+        sim = self.sim
+        dx = self.x - ball_x
+        dy = self.y - ball_y
+        dist = np.sqrt(dx * dx + dy * dy)
+
+        # update fitness: reward survival and distance from ball
+        gain = sim.fish_fitness_survival_weight + (dist / (diag + 1e-6)) * sim.fish_fitness_distance_weight
+        perceived = dist < self.perception_radius
+        if active is None:
+            self.age += 1
+            self.fitness += gain
+        else:
+            self.age += active
+            self.fitness += np.where(active, gain, 0.0)
+            perceived &= active
+
+        idx = np.flatnonzero(perceived)
+        if idx.size == 0:
+            return
+        dx = dx[idx]
+        dy = dy[idx]
+        dist = dist[idx]
+        ball_vx = ball_vx[idx]
+        ball_vy = ball_vy[idx]
+
+        # predict where the ball will be shortly
+        pred_x = ball_x[idx] + ball_vx * sim.prediction_time
+        pred_y = ball_y[idx] + ball_vy * sim.prediction_time
+        fx = self.x[idx] - pred_x
+        fy = self.y[idx] - pred_y
+        fdist = np.sqrt(fx * fx + fy * fy)
+
+        # flee away from the predicted position, or in a random direction when on top of it
+        degenerate = fdist <= 1e-6
+        safe_dist = np.where(degenerate, 1.0, fdist)
+        nx = fx / safe_dist
+        ny = fy / safe_dist
+        num_degenerate = int(np.count_nonzero(degenerate))
+        if num_degenerate:
+            nx[degenerate] = np.random.uniform(-1.0, 1.0, size=num_degenerate)
+            ny[degenerate] = np.random.uniform(-1.0, 1.0, size=num_degenerate)
+
+        # compute approach dot to scale panic
+        ball_speed = np.sqrt(ball_vx * ball_vx + ball_vy * ball_vy)
+        moving = ball_speed > 1e-6
+        approach_dot = np.where(moving, (ball_vx * dx + ball_vy * dy) / (np.where(moving, ball_speed, 1.0) * (dist + 1e-6)), 0.0)
+        panic = 1.0 + np.where(approach_dot > 0.0, self.panic_multiplier[idx] * approach_dot, 0.0)
+
+        # desired flee velocity using fish-specific flee_speed and panic
+        max_speed = self.max_speed[idx]
+        desired_speed = np.minimum(self.flee_speed[idx] * panic, max_speed)
+
+        # smooth steering using fish-specific steering_smoothness
+        steering = self.steering_smoothness[idx]
+        vx = self.vx[idx]
+        vy = self.vy[idx]
+        vx += (nx * desired_speed - vx) * steering
+        vy += (ny * desired_speed - vy) * steering
+
+        # clamp fish speed to their per-fish max_speed
+        fvel = np.sqrt(vx * vx + vy * vy)
+        over = (fvel > max_speed) & (fvel > 1e-8)
+        scale = np.where(over, max_speed / np.where(over, fvel, 1.0), 1.0)
+        self.vx[idx] = vx * scale
+        self.vy[idx] = vy * scale
+
+    def _flee_kernel(self, ball_x, ball_y, ball_vx, ball_vy, diag, active):
+        # compiled single-pass version of flee, same random draws for fish on the predicted ball position
+        sim = self.sim
+        use_active = active is not None
+        active = np.asarray(active, dtype=bool) if use_active else np.zeros(0, dtype=bool)
+        degenerate = np.empty(len(self), dtype=bool)
+        num_degenerate = kernels.flee(self.x, self.y, self.vx, self.vy, self.age, self.fitness, self.perception_radius,
+                                      self.panic_multiplier, self.flee_speed, self.max_speed, self.steering_smoothness,
+                                      ball_x, ball_y, ball_vx, ball_vy, use_active, active, float(diag),
+                                      float(sim.fish_fitness_survival_weight), float(sim.fish_fitness_distance_weight),
+                                      float(sim.prediction_time), degenerate)
+        if num_degenerate:
+            nx = np.random.uniform(-1.0, 1.0, size=num_degenerate)
+            ny = np.random.uniform(-1.0, 1.0, size=num_degenerate)
+            kernels.flee_degenerate(np.flatnonzero(degenerate), nx, ny, self.x, self.y, self.vx, self.vy,
+                                    self.panic_multiplier, self.flee_speed, self.max_speed, self.steering_smoothness,
+                                    ball_x, ball_y, ball_vx, ball_vy)
+
+
+def _population_field(name):
+    def fget(self):
+        return getattr(self._pop, name)[self._index].item()
 
-        # convenience attributes for quick access
-        self.perception_radius = float(self.genome.get('perception_radius', config.FLEE_DISTANCE))
-        self.panic_multiplier = float(self.genome.get('panic_multiplier', config.PANIC_MULTIPLIER))
-        self.flee_speed = float(self.genome.get('flee_speed', config.FLEE_MIN_SPEED))
-        self.max_speed = float(self.genome.get('max_speed', config.FISH_MAX_SPEED))
-        self.steering_smoothness = float(self.genome.get('steering_smoothness', config.FISH_ACCEL))
+    def fset(self, value):
+        getattr(self._pop, name)[self._index] = value
 
-        # fitness for evolutionary selection
-        self.fitness = 0.0
-        # age in steps (how long this fish has survived this episode)
-        self.age = 0
+    return property(fget, fset)
+
+
+class Fish:
+    """Lightweight view of one fish stored in a `FishPopulation`.
+
+    Constructing a `Fish` directly creates a standalone single-fish population,
+    so the original per-fish API keeps working.
+    """
+
+    __slots__ = ('_pop', '_index')
+
+    def __init__(self, position, width, height, genome=None, sim=None):
+        population = FishPopulation([position], width, height, None if genome is None else [genome], sim)
+        self._pop = population
+        self._index = 0
+        population._views = [self]
+
+    @classmethod
+    def _view(cls, population, index):
+        fish = cls.__new__(cls)
+        fish._pop = population
+        fish._index = index
+        return fish
+
+    def _detach(self):
+        population = self._pop.take([self._index])
+        self._pop = population
+        self._index = 0
+        population._views = [self]
+
+    x = _population_field('x')
+    y = _population_field('y')
+    vx = _population_field('vx')
+    vy = _population_field('vy')
+    direction_change_counter = _population_field('direction_change_counter')
+    age = _population_field('age')
+    fitness = _population_field('fitness')
+    perception_radius = _population_field('perception_radius')
+    panic_multiplier = _population_field('panic_multiplier')
+    flee_speed = _population_field('flee_speed')
+    max_speed = _population_field('max_speed')
+    steering_smoothness = _population_field('steering_smoothness')
+
+    @property
+    def width(self):
+        return self._pop.width
+
+    @property
+    def height(self):
+        return self._pop.height
+
+    @property
+    def size(self):
+        return self._pop.size
+
+    @property
+    def radius(self):
+        return self._pop.radius
+
+    # genome: a dict with behavioral parameters
+    @property
+    def genome(self):
+        return self._pop.genome(self._index)
+
+    @genome.setter
+    def genome(self, genome):
+        for key, default in zip(GENOME_KEYS, self._pop.sim.genome_defaults):
+            getattr(self._pop, key)[self._index] = float(genome.get(key, default))
 
     #get fish angle for rendering
     def get_angle(self):
@@ -107,9 +440,10 @@ class Fish:
 
         self.direction_change_counter += 1
 
-        if self.direction_change_counter >= np.random.randint(config.FISH_DIRECTION_CHANGE_MIN, config.FISH_DIRECTION_CHANGE_MAX):
-            self.vx = np.random.uniform(config.FISH_MIN_SPEED, config.FISH_MAX_SPEED)
-            self.vy = np.random.uniform(config.FISH_MIN_SPEED, config.FISH_MAX_SPEED)
+        sim = self._pop.sim
+        if self.direction_change_counter >= np.random.randint(sim.fish_direction_change_min, sim.fish_direction_change_max):
+            self.vx = np.random.uniform(sim.fish_min_speed, sim.fish_max_speed)
+            self.vy = np.random.uniform(sim.fish_min_speed, sim.fish_max_speed)
             self.direction_change_counter = 0
 
 
@@ -120,4 +454,3 @@ class Fish:
         if self.y - self.radius < 0 or self.y + self.radius > self.height:
             self.vy = -self.vy
             self.y = np.clip(self.y, self.radius, self.height - self.radius)
-
@@ -0,0 +1,54 @@
+"""Run a saved agent greedily (no exploration, no training) and report its episode statistics."""
+
+import config
+from GameEnvironment import GameEnvironment
+from agent import Agent
+from sim_config import SimConfig
+from utills import ModelManager, StatisticsTracker
+
+
+def evaluate(model_path, episodes=10, render=False, verbose=True, sim=None):
+    """Play `episodes` episodes with the checkpoint at `model_path` (in `sim`'s arena); return the summary dict"""
+    if sim is None:
+        sim = SimConfig.from_config()
+    env = GameEnvironment(sim.width, sim.height, sim.num_fish, sim)
+    agent = Agent(sim.state_size, sim.action_size, sim.learning_rate, sim)
+    ModelManager().load_model(agent, model_path)
+    agent.epsilon = 0.0
+    stats_tracker = StatisticsTracker()
+
+    renderer = None
+    if render:
+        import pygame
+        from render import Renderer
+
+        pygame.init()
+        renderer = Renderer(env.width, env.height)
+        clock = pygame.time.Clock()
+
+    try:
+        for episode in range(episodes):
+            state = env.get_state()
+            episode_reward = 0.0
+            done = False
+            while not done:
+                action = agent.act(state)
+                state, reward, done = env.step(action)
+                episode_reward += reward
+                if renderer is not None:
+                    for event in pygame.event.get():
+                        if event.type == pygame.QUIT:
+                            return stats_tracker.get_summary()
+                    renderer.render(env.population, env.ball, episode, env.steps, reward, env.fish_eaten)
+                    clock.tick(config.FPS)
+
+            survivors = len(env.population)
+            stats_tracker.record_episode(episode_reward, env.fish_eaten, env.steps, fish_survived=survivors)
+            if verbose:
+                print(f"Episode {episode + 1} | Reward: {episode_reward:.2f} | Fish Eaten: {env.fish_eaten} | "
+                      f"Survivors: {survivors} | Steps: {env.steps}")
+            env.reset(survivors=survivors)
+    finally:
+        if renderer is not None:
+            pygame.quit()
+    return stats_tracker.get_summary()
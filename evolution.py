@@ -0,0 +1,52 @@
+import numpy as np
+import entity
+from sim_config import SimConfig
+
+
+def next_generation(genomes, fitness, dead_genomes, dead_ages, num_fish, generation, sim=None):
+    """Build the next generation of genomes from the end-of-episode population.
+
+    `genomes` (N, len(GENOME_KEYS)) and `fitness` (N,) describe the fish still
+    alive, `dead_genomes` / `dead_ages` the fish eaten this episode. Elitism,
+    tournament selection, Gaussian mutation and clamping all run as batched
+    array operations, with the rates and bounds of `sim` (a `SimConfig`);
+    returns a (num_fish, len(GENOME_KEYS)) array.
+    """
+    if sim is None:
+        sim = SimConfig.from_config()
+    genomes = np.asarray(genomes, dtype=np.float64).reshape(-1, len(entity.GENOME_KEYS))
+    fitness = np.asarray(fitness, dtype=np.float64)
+
+    # if no survivors, reinitialize randomly
+    if len(genomes) == 0:
+        # if we have dead fish from the episode, replicate the longest-lived genome
+        if len(dead_ages):
+            best = np.asarray(dead_genomes)[int(np.argmax(dead_ages))]
+            return np.tile(best, (num_fish, 1))
+        return entity.random_genomes(num_fish, sim)
+
+    # sort survivors by fitness descending
+    order = np.argsort(-fitness, kind='stable')
+    genomes = genomes[order]
+
+    # Elitism: copy top genomes unchanged
+    elitism = min(sim.fish_genome_elitism, len(genomes), num_fish)
+    num_children = num_fish - elitism
+
+    # Adaptive mutation scale based on generation
+    mutation_scale = sim.fish_mutation_scale * (sim.fish_mutation_decay ** max(0, generation))
+
+    # tournament selection: survivors are sorted best-first, so the winner of
+    # each tournament is the contestant with the lowest index
+    tournament_size = min(sim.fish_tournament_size, len(genomes))
+    contestants = np.random.randint(0, len(genomes), size=(num_children, tournament_size))
+    children = genomes[contestants.min(axis=1)]
+
+    # mutate numeric genome fields
+    mutate = np.random.rand(*children.shape) < sim.fish_mutation_rate
+    children += np.where(mutate, np.random.normal(0.0, mutation_scale, size=children.shape), 0.0)
+
+    # clamp mutated values to sensible bounds
+    np.clip(children, sim.genome_lower, sim.genome_upper, out=children)
+
+    return np.concatenate((genomes[:elitism], children))
@@ -0,0 +1,178 @@
+"""Optional Numba-compiled loops for the per-tick fish hot path.
+
+When numba is importable (and `config.USE_NUMBA` is set) `ENABLED` is True and
+`FishPopulation`, `CollisionDetector` and `GameEnvironment` route the fish
+wander/flee updates, ball-fish and fish-fish collision handling and nearest-fish search through
+these kernels, which work in place on the population arrays in a single pass
+without the temporaries of the vectorized NumPy code. Otherwise the functions
+below are left as plain Python and callers keep using their NumPy paths.
+
+Random draws stay in NumPy so both paths consume `np.random` identically.
+"""
+
+import math
+
+import config
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+ENABLED = numba is not None and config.USE_NUMBA
+
+
+def _jit(fn):
+    if ENABLED:
+        return numba.njit(cache=True)(fn)
+    return fn
+
+
+@_jit
+def wander_step(x, y, vx, vy, counter, draws, low, high, use_active, active, change):
+    """Move every (active) fish by its velocity and flag (in `change`) those due a new wander velocity.
+
+    A fish is due once its direction-change counter reaches low + floor(draw * (high - low))
+    for its uniform [0, 1) `draws` entry. Flagged fish get their counter reset; returns
+    the number flagged.
+    """
+    count = 0
+    span = high - low
+    for i in range(len(x)):
+        change[i] = False
+        if use_active and not active[i]:
+            continue
+        x[i] += vx[i]
+        y[i] += vy[i]
+        counter[i] += 1
+        due = counter[i] >= low + int(draws[i] * span)
+        change[i] = due
+        if due:
+            counter[i] = 0
+            count += 1
+    return count
+
+
+@_jit
+def reflect(x, y, vx, vy, radius, width, height):
+    """Bounce fish off the arena walls and clamp them back inside"""
+    for i in range(len(x)):
+        if x[i] - radius < 0 or x[i] + radius > width:
+            vx[i] = -vx[i]
+            x[i] = min(max(x[i], radius), width - radius)
+        if y[i] - radius < 0 or y[i] + radius > height:
+            vy[i] = -vy[i]
+            y[i] = min(max(y[i], radius), height - radius)
+
+
+@_jit
+def _steer(i, nx, ny, dx, dy, dist, vx, vy, ball_vx, ball_vy, panic_multiplier, flee_speed, max_speed, steering):
+    # steer fish i toward unit direction (nx, ny) at its panic-scaled flee speed
+    ball_speed = math.sqrt(ball_vx * ball_vx + ball_vy * ball_vy)
+    approach_dot = 0.0
+    if ball_speed > 1e-6:
+        approach_dot = (ball_vx * dx + ball_vy * dy) / (ball_speed * (dist + 1e-6))
+    panic = 1.0
+    if approach_dot > 0.0:
+        panic += panic_multiplier[i] * approach_dot
+    desired_speed = min(flee_speed[i] * panic, max_speed[i])
+
+    new_vx = vx[i] + (nx * desired_speed - vx[i]) * steering[i]
+    new_vy = vy[i] + (ny * desired_speed - vy[i]) * steering[i]
+    fvel = math.sqrt(new_vx * new_vx + new_vy * new_vy)
+    if fvel > max_speed[i] and fvel > 1e-8:
+        scale = max_speed[i] / fvel
+        new_vx *= scale
+        new_vy *= scale
+    vx[i] = new_vx
+    vy[i] = new_vy
+
+
+@_jit
+def flee(x, y, vx, vy, age, fitness, perception_radius, panic_multiplier, flee_speed, max_speed, steering,
+         ball_x, ball_y, ball_vx, ball_vy, use_active, active, diag, survival_weight, distance_weight,
+         prediction_time, degenerate):
+    """Fused `FishPopulation.flee`: age, score and steer every (active) fish in one pass.
+
+    Ball values are per-fish arrays (broadcast views work). Perceiving fish sitting
+    exactly on the predicted ball position are flagged in `degenerate` and left for
+    `flee_degenerate`; returns how many there are.
+    """
+    count = 0
+    for i in range(len(x)):
+        degenerate[i] = False
+        if use_active and not active[i]:
+            continue
+        dx = x[i] - ball_x[i]
+        dy = y[i] - ball_y[i]
+        dist = math.sqrt(dx * dx + dy * dy)
+
+        age[i] += 1
+        fitness[i] += survival_weight + (dist / (diag + 1e-6)) * distance_weight
+        if not dist < perception_radius[i]:
+            continue
+
+        fx = x[i] - (ball_x[i] + ball_vx[i] * prediction_time)
+        fy = y[i] - (ball_y[i] + ball_vy[i] * prediction_time)
+        fdist = math.sqrt(fx * fx + fy * fy)
+        if fdist <= 1e-6:
+            degenerate[i] = True
+            count += 1
+            continue
+        _steer(i, fx / fdist, fy / fdist, dx, dy, dist, vx, vy, ball_vx[i], ball_vy[i],
+               panic_multiplier, flee_speed, max_speed, steering)
+    return count
+
+
+@_jit
+def flee_degenerate(indices, nx, ny, x, y, vx, vy, panic_multiplier, flee_speed, max_speed, steering,
+                    ball_x, ball_y, ball_vx, ball_vy):
+    """Steer the fish at `indices` along the given random directions (nx, ny)"""
+    for k in range(len(indices)):
+        i = indices[k]
+        dx = x[i] - ball_x[i]
+        dy = y[i] - ball_y[i]
+        dist = math.sqrt(dx * dx + dy * dy)
+        _steer(i, nx[k], ny[k], dx, dy, dist, vx, vy, ball_vx[i], ball_vy[i],
+               panic_multiplier, flee_speed, max_speed, steering)
+
+
+@_jit
+def nearest(x, y, px, py, distances):
+    """Fill `distances` from point (px, py) to every fish; return the closest index (-1 if none)"""
+    best = -1
+    best_dist = math.inf
+    for i in range(len(x)):
+        dx = x[i] - px
+        dy = y[i] - py
+        d = math.sqrt(dx * dx + dy * dy)
+        distances[i] = d
+        if d < best_dist:
+            best_dist = d
+            best = i
+    return best
+
+
+@_jit
+def within_radius(x, y, px, py, radius, out):
+    """Flag (in `out`) the fish closer than `radius` to point (px, py); return how many"""
+    count = 0
+    radius_sq = radius * radius
+    for i in range(len(x)):
+        dx = x[i] - px
+        dy = y[i] - py
+        hit = dx * dx + dy * dy < radius_sq
+        out[i] = hit
+        if hit:
+            count += 1
+    return count
+
+
+@_jit
+def swap_velocities(vx, vy, first, second):
+    """Swap the velocities of each (first[k], second[k]) pair in turn"""
+    for k in range(len(first)):
+        i = first[k]
+        j = second[k]
+        vx[i], vx[j] = vx[j], vx[i]
+        vy[i], vy[j] = vy[j], vy[i]
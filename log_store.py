@@ -0,0 +1,105 @@
+"""Append-only columnar logs stored as chunked .npy files.
+
+`ColumnLog` keeps the newest rows in a preallocated structured-array chunk,
+so an append is one row assignment. Full chunks are written once to
+`<directory>/<name>_<index>.npy` (or kept in memory when no directory is
+given) and never touched again, so a log can grow to millions of rows without
+the Python-list overhead. For analysis, chunks on disk are memory-mapped
+rather than read (`read_log`, `ColumnLog.chunks`).
+"""
+
+import glob
+import os
+
+import numpy as np
+
+
+class ColumnLog:
+    """Table of fixed-dtype columns with O(1) appends"""
+
+    def __init__(self, columns, directory=None, name='log', chunk_size=4096):
+        self.dtype = np.dtype(list(columns))
+        self.directory = directory
+        self.name = name
+        self.chunk_size = int(chunk_size)
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+        self._chunk = np.zeros(self.chunk_size, dtype=self.dtype)
+        self._fill = 0
+        # completed chunks: written to disk, or kept here without a directory
+        self._completed = 0
+        self._memory_chunks = []
+
+    def __len__(self):
+        return self._completed * self.chunk_size + self._fill
+
+    def _chunk_path(self, index):
+        return os.path.join(self.directory, f"{self.name}_{index:06d}.npy")
+
+    def append(self, row):
+        """Append one row, given as a tuple in column order"""
+        self._chunk[self._fill] = row
+        self._fill += 1
+        if self._fill == self.chunk_size:
+            if self.directory is not None:
+                np.save(self._chunk_path(self._completed), self._chunk)
+            else:
+                self._memory_chunks.append(self._chunk)
+            self._completed += 1
+            self._chunk = np.zeros(self.chunk_size, dtype=self.dtype)
+            self._fill = 0
+
+    def flush(self):
+        """Write the partly filled chunk too, so the files on disk hold every row"""
+        if self.directory is not None and self._fill:
+            np.save(self._chunk_path(self._completed), self._chunk[:self._fill])
+
+    def state_dict(self):
+        """Row count and the rows not yet in a completed chunk, for resuming the log"""
+        state = {'completed': self._completed, 'rows': self._chunk[:self._fill].copy()}
+        if self.directory is None:
+            state['memory_chunks'] = list(self._memory_chunks)
+        return state
+
+    def load_state_dict(self, state):
+        """Continue a log from `state_dict`; chunk files written after that point are removed"""
+        self._completed = state['completed']
+        self._fill = len(state['rows'])
+        self._chunk[:self._fill] = state['rows']
+        if self.directory is None:
+            self._memory_chunks = list(state['memory_chunks'])
+            return
+        for path in glob.glob(os.path.join(self.directory, f"{self.name}_[0-9]*.npy")):
+            index = int(os.path.basename(path)[len(self.name) + 1:-len('.npy')])
+            if index >= self._completed:
+                os.remove(path)
+
+    def chunks(self):
+        """Row chunks, oldest first; chunks on disk are memory-mapped, not read"""
+        for index in range(self._completed):
+            if self.directory is not None:
+                yield np.load(self._chunk_path(index), mmap_mode='r')
+            else:
+                yield self._memory_chunks[index]
+        if self._fill:
+            yield self._chunk[:self._fill]
+
+    def load(self, column=None):
+        """All rows (or one column) as a single array"""
+        parts = [chunk if column is None else chunk[column] for chunk in self.chunks()]
+        if not parts:
+            empty = np.zeros(0, dtype=self.dtype)
+            return empty if column is None else empty[column]
+        return np.concatenate(parts)
+
+
+def read_log(directory, name, column=None):
+    """Load a log written by `ColumnLog` from its chunk files (all rows, or one column)"""
+    paths = sorted(glob.glob(os.path.join(directory, f"{name}_[0-9]*.npy")))
+    parts = [np.load(path, mmap_mode='r') for path in paths]
+    if column is not None:
+        parts = [part[column] for part in parts]
+    if not parts:
+        raise FileNotFoundError(f"no '{name}' log chunks in {directory}")
+    return np.concatenate(parts)
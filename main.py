@@ -1,29 +1,177 @@
-import pygame
+import os
 import sys
+import time
 import numpy as np
 from GameEnvironment import GameEnvironment
+from vector_env import VectorGameEnvironment
 from agent import Agent
-from render import Renderer
 from utills import ModelManager, StatisticsTracker
 from fish import FishSpawner
+from profiling import profiler
+from sim_config import SimConfig
 import config
 
-def main():
-    pygame.init()
-    
+def summary_with_profile(stats_tracker):
+    """Training summary, plus the per-phase profile when profiling is enabled"""
+    summary = stats_tracker.get_summary()
+    if profiler.enabled:
+        summary['profile'] = profiler.report()
+    return summary
+
+def resume_path(model_manager, resume):
+    """Resume directory for a --resume argument ('latest' picks the newest in the models folder)"""
+    if resume != 'latest':
+        if not os.path.isfile(os.path.join(resume, 'state.pt')):
+            raise SystemExit(f"no saved training state in {resume}")
+        return resume
+    path = model_manager.latest_training_state()
+    if path is None:
+        raise SystemExit(f"no saved training state in {model_manager.save_dir}")
+    return path
+
+def resume_training(model_manager, resume, agent, env):
+    """(stats tracker, progress or None): a fresh tracker, or the saved run's agent, env and tracker restored"""
+    if not resume:
+        return StatisticsTracker(config.STATS_LOG_DIR, config.STATS_CHUNK_SIZE), None
+    path = resume_path(model_manager, resume)
+    # the tracker is built from the saved state so it keeps logging to the original run directory
+    state = model_manager.read_training_state(path, agent.device)
+    try:
+        stats_tracker = StatisticsTracker.from_state(state['stats'], config.STATS_CHUNK_SIZE)
+        return stats_tracker, model_manager.load_training_state(path, agent, env, stats_tracker, state)
+    except (ValueError, RuntimeError) as error:
+        # another arena, fish count, NUM_ENVS or network size than the saved run
+        raise SystemExit(f"cannot resume from {path}: {str(error).splitlines()[0]}")
+
+def train_vectorized(resume=None, sim=None):
+    """Headless training on config.NUM_ENVS arenas stepped in lockstep"""
+    env = VectorGameEnvironment(config.NUM_ENVS, sim.width, sim.height, sim.num_fish, sim)
+    agent = Agent(sim.state_size, sim.action_size, sim.learning_rate, sim)
+    model_manager = ModelManager()
+    stats_tracker, progress = resume_training(model_manager, resume, agent, env)
+
+    episode = 0
+    episode_rewards = np.zeros(env.num_envs)
+    if progress is not None:
+        episode = progress['episode']
+        episode_rewards[:] = progress['episode_rewards']
+
+    print(f"Starting ML Fish Game Training on {env.num_envs} arenas...")
+    print(f"Use config.py to adjust settings")
+    print("-" * 50)
+
+    try:
+        states = env.get_states()
+        while True:
+            # Agent picks one action per arena in a single forward pass
+            with profiler.phase('agent.act'):
+                actions = agent.act_batch(states)
+            with profiler.phase('env.step'):
+                next_states, rewards, dones = env.step(actions)
+            profiler.tick(env.num_envs)
+
+            # Train agent; finished arenas store their terminal state as next_state. The
+            # schedule and epsilon count transitions, so this lockstep step counts num_envs
+            with profiler.phase('agent.replay'):
+                agent.remember_batch(states, actions, rewards, np.where(dones[:, None], env.final_states, next_states), dones)
+                agent.step(env.num_envs)
+
+            episode_rewards += rewards
+            states = next_states
+
+            save_state = False
+            finished = np.flatnonzero(dones)
+            # finished arenas were auto-reset with their next generation
+            genomes = env.genomes if len(finished) else None
+            for i in finished:
+                survivors = int(env.final_survivors[i])
+                stats_tracker.record_episode(episode_rewards[i], int(env.final_fish_eaten[i]), int(env.final_steps[i]), fish_survived=survivors)
+                stats_tracker.record_generation(int(env.generation[i]), genomes[i])
+
+                if config.VERBOSE and (episode + 1) % 10 == 0:
+                    print(f"Episode {episode + 1} | Arena {i} | Reward: {episode_rewards[i]:.2f} | "
+                          f"Fish Eaten: {env.final_fish_eaten[i]} | Survivors: {survivors} | Steps: {env.final_steps[i]} | ")
+                    if profiler.enabled:
+                        profiler.print_report()
+
+                # Save model periodically
+                if (episode + 1) % config.SAVE_MODEL_EVERY_N_EPISODES == 0:
+                    model_manager.save_model(agent, episode + 1)
+                    stats_tracker.flush()
+                    save_state = config.SAVE_TRAINING_STATE
+
+                episode += 1
+                episode_rewards[i] = 0
+
+            # resumable state, once every finished arena has been accounted for
+            if save_state:
+                model_manager.save_training_state(agent, env, stats_tracker,
+                                                  {'episode': episode, 'episode_rewards': episode_rewards.copy()})
+
+    except KeyboardInterrupt:
+        print("\n\nTraining interrupted by user")
+
+    finally:
+        # Print final statistics
+        print("\n" + "=" * 50)
+        print("Training Complete!")
+        stats_tracker.flush()
+        stats_tracker.print_summary()
+
+        # Save final model and stats
+        model_manager.save_model(agent, episode)
+        model_manager.wait()
+        model_manager.save_stats(summary_with_profile(stats_tracker))
+        sys.exit()
+
+def main(resume=None, sim=None):
+    # simulation and agent settings, read from config.py once for the whole run
+    if sim is None:
+        sim = SimConfig.from_config()
+    if config.NUM_ENVS > 1:
+        return train_vectorized(resume, sim)
+
     # Initialize components
-    env = GameEnvironment(config.WINDOW_WIDTH, config.WINDOW_HEIGHT, config.NUM_FISH)
-    agent = Agent(config.STATE_SIZE, config.ACTION_SIZE, config.LEARNING_RATE)
-    renderer = Renderer(config.WINDOW_WIDTH, config.WINDOW_HEIGHT)
+    env = GameEnvironment(sim.width, sim.height, sim.num_fish, sim)
+    agent = Agent(sim.state_size, sim.action_size, sim.learning_rate, sim)
     model_manager = ModelManager()
-    stats_tracker = StatisticsTracker()
-    fish_spawner = FishSpawner(config.WINDOW_WIDTH, config.WINDOW_HEIGHT)
-    
-    clock = pygame.time.Clock()
+    stats_tracker, progress = resume_training(model_manager, resume, agent, env)
+    fish_spawner = FishSpawner(sim.width, sim.height)
+
+    # optional trajectory recording, replayable offline with replay_trajectory.py
+    if config.TRAJECTORY_PATH:
+        from trajectory import TrajectoryRecorder
+        env.recorder = TrajectoryRecorder(config.TRAJECTORY_PATH, env.width, env.height,
+                                          every=config.TRAJECTORY_EVERY_N_TICKS)
+
+    # The display, event loop and frame clock only exist when rendering;
+    # headless runs never import pygame
+    renderer = None
+    clock = None
+    if config.RENDER_GAME:
+        import pygame
+        from render import Renderer
+
+        pygame.init()
+        renderer = Renderer(env.width, env.height)
+        clock = pygame.time.Clock()
+
+    # rendering schedule: a frame every RENDER_EVERY_N_STEPS steps, at most RENDER_MAX_FPS a second;
+    # the simulation itself only waits on the clock when RENDER_THROTTLE is set
+    render_every = max(1, config.RENDER_EVERY_N_STEPS)
+    frame_interval = 1.0 / config.RENDER_MAX_FPS if config.RENDER_MAX_FPS > 0 else 0.0
+    next_frame = 0.0
+
     running = True
     episode = 0
     steps = 0
+    total_steps = 0
     episode_reward = 0
+    if progress is not None:
+        episode = progress['episode']
+        steps = progress['steps']
+        total_steps = progress['total_steps']
+        episode_reward = progress['episode_reward']
     
     print("Starting ML Fish Game Training...")
     print(f"Use config.py to adjust settings")
@@ -31,50 +179,67 @@ def main():
     
     try:
         while running:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    running = False
-            
             # Get current state
             state = env.get_state()
             
             # Agent decides action based on state
-            action = agent.choose_action(state)
+            with profiler.phase('agent.act'):
+                action = agent.choose_action(state)
             
             # Execute action in environment
-            next_state, reward, done = env.step(action)
+            with profiler.phase('env.step'):
+                next_state, reward, done = env.step(action)
+            profiler.tick()
             
             # Train agent
-            agent.remember(state, action, reward, next_state, done)
-            if len(agent.memory) > config.BATCH_SIZE:
-                agent.replay(batch_size=config.BATCH_SIZE)
+            with profiler.phase('agent.replay'):
+                agent.remember(state, action, reward, next_state, done)
+                agent.step()
             
             episode_reward += reward
             steps += 1
+            total_steps += 1
             
-            # Render game
-            if config.RENDER_GAME:
-                renderer.render(env.fish_list, env.ball, episode, steps, reward, env.fish_eaten)
-                clock.tick(config.FPS)
+            # Render game on the frame schedule
+            if renderer is not None and total_steps % render_every == 0 and time.perf_counter() >= next_frame:
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        running = False
+                with profiler.phase('render'):
+                    renderer.render(env.population, env.ball, episode, steps, reward, env.fish_eaten)
+                next_frame = time.perf_counter() + frame_interval
+                if config.RENDER_THROTTLE:
+                    clock.tick(config.FPS)
             
             # Episode done
             if done:
-                survivors = len(env.fish_list)
+                survivors = len(env.population)
                 stats_tracker.record_episode(episode_reward, env.fish_eaten, steps, fish_survived=survivors)
                 
                 if config.VERBOSE and (episode + 1) % 10 == 0:
                       print(f"Episode {episode + 1} | Reward: {episode_reward:.2f} | "
                           f"Fish Eaten: {env.fish_eaten} | Survivors: {survivors} | Steps: {steps} | ")
+                      if profiler.enabled:
+                          profiler.print_report()
                 
                 # Save model periodically
                 if (episode + 1) % config.SAVE_MODEL_EVERY_N_EPISODES == 0:
                     model_manager.save_model(agent, episode + 1)
+                    stats_tracker.flush()
                 
                 # Reset for next episode (pass survivors so fish can adapt)
                 episode += 1
                 steps = 0
                 episode_reward = 0
-                env.reset(survivors=survivors)
+                with profiler.phase('env.reset'):
+                    env.reset(survivors=survivors)
+                stats_tracker.record_generation(env.generation, env.population.genome_array())
+
+                # resumable state at the start of the new episode
+                if config.SAVE_TRAINING_STATE and episode % config.SAVE_MODEL_EVERY_N_EPISODES == 0:
+                    model_manager.save_training_state(agent, env, stats_tracker,
+                                                      {'episode': episode, 'steps': steps, 'total_steps': total_steps,
+                                                       'episode_reward': episode_reward})
     
     except KeyboardInterrupt:
         print("\n\nTraining interrupted by user")
@@ -83,14 +248,21 @@ def main():
         # Print final statistics
         print("\n" + "=" * 50)
         print("Training Complete!")
+        stats_tracker.flush()
         stats_tracker.print_summary()
         
         # Save final model and stats
         model_manager.save_model(agent, episode)
-        model_manager.save_stats(stats_tracker.get_summary())
+        model_manager.wait()
+        model_manager.save_stats(summary_with_profile(stats_tracker))
+        if env.recorder is not None:
+            env.recorder.close()
         
-        pygame.quit()
+        if renderer is not None:
+            pygame.quit()
         sys.exit()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # same options as `python cli.py train`
+    import cli
+    cli.main(['train'] + sys.argv[1:])
@@ -0,0 +1,316 @@
+"""Parallel actor/learner training.
+
+Worker processes each run their own `GameEnvironment` with a CPU copy of
+`DQNAgent`, acting epsilon-greedily and pushing transitions into a replay
+buffer that lives in shared memory. The main process is the single learner:
+it runs `Agent.replay` on that buffer and periodically publishes fresh
+weights (and the current epsilon) for the workers to pull.
+
+Run with `python cli.py train --workers N` (or `python parallel_train.py`);
+settings live in config.py.
+"""
+
+import multiprocessing as mp
+import queue
+import time
+
+import numpy as np
+import torch
+from torch.nn.utils import parameters_to_vector, vector_to_parameters
+
+import config
+from agent import Agent, DQNAgent, NumpyPolicy, configure_torch_threads
+from replay_buffer import ReplayBuffer
+from sim_config import SimConfig
+from utills import ModelManager, StatisticsTracker
+
+
+class SharedReplayBuffer(ReplayBuffer):
+    """ReplayBuffer whose arrays live in shared memory so several processes can write to it.
+
+    A shared cursor counts every transition ever written; writers reserve and
+    fill their slots under its lock, one batch at a time, and the learner copies
+    sampled rows under the same lock so it never reads a half-written slot. The
+    buffer can be handed to child processes at start-up and re-binds its NumPy
+    views there.
+    """
+
+    def __init__(self, capacity, state_size, ctx):
+        self.capacity = int(capacity)
+        self.state_size = state_size
+        self._shared = {
+            'states': ctx.RawArray('f', self.capacity * state_size),
+            'actions': ctx.RawArray('q', self.capacity),
+            'rewards': ctx.RawArray('f', self.capacity),
+            'next_states': ctx.RawArray('f', self.capacity * state_size),
+            'dones': ctx.RawArray('f', self.capacity),
+        }
+        self._cursor = ctx.Value('q', 0)
+        self._bind()
+
+    def _bind(self):
+        self.states = np.frombuffer(self._shared['states'], dtype=np.float32).reshape(self.capacity, self.state_size)
+        self.actions = np.frombuffer(self._shared['actions'], dtype=np.int64)
+        self.rewards = np.frombuffer(self._shared['rewards'], dtype=np.float32)
+        self.next_states = np.frombuffer(self._shared['next_states'], dtype=np.float32).reshape(self.capacity, self.state_size)
+        self.dones = np.frombuffer(self._shared['dones'], dtype=np.float32)
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        for name in ('states', 'actions', 'rewards', 'next_states', 'dones'):
+            del state[name]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._bind()
+
+    @property
+    def position(self):
+        return self._cursor.value % self.capacity
+
+    @property
+    def size(self):
+        return min(self._cursor.value, self.capacity)
+
+    def load_state_dict(self, state):
+        size = len(state['actions'])
+        for name in self.ARRAYS:
+            getattr(self, name)[:size] = state[name]
+        # a cursor that yields the saved size and write position
+        self._cursor.value = size if size < self.capacity else self.capacity + int(state['position'])
+
+    def add(self, state, action, reward, next_state, done):
+        self.add_batch(np.asarray([state]), np.asarray([action]), np.asarray([reward]),
+                       np.asarray([next_state]), np.asarray([done], dtype=np.float32))
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        count = len(actions)
+        with self._cursor.get_lock():
+            idx = (self._cursor.value + np.arange(count)) % self.capacity
+            self.states[idx] = states
+            self.actions[idx] = actions
+            self.rewards[idx] = rewards
+            self.next_states[idx] = next_states
+            self.dones[idx] = dones
+            self._cursor.value += count
+
+    def get_batch(self, indices, device=None):
+        # the cursor only grows, so indices sampled earlier stay valid; a slot rewritten
+        # since then is returned whole (another uniform transition), never torn
+        with self._cursor.get_lock():
+            batch = super().get_batch(indices)
+        if device is not None:
+            batch = tuple(t.to(device) for t in batch)
+        return batch
+
+
+class SharedWeights:
+    """Flat copy of the learner's q-network parameters plus epsilon, in shared memory"""
+
+    def __init__(self, model, ctx):
+        num_params = sum(p.numel() for p in model.parameters())
+        self.array = ctx.RawArray('f', num_params)
+        self.version = ctx.Value('q', 0)
+        self.epsilon = ctx.Value('d', 1.0, lock=False)
+
+    def publish(self, model, epsilon):
+        """Copy `model`'s parameters into shared memory and bump the version"""
+        flat = parameters_to_vector(model.parameters()).detach().cpu().numpy()
+        with self.version.get_lock():
+            np.frombuffer(self.array, dtype=np.float32)[:] = flat
+            self.version.value += 1
+        self.epsilon.value = epsilon
+
+    def pull(self, model, known_version):
+        """Load the published parameters into `model` if newer than `known_version`; return the loaded version"""
+        if self.version.value == known_version:
+            return known_version
+        with self.version.get_lock():
+            flat = torch.from_numpy(np.frombuffer(self.array, dtype=np.float32).copy())
+            version = self.version.value
+        vector_to_parameters(flat, model.parameters())
+        return version
+
+
+def run_actor(worker_id, buffer, weights, step_counts, episode_queue, stop_event, seed, sim):
+    """Worker process: act in a private environment and stream transitions into `buffer`"""
+    # one intra-op thread per actor so workers do not oversubscribe the cores
+    torch.set_num_threads(1)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+
+    from GameEnvironment import GameEnvironment
+
+    env = GameEnvironment(sim.width, sim.height, sim.num_fish, sim)
+    network = DQNAgent(sim.state_size, sim.action_size)
+    version = weights.pull(network, 0)
+    # act through a NumPy copy; re-bound after every pull (vector_to_parameters replaces the tensors)
+    policy = NumpyPolicy(network, sim.state_size)
+
+    # local chunk of transitions, flushed to the shared buffer in one locked write
+    flush_every = config.WORKER_FLUSH_EVERY
+    states = np.zeros((flush_every, sim.state_size), dtype=np.float32)
+    actions = np.zeros(flush_every, dtype=np.int64)
+    rewards = np.zeros(flush_every, dtype=np.float32)
+    next_states = np.zeros((flush_every, sim.state_size), dtype=np.float32)
+    dones = np.zeros(flush_every, dtype=np.float32)
+    pending = 0
+
+    steps = 0
+    episode_reward = 0.0
+    state = env.get_state()
+    try:
+        while not stop_event.is_set():
+            # epsilon-greedy action from the local policy copy
+            if np.random.rand() <= weights.epsilon.value:
+                action = np.random.randint(sim.action_size)
+            else:
+                action = policy.act(state)
+
+            next_state, reward, done = env.step(action)
+            states[pending] = state
+            actions[pending] = action
+            rewards[pending] = reward
+            next_states[pending] = next_state
+            dones[pending] = float(done)
+            pending += 1
+            if pending == flush_every:
+                buffer.add_batch(states, actions, rewards, next_states, dones)
+                pending = 0
+
+            episode_reward += reward
+            steps += 1
+            step_counts[worker_id] += 1
+            state = next_state
+
+            if done:
+                result = (worker_id, episode_reward, env.fish_eaten, env.steps, len(env.population))
+                episode_reward = 0.0
+                env.reset()
+                # the new generation's genomes ride along for the learner's generation log
+                episode_queue.put(result + (env.generation, env.population.genome_array()))
+                state = env.get_state()
+
+            if steps % config.WEIGHT_SYNC_EVERY == 0:
+                pulled = weights.pull(network, version)
+                if pulled != version:
+                    policy.sync()
+                version = pulled
+    except KeyboardInterrupt:
+        pass
+
+
+def train_parallel(sim=None):
+    """Learner process: spawn the actors, train on the shared buffer and publish weights"""
+    ctx = mp.get_context('spawn')
+    num_workers = config.NUM_WORKERS
+    # one settings snapshot for the learner and every actor
+    if sim is None:
+        sim = SimConfig.from_config()
+
+    agent = Agent(sim.state_size, sim.action_size, sim.learning_rate, sim)
+    # workers write uniform transitions into shared memory; prioritized replay is not shared
+    agent.prioritized = False
+    agent.memory = SharedReplayBuffer(sim.memory_size, sim.state_size, ctx)
+    weights = SharedWeights(agent.q_network, ctx)
+    weights.publish(agent.q_network, agent.epsilon)
+
+    model_manager = ModelManager()
+    stats_tracker = StatisticsTracker(config.STATS_LOG_DIR, config.STATS_CHUNK_SIZE)
+
+    step_counts = ctx.RawArray('q', num_workers)
+    episode_queue = ctx.Queue()
+    stop_event = ctx.Event()
+    workers = [ctx.Process(target=run_actor,
+                           args=(i, agent.memory, weights, step_counts, episode_queue, stop_event,
+                                 int(np.random.randint(2**31)), sim),
+                           daemon=True)
+               for i in range(num_workers)]
+    for worker in workers:
+        worker.start()
+
+    print(f"Starting parallel training with {num_workers} actor processes...")
+    print(f"Use config.py to adjust settings")
+    print("-" * 50)
+
+    episode = 0
+    updates = 0
+    actor_steps = 0
+    last_report = time.time()
+    last_counts = np.zeros(num_workers, dtype=np.int64)
+    last_updates = 0
+
+    try:
+        while True:
+            # epsilon and the TRAIN_EVERY_N_STEPS / GRADIENT_STEPS schedule follow the
+            # environment steps the actors have taken, as in the single and vector paths
+            total_steps = int(np.frombuffer(step_counts, dtype=np.int64).sum())
+            ran = agent.step(total_steps - actor_steps)
+            actor_steps = total_steps
+
+            if ran:
+                if (updates + ran) // config.LEARNER_PUBLISH_EVERY > updates // config.LEARNER_PUBLISH_EVERY:
+                    weights.publish(agent.q_network, agent.epsilon)
+                updates += ran
+            else:
+                time.sleep(0.01)
+
+            # collect finished episodes from the actors
+            while True:
+                try:
+                    worker_id, episode_reward, fish_eaten, steps, survivors, generation, genomes = \
+                        episode_queue.get_nowait()
+                except queue.Empty:
+                    break
+                stats_tracker.record_episode(episode_reward, fish_eaten, steps, fish_survived=survivors)
+                stats_tracker.record_generation(generation, genomes)
+                if config.VERBOSE and (episode + 1) % 10 == 0:
+                    print(f"Episode {episode + 1} | Worker {worker_id} | Reward: {episode_reward:.2f} | "
+                          f"Fish Eaten: {fish_eaten} | Survivors: {survivors} | Steps: {steps} | ")
+
+                # Save model periodically
+                if (episode + 1) % config.SAVE_MODEL_EVERY_N_EPISODES == 0:
+                    model_manager.save_model(agent, episode + 1)
+                    stats_tracker.flush()
+                episode += 1
+
+            # per-worker throughput report
+            now = time.time()
+            if now - last_report >= config.PARALLEL_REPORT_SECONDS:
+                counts = np.frombuffer(step_counts, dtype=np.int64).copy()
+                elapsed = now - last_report
+                rates = (counts - last_counts) / elapsed
+                per_worker = " | ".join(f"w{i}: {rate:.0f}" for i, rate in enumerate(rates))
+                print(f"Steps/sec {per_worker} | total: {rates.sum():.0f} | "
+                      f"updates/sec: {(updates - last_updates) / elapsed:.0f} | buffer: {len(agent.memory)}")
+                last_report = now
+                last_counts = counts
+                last_updates = updates
+
+    except KeyboardInterrupt:
+        print("\n\nTraining interrupted by user")
+
+    finally:
+        stop_event.set()
+        for worker in workers:
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+
+        # Print final statistics
+        print("\n" + "=" * 50)
+        print("Training Complete!")
+        stats_tracker.flush()
+        stats_tracker.print_summary()
+
+        # Save final model and stats
+        model_manager.save_model(agent, episode)
+        model_manager.wait()
+        model_manager.save_stats(stats_tracker.get_summary())
+
+
+if __name__ == "__main__":
+    # learner process threads and pinning; the actors set their own in run_actor
+    configure_torch_threads(config.TORCH_NUM_THREADS, config.TORCH_INTEROP_THREADS, config.CPU_AFFINITY)
+    train_parallel()
@@ -0,0 +1,118 @@
+"""Lightweight per-phase timers and counters for the training hot path.
+
+Code under measurement wraps a phase in `with profiler.phase('env.step'):`.
+When profiling is off (`config.PROFILE = False`) `phase` hands back one shared
+no-op context manager, so the instrumentation costs a method call and an
+attribute check per phase. When on, each phase keeps its last
+`config.PROFILE_WINDOW` durations in a ring buffer for rolling percentiles.
+"""
+
+import time
+from contextlib import nullcontext
+
+import numpy as np
+import config
+
+_NULL_PHASE = nullcontext()
+
+
+class _Phase:
+    """Timer for one named phase; reused for every entry (phases are not re-entrant)"""
+
+    __slots__ = ('samples', 'position', 'filled', 'calls', 'total', '_start')
+
+    def __init__(self, window):
+        self.samples = np.zeros(window, dtype=np.float64)
+        self.position = 0
+        self.filled = 0
+        self.calls = 0
+        self.total = 0.0
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self._start
+        self.samples[self.position] = elapsed
+        self.position = (self.position + 1) % len(self.samples)
+        self.filled = min(self.filled + 1, len(self.samples))
+        self.calls += 1
+        self.total += elapsed
+        return False
+
+
+class Profiler:
+    """Named phase timers, event counters and an environment steps/sec meter"""
+
+    def __init__(self, enabled=False, window=1000):
+        self.enabled = enabled
+        self.window = window
+        self.phases = {}
+        self.counters = {}
+        self.steps = 0
+        self._last_steps = 0
+        self._last_time = time.perf_counter()
+
+    def phase(self, name):
+        """Context manager timing one pass through phase `name`"""
+        if not self.enabled:
+            return _NULL_PHASE
+        timer = self.phases.get(name)
+        if timer is None:
+            timer = self.phases[name] = _Phase(self.window)
+        return timer
+
+    def count(self, name, amount=1):
+        """Add `amount` to counter `name`"""
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def tick(self, steps=1):
+        """Record `steps` environment steps for the steps/sec rate"""
+        if self.enabled:
+            self.steps += steps
+
+    def report(self):
+        """Rolling latency percentiles (ms) per phase plus steps/sec since the previous report"""
+        now = time.perf_counter()
+        elapsed = now - self._last_time
+        steps_per_sec = (self.steps - self._last_steps) / elapsed if elapsed > 0 else 0.0
+        self._last_time = now
+        self._last_steps = self.steps
+
+        phases = {}
+        for name, timer in self.phases.items():
+            if not timer.filled:
+                continue
+            window = timer.samples[:timer.filled] * 1000.0
+            p50, p90, p99 = np.percentile(window, (50, 90, 99))
+            phases[name] = {
+                'calls': timer.calls,
+                'total_s': timer.total,
+                'mean_ms': float(window.mean()),
+                'p50_ms': float(p50),
+                'p90_ms': float(p90),
+                'p99_ms': float(p99),
+            }
+        return {
+            'steps': self.steps,
+            'steps_per_sec': steps_per_sec,
+            'phases': phases,
+            'counters': dict(self.counters),
+        }
+
+    def print_report(self, report=None):
+        """Print a report (a fresh one unless given) as a table"""
+        report = report or self.report()
+        print(f"Profile | {report['steps_per_sec']:.0f} steps/sec | {report['steps']} steps")
+        for name, p in sorted(report['phases'].items()):
+            print(f"  {name:<22} calls {p['calls']:>9} | mean {p['mean_ms']:8.3f} ms | "
+                  f"p50 {p['p50_ms']:8.3f} | p90 {p['p90_ms']:8.3f} | p99 {p['p99_ms']:8.3f}")
+        for name, value in sorted(report['counters'].items()):
+            print(f"  {name:<22} {value}")
+
+
+# process-wide profiler used by the environment, agent and training loops
+profiler = Profiler(enabled=config.PROFILE, window=config.PROFILE_WINDOW)
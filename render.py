@@ -1,30 +1,83 @@
+import numpy as np
 import pygame
 import config
 
 class Renderer:
     """Screen initialization and rendering"""
 
-    def __init__(self, width, height):
+    def __init__(self, width, height, offscreen=False):
         self.width = width
         self.height = height
-        self.screen = pygame.display.set_mode((self.width, self.height))
-        pygame.display.set_caption(config.TITLE)
+        # offscreen renderers draw into a plain surface (no window), e.g. for recordings
+        self.offscreen = offscreen
+        if offscreen:
+            self.screen = pygame.Surface((self.width, self.height))
+        else:
+            self.screen = pygame.display.set_mode((self.width, self.height))
+            pygame.display.set_caption(config.TITLE)
         
         # Initialize fonts for UI text
         self.font_large = pygame.font.Font(None, 36)
         self.font_small = pygame.font.Font(None, 24)
 
-    
-    def draw_fish(self, fish_list):
-        """Draw all fish as triangles"""
-        for fish in fish_list:
-            pygame.draw.polygon(self.screen, config.COLOR_FISH, fish.get_points())
+        # fish triangles pre-rasterized at quantized headings, blitted instead of drawn per fish
+        self.fish_sprites = self._build_fish_sprites(self.screen, config.FISH_SIZE, config.FISH_SPRITE_HEADINGS)
+        self.fish_sprite_offset = self.fish_sprites[0].get_width() // 2
+
+        # rendered UI text surfaces, re-rendered only when their text changes
+        self._text_cache = {}
+
+    @staticmethod
+    def _build_fish_sprites(screen, size, headings):
+        # one transparent surface per heading, triangle points as in Fish.get_points
+        extent = 2 * size + 2
+        center = extent / 2
+        sprites = []
+        for k in range(headings):
+            angle = 2 * np.pi * k / headings
+            points = [(center + size * np.cos(angle + offset), center + size * np.sin(angle + offset))
+                      for offset in (0.0, 2 * np.pi / 3, 4 * np.pi / 3)]
+            # colorkeyed, display-format, RLE-accelerated surfaces blit much faster than per-pixel alpha
+            sprite = pygame.Surface((extent, extent)).convert(screen)
+            sprite.fill(config.COLOR_BACKGROUND)
+            pygame.draw.polygon(sprite, config.COLOR_FISH, points)
+            sprite.set_colorkey(config.COLOR_BACKGROUND, pygame.RLEACCEL)
+            sprites.append(sprite)
+        return sprites
+
+    def draw_fish(self, fish):
+        """Draw all fish as triangles, from a `FishPopulation` or a list of `Fish`"""
+        if isinstance(fish, (list, tuple)):
+            x = np.array([f.x for f in fish], dtype=np.float64)
+            y = np.array([f.y for f in fish], dtype=np.float64)
+            vx = np.array([f.vx for f in fish], dtype=np.float64)
+            vy = np.array([f.vy for f in fish], dtype=np.float64)
+        else:
+            x, y, vx, vy = fish.x, fish.y, fish.vx, fish.vy
+        if len(x) == 0:
+            return
+
+        # heading -> nearest pre-rasterized sprite, then one batched blit
+        headings = len(self.fish_sprites)
+        bins = np.rint(np.arctan2(vy, vx) * (headings / (2 * np.pi))).astype(np.int64) % headings
+        left = (x - self.fish_sprite_offset).astype(np.int64)
+        top = (y - self.fish_sprite_offset).astype(np.int64)
+        sprites = self.fish_sprites
+        self.screen.blits([(sprites[b], (l, t)) for b, l, t in zip(bins.tolist(), left.tolist(), top.tolist())],
+                          doreturn=False)
 
 
     def draw_ball(self, ball):
-        """Draw the ball"""
-        pygame.draw.circle(self.screen, config.COLOR_BALL, ball.get_position(), ball.radius)
+        """Draw the ball at its current position (drawing does not move it)"""
+        pygame.draw.circle(self.screen, config.COLOR_BALL, (int(ball.x), int(ball.y)), ball.radius)
 
+    def _text(self, slot, text, font):
+        # cached surface for `text` in UI slot `slot`
+        cached = self._text_cache.get(slot)
+        if cached is None or cached[0] != text:
+            cached = (text, font.render(text, True, config.COLOR_TEXT))
+            self._text_cache[slot] = cached
+        return cached[1]
     
     def _draw_ui(self, episode, steps, reward, fish_eaten):
         """Draw UI text overlays"""
@@ -35,9 +88,8 @@ class Renderer:
             (f"Fish Eaten: {fish_eaten}", 130),
         ]
         
-        for text, y_offset in texts:
-            rendered = self.font_large.render(text, True, config.COLOR_TEXT)
-            self.screen.blit(rendered, (10, y_offset))
+        self.screen.blits([(self._text(y_offset, text, self.font_large), (10, y_offset)) for text, y_offset in texts],
+                          doreturn=False)
 
 
     def draw_debug_info(self, ball, fish_list):
@@ -50,14 +102,14 @@ class Renderer:
             )
             debug_text = f"Closest Fish: {closest_dist:.1f}px, Fish Count: {len(fish_list)}"
         
-        rendered = self.font_small.render(debug_text, True, config.COLOR_TEXT)
-        self.screen.blit(rendered, (10, self.height - 30))
+        self.screen.blit(self._text('debug', debug_text, self.font_small), (10, self.height - 30))
 
     #render function
-    def render(self, fish_list, ball, episode, steps, reward, fish_eaten):
-        """Main rendering function"""
+    def render(self, fish, ball, episode, steps, reward, fish_eaten):
+        """Main rendering function; `fish` is a `FishPopulation` or a list of `Fish`"""
         self.screen.fill(config.COLOR_BACKGROUND)
-        self.draw_fish(fish_list)
+        self.draw_fish(fish)
         self.draw_ball(ball)
         self._draw_ui(episode, steps, reward, fish_eaten)
-        pygame.display.flip()
\ No newline at end of file
+        if not self.offscreen:
+            pygame.display.flip()
\ No newline at end of file
@@ -0,0 +1,217 @@
+import numpy as np
+import torch
+
+
+class ReplayBuffer:
+    """Fixed-capacity ring buffer of transitions in preallocated NumPy arrays.
+
+    Insertion overwrites the oldest transition in O(1), sampling draws uniform
+    indices with replacement, and batches are handed to torch with
+    `torch.from_numpy` so no per-transition Python objects are kept around.
+    """
+
+    def __init__(self, capacity, state_size):
+        self.capacity = int(capacity)
+        self.state_size = state_size
+        self.states = np.zeros((self.capacity, state_size), dtype=np.float32)
+        self.actions = np.zeros(self.capacity, dtype=np.int64)
+        self.rewards = np.zeros(self.capacity, dtype=np.float32)
+        self.next_states = np.zeros((self.capacity, state_size), dtype=np.float32)
+        self.dones = np.zeros(self.capacity, dtype=np.float32)
+
+        # next slot to write and number of valid transitions
+        self.position = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, state, action, reward, next_state, done):
+        """Store one transition, overwriting the oldest when full"""
+        i = self.position
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        self.dones[i] = float(done)
+
+        self.position = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        """Store a batch of transitions (one row each)"""
+        count = len(actions)
+        idx = (self.position + np.arange(count)) % self.capacity
+        self.states[idx] = states
+        self.actions[idx] = actions
+        self.rewards[idx] = rewards
+        self.next_states[idx] = next_states
+        self.dones[idx] = dones
+
+        self.position = int((self.position + count) % self.capacity)
+        self.size = min(self.size + count, self.capacity)
+
+    ARRAYS = ('states', 'actions', 'rewards', 'next_states', 'dones')
+
+    def state_dict(self):
+        """Copies of the stored transitions (the first `size` slots) and the write position"""
+        size = self.size
+        state = {name: getattr(self, name)[:size].copy() for name in self.ARRAYS}
+        state['position'] = self.position
+        return state
+
+    def load_state_dict(self, state):
+        """Restore transitions saved with `state_dict`; arrays may be memory-mapped"""
+        size = len(state['actions'])
+        if size > self.capacity:
+            raise ValueError(f"saved buffer holds {size} transitions, capacity is {self.capacity}")
+        for name in self.ARRAYS:
+            getattr(self, name)[:size] = state[name]
+        self.size = size
+        self.position = int(state['position']) % self.capacity
+
+    def sample_indices(self, batch_size):
+        """Uniformly sample `batch_size` stored transition indices"""
+        return np.random.randint(0, self.size, size=batch_size)
+
+    def get_batch(self, indices, device=None):
+        """Return (states, actions, rewards, next_states, dones) tensors for `indices`"""
+        batch = (
+            torch.from_numpy(self.states[indices]),
+            torch.from_numpy(self.actions[indices]),
+            torch.from_numpy(self.rewards[indices]),
+            torch.from_numpy(self.next_states[indices]),
+            torch.from_numpy(self.dones[indices]),
+        )
+        if device is not None:
+            batch = tuple(t.to(device) for t in batch)
+        return batch
+
+    def sample(self, batch_size, device=None):
+        """Uniformly sample a batch of transition tensors"""
+        return self.get_batch(self.sample_indices(batch_size), device)
+
+
+class SumTree:
+    """Binary sum tree over `capacity` leaf priorities, stored in one flat array.
+
+    Node i has children 2i and 2i + 1 and the root is node 1, so priority
+    updates and prefix-sum lookups are O(log N) and run for a whole batch of
+    indices at once.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self.leaf_count = 1 << max(0, (self.capacity - 1).bit_length())
+        self.depth = self.leaf_count.bit_length() - 1
+        self.tree = np.zeros(2 * self.leaf_count, dtype=np.float64)
+
+    def total(self):
+        return self.tree[1]
+
+    def get(self, indices):
+        """Priorities stored at leaf `indices`"""
+        return self.tree[np.asarray(indices) + self.leaf_count]
+
+    def update(self, indices, priorities):
+        """Set leaf priorities and refresh their ancestors"""
+        nodes = np.asarray(indices) + self.leaf_count
+        self.tree[nodes] = priorities
+        nodes = np.unique(nodes // 2)
+        while nodes[0] >= 1:
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+            if nodes[0] == 1:
+                break
+            nodes = np.unique(nodes // 2)
+
+    def find(self, values):
+        """Leaf index whose prefix-sum interval contains each value in `values`"""
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(len(values), dtype=np.int64)
+        for _ in range(self.depth):
+            left = 2 * nodes
+            left_sum = self.tree[left]
+            go_right = values >= left_sum
+            values = np.where(go_right, values - left_sum, values)
+            nodes = np.where(go_right, left + 1, left)
+        return nodes - self.leaf_count
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    """Replay buffer that samples transitions in proportion to their TD error.
+
+    Priorities p_i = (|td_i| + epsilon) ** alpha live in a `SumTree`; new
+    transitions get the largest priority seen so far so they are replayed at
+    least once. `sample` also returns the sampled indices (for
+    `update_priorities`) and importance-sampling weights whose exponent beta is
+    annealed from `beta_start` to 1 over `beta_steps` samples.
+    """
+
+    def __init__(self, capacity, state_size, alpha=0.6, beta_start=0.4, beta_steps=100000, epsilon=1e-5):
+        super().__init__(capacity, state_size)
+        self.tree = SumTree(self.capacity)
+        self.alpha = alpha
+        self.beta_start = beta_start
+        self.beta_steps = beta_steps
+        self.epsilon = epsilon
+        self.max_priority = 1.0
+        self.sample_count = 0
+
+    def add(self, state, action, reward, next_state, done):
+        index = self.position
+        super().add(state, action, reward, next_state, done)
+        self.tree.update([index], self.max_priority ** self.alpha)
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        indices = (self.position + np.arange(len(actions))) % self.capacity
+        super().add_batch(states, actions, rewards, next_states, dones)
+        self.tree.update(indices, self.max_priority ** self.alpha)
+
+    def state_dict(self):
+        state = super().state_dict()
+        state['priorities'] = self.tree.get(np.arange(self.size))
+        state['max_priority'] = self.max_priority
+        state['sample_count'] = self.sample_count
+        return state
+
+    def load_state_dict(self, state):
+        super().load_state_dict(state)
+        if self.size:
+            self.tree.update(np.arange(self.size), state['priorities'])
+        self.max_priority = float(state['max_priority'])
+        self.sample_count = int(state['sample_count'])
+
+    def beta(self):
+        """Current importance-sampling exponent"""
+        progress = min(1.0, self.sample_count / max(1, self.beta_steps))
+        return self.beta_start + (1.0 - self.beta_start) * progress
+
+    def sample_indices(self, batch_size):
+        """Stratified proportional sampling: one draw per equal slice of the total priority"""
+        segment = self.tree.total() / batch_size
+        values = (np.arange(batch_size) + np.random.rand(batch_size)) * segment
+        return np.minimum(self.tree.find(values), self.size - 1)
+
+    def importance_weights(self, indices, device=None):
+        """Importance-sampling weights of sampled `indices`, normalized so the largest is 1; advances beta"""
+        beta = self.beta()
+        self.sample_count += 1
+
+        probs = self.tree.get(indices) / self.tree.total()
+        weights = (self.size * probs) ** (-beta)
+        weights = torch.from_numpy((weights / weights.max()).astype(np.float32))
+        if device is not None:
+            weights = weights.to(device)
+        return weights
+
+    def sample(self, batch_size, device=None):
+        """Return (states, actions, rewards, next_states, dones, indices, weights)"""
+        indices = self.sample_indices(batch_size)
+        weights = self.importance_weights(indices, device)
+        return self.get_batch(indices, device) + (indices, weights)
+
+    def update_priorities(self, indices, td_errors):
+        """Refresh priorities of sampled transitions from their new absolute TD errors"""
+        priorities = np.abs(td_errors) + self.epsilon
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        self.tree.update(indices, priorities ** self.alpha)
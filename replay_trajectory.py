@@ -0,0 +1,83 @@
+"""Render a recorded trajectory file offline, without a window.
+
+    python replay_trajectory.py run.traj --frames out_frames/
+    python replay_trajectory.py run.traj --video run.mp4 --fps 60 --every 2
+
+Frames are drawn by `Renderer` onto an offscreen surface and written as a PNG
+sequence and/or piped to ffmpeg for a video (ffmpeg must be on PATH).
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+from types import SimpleNamespace
+
+import config
+from trajectory import TrajectoryReader
+
+
+def replay(path, frames_dir=None, video=None, fps=config.FPS, every=1, start=0, limit=None):
+    """Render frames of trajectory `path`; return the number of frames written"""
+    # no display needed: keep SDL from looking for one on headless machines
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    import pygame
+    from render import Renderer
+
+    if frames_dir is None and video is None:
+        raise ValueError("nothing to write: give a frames directory and/or a video path")
+
+    reader = TrajectoryReader(path)
+    pygame.init()
+    renderer = Renderer(reader.width, reader.height, offscreen=True)
+
+    encoder = None
+    if video is not None:
+        ffmpeg = shutil.which('ffmpeg')
+        if ffmpeg is None:
+            raise RuntimeError("ffmpeg not found on PATH; write a frame sequence with --frames instead")
+        encoder = subprocess.Popen([ffmpeg, '-y', '-loglevel', 'error', '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+                                    '-s', f"{reader.width}x{reader.height}", '-r', str(fps), '-i', '-',
+                                    '-pix_fmt', 'yuv420p', video], stdin=subprocess.PIPE)
+    if frames_dir is not None:
+        os.makedirs(frames_dir, exist_ok=True)
+
+    written = 0
+    try:
+        for index, frame in enumerate(reader):
+            if index < start or (index - start) % every:
+                continue
+            ball = SimpleNamespace(x=frame.ball_x, y=frame.ball_y, radius=int(frame.ball_radius))
+            renderer.render(frame, ball, frame.generation, frame.step, frame.reward, frame.fish_eaten)
+            if frames_dir is not None:
+                pygame.image.save(renderer.screen, os.path.join(frames_dir, f"frame_{written:06d}.png"))
+            if encoder is not None:
+                encoder.stdin.write(pygame.image.tobytes(renderer.screen, 'RGB'))
+            written += 1
+            if limit is not None and written >= limit:
+                break
+    finally:
+        if encoder is not None:
+            encoder.stdin.close()
+            encoder.wait()
+        pygame.quit()
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a recorded trajectory to images or video")
+    parser.add_argument('trajectory', help='trajectory file written with TRAJECTORY_PATH')
+    parser.add_argument('--frames', default=None, help='directory for a PNG frame sequence')
+    parser.add_argument('--video', default=None, help='video file to encode with ffmpeg (e.g. run.mp4)')
+    parser.add_argument('--fps', type=int, default=config.FPS, help='video frame rate')
+    parser.add_argument('--every', type=int, default=1, help='render every Nth recorded frame')
+    parser.add_argument('--start', type=int, default=0, help='first recorded frame to render')
+    parser.add_argument('--limit', type=int, default=None, help='stop after this many rendered frames')
+    args = parser.parse_args(argv)
+
+    written = replay(args.trajectory, args.frames, args.video, args.fps, max(1, args.every), args.start, args.limit)
+    print(f"Rendered {written} frames from {args.trajectory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""Runtime simulation settings.
+
+`SimConfig` is a frozen snapshot of the simulation and agent settings in
+config.py, built once per run (`SimConfig.from_config()`, optionally with
+overrides or a JSON file) and handed to `GameEnvironment`, `Ball`,
+`FishPopulation`, `Agent` and the other consumers. The hot loops read plain
+slot attributes from it instead of module globals, quantities derived from
+several settings (arena diagonal, genome bounds, ...) are computed once in
+`__post_init__`, and environments built from different `SimConfig`s can run
+side by side in one process.
+"""
+
+import dataclasses
+import json
+import math
+from dataclasses import dataclass, field
+
+import config
+
+# fields whose config.py name is not simply the upper-cased field name
+CONFIG_NAMES = {'width': 'WINDOW_WIDTH', 'height': 'WINDOW_HEIGHT'}
+
+
+@dataclass(frozen=True, slots=True)
+class SimConfig:
+    # arena
+    width: int
+    height: int
+    num_fish: int
+    max_steps: int
+    action_repeat: int
+
+    # ball
+    ball_radius: float
+    ball_speed: float
+    ball_max_speed: float
+    ball_auto_chase: bool
+    ball_chase_strength: float
+    ball_grow_on_eat: bool
+    ball_grow_amount: float
+    ball_max_radius: float
+
+    # fish
+    fish_size: float
+    fish_min_speed: float
+    fish_max_speed: float
+    fish_direction_change_min: int
+    fish_direction_change_max: int
+    fish_collisions: bool
+    prediction_time: float
+    flee_distance: float
+    panic_multiplier: float
+    fish_accel: float
+    fish_fitness_survival_weight: float
+    fish_fitness_distance_weight: float
+    flee_learning_rate: float
+    flee_min_speed: float
+    flee_max_speed: float
+
+    # genome bounds and evolution
+    fish_perception_min: float
+    fish_perception_max: float
+    fish_panic_min: float
+    fish_panic_max: float
+    fish_steering_min: float
+    fish_steering_max: float
+    fish_genome_elitism: int
+    fish_tournament_size: int
+    fish_mutation_rate: float
+    fish_mutation_scale: float
+    fish_mutation_decay: float
+
+    # rewards
+    reward_survival: float
+    reward_eaten: float
+    reward_distance_multiplier: float
+
+    # agent
+    state_size: int
+    action_size: int
+    learning_rate: float
+    memory_size: int
+    batch_size: int
+    gamma: float
+    epsilon_start: float
+    epsilon_min: float
+    epsilon_decay: float
+    target_update_frequency: float
+    train_every_n_steps: int
+    gradient_steps: int
+    fast_inference: bool
+    policy_sync_every: int
+    prioritized_replay: bool
+    per_alpha: float
+    per_beta_start: float
+    per_beta_steps: int
+    per_epsilon: float
+
+    # derived in __post_init__
+    diag: float = field(init=False)
+    genome_init_lower: tuple = field(init=False)
+    genome_init_upper: tuple = field(init=False)
+    genome_lower: tuple = field(init=False)
+    genome_upper: tuple = field(init=False)
+    genome_defaults: tuple = field(init=False)
+
+    def __post_init__(self):
+        derived = {
+            'diag': math.sqrt(self.width ** 2 + self.height ** 2),
+            # randomly initialized genomes, in entity.GENOME_KEYS order
+            'genome_init_lower': (float(self.fish_perception_min), float(self.fish_panic_min), float(self.flee_min_speed),
+                                  self.fish_max_speed * 0.5, float(self.fish_steering_min)),
+            'genome_init_upper': (float(self.fish_perception_max), float(self.fish_panic_max), float(self.flee_max_speed),
+                                  float(self.fish_max_speed), float(self.fish_steering_max)),
+            # clamp applied to mutated genomes
+            'genome_lower': (float(self.fish_perception_min), float(self.fish_panic_min), float(self.flee_min_speed),
+                             0.1, float(self.fish_steering_min)),
+            'genome_upper': (float(self.fish_perception_max), float(self.fish_panic_max), float(self.flee_max_speed),
+                             float(self.fish_max_speed), float(self.fish_steering_max)),
+            # fallback for genome fields missing from a provided genome dict
+            'genome_defaults': (float(self.flee_distance), float(self.panic_multiplier), float(self.flee_min_speed),
+                                float(self.fish_max_speed), float(self.fish_accel)),
+        }
+        for name, value in derived.items():
+            object.__setattr__(self, name, value)
+
+    @classmethod
+    def settings(cls):
+        """Names of the settings (the fields given to the constructor)"""
+        return tuple(f.name for f in dataclasses.fields(cls) if f.init)
+
+    @classmethod
+    def from_config(cls, **overrides):
+        """Snapshot of the current config.py values, with `overrides` by field name"""
+        unknown = set(overrides) - set(cls.settings())
+        if unknown:
+            raise ValueError(f"unknown simulation settings: {', '.join(sorted(unknown))}")
+        values = {name: getattr(config, CONFIG_NAMES.get(name, name.upper())) for name in cls.settings()}
+        values.update(overrides)
+        return cls(**values)
+
+    @classmethod
+    def from_file(cls, path, **overrides):
+        """config.py values overridden by the settings in JSON file `path`, then by `overrides`"""
+        with open(path) as f:
+            values = json.load(f)
+        values.update(overrides)
+        return cls.from_config(**values)
+
+    def replace(self, **changes):
+        """Copy with some settings changed (derived values are recomputed)"""
+        return dataclasses.replace(self, **changes)
+
+    def with_arena(self, width, height, num_fish):
+        """This config for an arena of the given size, reusing it when nothing changes"""
+        if (width, height, num_fish) == (self.width, self.height, self.num_fish):
+            return self
+        return self.replace(width=width, height=height, num_fish=num_fish)
+
+
+def parse_overrides(pairs):
+    """{name: value} from `name=value` strings; values are read as JSON when they parse (numbers, true/false)"""
+    overrides = {}
+    for pair in pairs:
+        name, sep, text = pair.partition('=')
+        if not sep:
+            raise ValueError(f"expected name=value, got {pair!r}")
+        try:
+            overrides[name.strip()] = json.loads(text)
+        except ValueError:
+            overrides[name.strip()] = text
+    return overrides
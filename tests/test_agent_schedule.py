@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from agent import Agent
+from sim_config import SimConfig
+
+
+def make_agent(train_every, gradient_steps, fill=100, **settings):
+    sim = SimConfig.from_config(train_every_n_steps=train_every, gradient_steps=gradient_steps, batch_size=8,
+                                memory_size=256, prioritized_replay=False, **settings)
+    agent = Agent(sim.state_size, sim.action_size, sim.learning_rate, sim)
+    if fill:
+        states = np.random.rand(fill, sim.state_size).astype(np.float32)
+        agent.remember_batch(states, np.random.randint(sim.action_size, size=fill), np.random.rand(fill),
+                             states, np.zeros(fill))
+    calls = []
+    agent.replay = lambda batch_size=None: calls.append(batch_size)
+    return agent, calls
+
+
+def test_single_steps():
+    agent, calls = make_agent(train_every=4, gradient_steps=3)
+    ran = [agent.step() for _ in range(10)]
+    # updates are due after the 4th and 8th step
+    assert ran == [0, 0, 0, 3, 0, 0, 0, 3, 0, 0]
+    assert calls == [8] * 6
+    assert agent.env_steps == 10
+
+
+@pytest.mark.parametrize('chunks', [[5, 5, 5, 5], [3, 17], [20], [1] * 20, [7, 1, 12]])
+def test_batched_steps_match_single_steps(chunks):
+    # a K-arena step counts K transitions; the total only depends on the transitions
+    agent, calls = make_agent(train_every=4, gradient_steps=2)
+    for count in chunks:
+        agent.step(count)
+    assert len(calls) == (20 // 4) * 2
+
+
+def test_no_updates_until_the_buffer_holds_a_batch():
+    agent, calls = make_agent(train_every=1, gradient_steps=1, fill=0)
+    assert agent.step(5) == 0
+    assert calls == []
+    agent.remember_batch(np.zeros((9, agent.state_size), np.float32), np.zeros(9, np.int64), np.zeros(9),
+                         np.zeros((9, agent.state_size), np.float32), np.zeros(9))
+    assert agent.step(2) == 2
+
+
+def test_epsilon_decays_per_transition():
+    agent, _ = make_agent(train_every=1, gradient_steps=1, epsilon_start=1.0, epsilon_decay=0.9, epsilon_min=0.01)
+    agent.step(3)
+    assert agent.epsilon == pytest.approx(0.9 ** 3)
+    for _ in range(3):
+        agent.step()
+    assert agent.epsilon == pytest.approx(0.9 ** 6)
+    agent.step(1000)
+    assert agent.epsilon == 0.01
@@ -0,0 +1,72 @@
+import json
+
+import numpy as np
+import pytest
+
+import cli
+import config
+import main as training
+from agent import Agent
+from GameEnvironment import GameEnvironment
+from sim_config import SimConfig
+from utills import ModelManager, StatisticsTracker
+
+SIM = SimConfig.from_config(width=300, height=200, num_fish=4, memory_size=64, batch_size=8, prioritized_replay=False)
+
+
+def write_run(log_dir):
+    stats = StatisticsTracker(str(log_dir), chunk_size=4)
+    for episode in range(10):
+        stats.record_episode(float(episode), episode % 3, 100, fish_survived=2)
+    stats.record_generation(1, np.ones((4, 5)))
+    stats.flush()
+    return stats
+
+
+def test_inspect_stats_run_directory(tmp_path, capsys):
+    stats = write_run(tmp_path)
+    cli.main(['inspect-stats', stats.log_dir, '--last', '5'])
+    out = capsys.readouterr().out
+    assert f"Run: {stats.log_dir}" in out
+    assert 'episodes: 10' in out
+    assert 'generations: 1' in out
+
+
+def test_inspect_stats_picks_the_latest_run(tmp_path, capsys):
+    stats = write_run(tmp_path)
+    cli.main(['inspect-stats', str(tmp_path)])
+    assert f"Run: {stats.log_dir}" in capsys.readouterr().out
+
+
+def test_inspect_stats_summary_file(tmp_path, capsys):
+    path = tmp_path / 'training_stats.json'
+    path.write_text(json.dumps({'total_episodes': 3}))
+    cli.main(['inspect-stats', str(path)])
+    assert '"total_episodes": 3' in capsys.readouterr().out
+
+
+def test_inspect_stats_missing_path(tmp_path):
+    with pytest.raises(SystemExit, match='no such stats file'):
+        cli.main(['inspect-stats', str(tmp_path / 'nope')])
+
+
+def test_inspect_stats_empty_directory(tmp_path):
+    with pytest.raises(SystemExit, match='no run logs'):
+        cli.main(['inspect-stats', str(tmp_path)])
+
+
+def test_resume_mismatch_exits_with_a_message(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'STATS_LOG_DIR', None)
+    manager = ModelManager(str(tmp_path), async_save=False)
+    agent = Agent(SIM.state_size, SIM.action_size, SIM.learning_rate, SIM)
+    env = GameEnvironment(SIM.width, SIM.height, SIM.num_fish, SIM)
+    path = manager.save_training_state(agent, env, StatisticsTracker(), {'episode': 1})
+
+    other = SIM.replace(num_fish=6)
+    other_env = GameEnvironment(other.width, other.height, other.num_fish, other)
+    with pytest.raises(SystemExit, match=f'cannot resume from {path}') as error:
+        training.resume_training(manager, path, agent, other_env)
+    assert '\n' not in str(error.value)
+
+    with pytest.raises(SystemExit, match='no saved training state'):
+        training.resume_training(manager, str(tmp_path / 'missing'), agent, env)
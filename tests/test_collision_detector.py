@@ -0,0 +1,97 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import kernels
+from collision_detector import CollisionDetector, SpatialGrid
+
+WIDTH, HEIGHT, CELL = 300, 200, 25.0
+
+
+def points(seed, count=400):
+    rng = np.random.RandomState(seed)
+    x = rng.uniform(0, WIDTH, count)
+    y = rng.uniform(0, HEIGHT, count)
+    # cell borders, the arena edges and corners, and a few strays just outside
+    x[:60] = rng.randint(0, WIDTH // CELL + 1, 60) * CELL
+    y[40:100] = rng.randint(0, HEIGHT // CELL + 1, 60) * CELL
+    x[100:110] = [0, WIDTH, 0, WIDTH, -3.0, WIDTH + 3.0, 0, WIDTH, 150, 150]
+    y[100:110] = [0, 0, HEIGHT, HEIGHT, 50, 50, -2.0, HEIGHT + 2.0, 0, HEIGHT]
+    # duplicates and points exactly `radius` apart
+    x[110:115], y[110:115] = x[120], y[120]
+    x[115], y[115] = x[116] + CELL, y[116]
+    return x, y
+
+
+def brute_pairs(x, y, radius):
+    dist = np.hypot(x[:, None] - x[None, :], y[:, None] - y[None, :])
+    i, j = np.nonzero(np.triu(dist < radius, k=1))
+    return set(zip(i.tolist(), j.tolist()))
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('radius', [CELL / 2, CELL, 2.5 * CELL])
+def test_pairs_within_matches_brute_force(seed, radius):
+    x, y = points(seed)
+    grid = SpatialGrid(WIDTH, HEIGHT, CELL)
+    grid.rebuild(x, y)
+    i, j = grid.pairs_within(radius)
+    assert (i < j).all()
+    found = list(zip(i.tolist(), j.tolist()))
+    assert len(found) == len(set(found))
+    assert set(found) == brute_pairs(x, y, radius)
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('radius', [CELL / 2, CELL, 3 * CELL])
+def test_query_radius_matches_brute_force(seed, radius):
+    x, y = points(seed)
+    grid = SpatialGrid(WIDTH, HEIGHT, CELL)
+    grid.rebuild(x, y)
+    rng = np.random.RandomState(seed + 100)
+    queries = [(0, 0), (WIDTH, HEIGHT), (CELL, 2 * CELL), (-5.0, 100), (x[120], y[120])]
+    queries += list(zip(rng.uniform(0, WIDTH, 20), rng.uniform(0, HEIGHT, 20)))
+    for qx, qy in queries:
+        expected = np.flatnonzero(np.hypot(x - qx, y - qy) < radius)
+        np.testing.assert_array_equal(np.sort(grid.query_radius(qx, qy, radius)), expected)
+
+
+def test_neighbors_exclude_the_point():
+    x, y = points(0)
+    grid = SpatialGrid(WIDTH, HEIGHT, CELL)
+    grid.rebuild(x, y)
+    neighbors = grid.neighbors(120, CELL)
+    assert 120 not in neighbors
+    assert set(range(110, 115)) <= set(neighbors.tolist())
+
+
+def test_small_inputs():
+    grid = SpatialGrid(WIDTH, HEIGHT, CELL)
+    grid.rebuild(np.zeros(0), np.zeros(0))
+    assert len(grid.pairs_within(CELL)[0]) == 0
+    assert len(grid.query_radius(10, 10, CELL)) == 0
+    grid.rebuild([5.0], [5.0])
+    assert len(grid.pairs_within(CELL)[0]) == 0
+
+
+@pytest.mark.parametrize('compiled', [False, True])
+def test_fish_fish_pairs_resolve_in_sequence(monkeypatch, compiled):
+    if compiled and not kernels.ENABLED:
+        pytest.skip('compiled kernels are switched off')
+    monkeypatch.setattr(kernels, 'ENABLED', compiled)
+    rng = np.random.RandomState(0)
+    vx, vy = rng.uniform(-3, 3, 6), rng.uniform(-3, 3, 6)
+    # fish 1 and 3 are each in two pairs, so the result depends on the resolution order
+    pairs = [(0, 1), (1, 2), (3, 4), (3, 5)]
+
+    fish = [SimpleNamespace(vx=a, vy=b) for a, b in zip(vx, vy)]
+    for a, b in pairs:
+        CollisionDetector.resolve_fish_fish_collision(fish[a], fish[b])
+
+    for order in ([0, 1, 2, 3], [3, 1, 2, 0]):
+        population = SimpleNamespace(vx=vx.copy(), vy=vy.copy())
+        i, j = np.array([pairs[k] for k in order]).T
+        CollisionDetector.resolve_population_fish_fish_collisions(population, (i, j))
+        np.testing.assert_array_equal(population.vx, [f.vx for f in fish])
+        np.testing.assert_array_equal(population.vy, [f.vy for f in fish])
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+import entity
+from evolution import next_generation
+from sim_config import SimConfig
+
+SIM = SimConfig.from_config(fish_genome_elitism=3, fish_tournament_size=3, fish_mutation_rate=1.0,
+                            fish_mutation_scale=50.0, fish_mutation_decay=1.0)
+
+
+def survivors(count, seed=0):
+    np.random.seed(seed)
+    genomes = entity.random_genomes(count, SIM)
+    fitness = np.random.rand(count) * 10
+    return genomes, fitness
+
+
+@pytest.mark.parametrize('num_fish', [1, 3, 10, 25])
+def test_returns_requested_count(num_fish):
+    genomes, fitness = survivors(6)
+    children = next_generation(genomes, fitness, np.zeros((0, 5)), [], num_fish, 0, SIM)
+    assert children.shape == (num_fish, len(entity.GENOME_KEYS))
+
+
+def test_keeps_the_elites():
+    genomes, fitness = survivors(8)
+    children = next_generation(genomes, fitness, np.zeros((0, 5)), [], 10, 0, SIM)
+    best = np.argsort(-fitness)[:SIM.fish_genome_elitism]
+    np.testing.assert_array_equal(children[:SIM.fish_genome_elitism], genomes[best])
+
+
+def test_mutation_respects_bounds():
+    # a large mutation scale pushes most values past the bounds before clamping
+    genomes, fitness = survivors(8)
+    children = next_generation(genomes, fitness, np.zeros((0, 5)), [], 500, 0, SIM)
+    mutated = children[SIM.fish_genome_elitism:]
+    assert (mutated >= np.array(SIM.genome_lower)).all()
+    assert (mutated <= np.array(SIM.genome_upper)).all()
+    assert (mutated == np.array(SIM.genome_lower)).any() and (mutated == np.array(SIM.genome_upper)).any()
+
+
+def test_children_come_from_survivors_without_mutation():
+    genomes, fitness = survivors(5)
+    sim = SIM.replace(fish_mutation_rate=0.0)
+    children = next_generation(genomes, fitness, np.zeros((0, 5)), [], 40, 0, sim)
+    rows = {tuple(row) for row in genomes}
+    assert all(tuple(row) in rows for row in children)
+
+
+def test_no_survivors_replicates_longest_lived():
+    dead = np.arange(15, dtype=np.float64).reshape(3, 5)
+    children = next_generation(np.zeros((0, 5)), [], dead, [4, 9, 2], 6, 0, SIM)
+    np.testing.assert_array_equal(children, np.tile(dead[1], (6, 1)))
+
+
+def test_no_fish_at_all_reinitializes_within_init_bounds():
+    np.random.seed(1)
+    children = next_generation(np.zeros((0, 5)), [], np.zeros((0, 5)), [], 20, 0, SIM)
+    assert children.shape == (20, 5)
+    assert (children >= np.array(SIM.genome_init_lower)).all()
+    assert (children <= np.array(SIM.genome_init_upper)).all()
@@ -0,0 +1,122 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import kernels
+from collision_detector import CollisionDetector
+from entity import FishPopulation
+from sim_config import SimConfig
+
+pytest.importorskip('numba')
+pytestmark = pytest.mark.skipif(not kernels.ENABLED, reason='compiled kernels are switched off (USE_NUMBA)')
+
+SIM = SimConfig.from_config(width=300, height=200, num_fish=400)
+BALL = SimpleNamespace(x=150.0, y=100.0, vx=3.0, vy=-2.0, radius=40.0)
+
+
+def make_population(seed=0):
+    rng = np.random.RandomState(seed)
+    # some fish start outside the arena so the wall reflection has work to do
+    positions = np.column_stack((rng.uniform(-20, 320, SIM.num_fish), rng.uniform(-20, 220, SIM.num_fish)))
+    np.random.seed(seed)
+    population = FishPopulation(positions, SIM.width, SIM.height, sim=SIM)
+    population.direction_change_counter[:] = rng.randint(0, SIM.fish_direction_change_max, SIM.num_fish)
+    # a few fish sit exactly on the predicted ball position (random flee direction)
+    population.x[:3] = BALL.x + BALL.vx * SIM.prediction_time
+    population.y[:3] = BALL.y + BALL.vy * SIM.prediction_time
+    return population
+
+
+def both_paths(monkeypatch, run, seed=0):
+    """Run `run(population)` on the compiled and the NumPy path from the same start and random stream"""
+    results = []
+    for enabled in (True, False):
+        population = make_population(seed)
+        np.random.seed(seed + 1)
+        monkeypatch.setattr(kernels, 'ENABLED', enabled)
+        output = run(population)
+        results.append((population.state_dict(), output, np.random.random()))
+    return results
+
+
+def assert_same(results):
+    (compiled, compiled_out, compiled_draw), (numpy, numpy_out, numpy_draw) = results
+    for name in FishPopulation.ARRAYS:
+        np.testing.assert_allclose(compiled[name], numpy[name], rtol=1e-12, atol=1e-12, err_msg=name)
+    # both paths consumed the same random numbers
+    assert compiled_draw == numpy_draw
+    return compiled_out, numpy_out
+
+
+def test_wander_and_reflect(monkeypatch):
+    def run(population):
+        for _ in range(50):
+            population.update_positions()
+    assert_same(both_paths(monkeypatch, run))
+
+
+def test_wander_with_active_mask(monkeypatch):
+    def run(population):
+        active = np.random.RandomState(3).rand(len(population)) < 0.6
+        for _ in range(50):
+            population.update_positions(active=active)
+        return active
+    compiled, numpy = assert_same(both_paths(monkeypatch, run))
+    np.testing.assert_array_equal(compiled, numpy)
+
+
+def test_flee_scalar_ball(monkeypatch):
+    def run(population):
+        for _ in range(5):
+            population.flee(BALL, SIM.diag)
+            population.update_positions()
+    assert_same(both_paths(monkeypatch, run))
+
+
+def test_flee_per_fish_ball_with_active_mask(monkeypatch):
+    def run(population):
+        rng = np.random.RandomState(7)
+        count = len(population)
+        ball = SimpleNamespace(x=rng.uniform(0, 300, count), y=rng.uniform(0, 200, count),
+                               vx=rng.uniform(-4, 4, count), vy=np.zeros(count))
+        ball.x[:3] = population.x[:3] - ball.vx[:3] * SIM.prediction_time
+        ball.y[:3] = population.y[:3]
+        active = rng.rand(count) < 0.7
+        active[:3] = True
+        population.flee(ball, SIM.diag, active=active)
+    assert_same(both_paths(monkeypatch, run))
+
+
+def test_flee_degenerate_fish_steered(monkeypatch):
+    def run(population):
+        # only the fish on the predicted ball position draw random numbers in flee
+        position = np.random.get_state()[2]
+        population.flee(BALL, SIM.diag)
+        return np.random.get_state()[2] != position
+    compiled, numpy = assert_same(both_paths(monkeypatch, run))
+    assert compiled and numpy
+
+
+def test_nearest(monkeypatch):
+    def run(population):
+        return [population.nearest(x, y) for x, y in ((150, 100), (0, 0), (299.5, 10))]
+    compiled, numpy = assert_same(both_paths(monkeypatch, run))
+    for (compiled_dist, compiled_index), (numpy_dist, numpy_index) in zip(compiled, numpy):
+        assert compiled_index == numpy_index
+        np.testing.assert_allclose(compiled_dist, numpy_dist, rtol=1e-12)
+
+
+def test_nearest_empty(monkeypatch):
+    population = make_population().take(np.zeros(0, dtype=np.int64))
+    for enabled in (True, False):
+        monkeypatch.setattr(kernels, 'ENABLED', enabled)
+        assert population.nearest(1.0, 2.0)[1] == -1
+
+
+def test_within_radius(monkeypatch):
+    def run(population):
+        return CollisionDetector.check_ball_population_collisions(BALL, population)
+    compiled, numpy = assert_same(both_paths(monkeypatch, run))
+    assert compiled.any()
+    np.testing.assert_array_equal(compiled, numpy)
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from log_store import ColumnLog, read_log
+
+COLUMNS = (('step', 'i8'), ('value', 'f8'))
+
+
+def fill(log, count):
+    for i in range(count):
+        log.append((i, i * 0.5))
+
+
+def test_chunk_rollover_writes_full_chunks(tmp_path):
+    log = ColumnLog(COLUMNS, str(tmp_path), 'run', chunk_size=4)
+    fill(log, 10)
+
+    assert len(log) == 10
+    # two full chunks on disk, the last two rows still in memory
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['run_000000.npy', 'run_000001.npy']
+    assert [len(chunk) for chunk in log.chunks()] == [4, 4, 2]
+    np.testing.assert_array_equal(log.load('step'), np.arange(10))
+
+    fill(log, 2)
+    assert len(log) == 12
+    assert (tmp_path / 'run_000002.npy').exists()
+
+
+def test_read_log_across_chunks(tmp_path):
+    log = ColumnLog(COLUMNS, str(tmp_path), 'run', chunk_size=4)
+    fill(log, 10)
+    log.flush()
+
+    rows = read_log(str(tmp_path), 'run')
+    assert rows.dtype == log.dtype
+    np.testing.assert_array_equal(rows['step'], np.arange(10))
+    np.testing.assert_array_equal(read_log(str(tmp_path), 'run', 'value'), np.arange(10) * 0.5)
+    np.testing.assert_array_equal(log.load(), rows)
+
+
+def test_read_log_without_chunks(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        read_log(str(tmp_path), 'run')
+
+
+def test_in_memory_log():
+    log = ColumnLog(COLUMNS, chunk_size=3)
+    assert len(log.load()) == 0
+    fill(log, 7)
+    log.flush()
+    assert len(log) == 7
+    np.testing.assert_array_equal(log.load('value'), np.arange(7) * 0.5)
+
+
+def test_state_dict_resumes_and_drops_later_chunks(tmp_path):
+    log = ColumnLog(COLUMNS, str(tmp_path), 'run', chunk_size=4)
+    fill(log, 6)
+    state = log.state_dict()
+    fill(log, 5)
+
+    resumed = ColumnLog(COLUMNS, str(tmp_path), 'run', chunk_size=4)
+    resumed.load_state_dict(state)
+    assert len(resumed) == 6
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['run_000000.npy']
+    np.testing.assert_array_equal(resumed.load('step'), [0, 1, 2, 3, 4, 5])
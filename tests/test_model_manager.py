@@ -0,0 +1,100 @@
+import os
+
+import numpy as np
+import pytest
+import torch
+
+from agent import Agent
+from GameEnvironment import GameEnvironment
+from sim_config import SimConfig
+from utills import ModelManager, StatisticsTracker
+
+SIM = SimConfig.from_config(width=300, height=200, num_fish=4, memory_size=64, batch_size=8, prioritized_replay=False)
+
+
+def make_agent():
+    torch.manual_seed(0)
+    return Agent(SIM.state_size, SIM.action_size, SIM.learning_rate, SIM)
+
+
+def leftovers(directory):
+    return [name for name in os.listdir(directory) if name.endswith('.tmp')]
+
+
+@pytest.mark.parametrize('async_save', [True, False])
+def test_rotation_keeps_the_newest(tmp_path, async_save):
+    manager = ModelManager(str(tmp_path), async_save=async_save, keep_last=2, include_memory=False)
+    agent = make_agent()
+    paths = [manager.save_model(agent, episode) for episode in range(1, 6)]
+    manager.wait()
+
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(path) for path in paths[-2:])
+    assert manager.latest_model() == paths[-1]
+    assert leftovers(tmp_path) == []
+
+
+def test_keep_all_without_limit(tmp_path):
+    manager = ModelManager(str(tmp_path), async_save=True, keep_last=None, include_memory=False)
+    agent = make_agent()
+    for episode in range(4):
+        manager.save_model(agent, episode)
+    manager.wait()
+    assert len(os.listdir(tmp_path)) == 4
+
+
+def test_async_save_writes_the_state_at_save_time(tmp_path):
+    manager = ModelManager(str(tmp_path), async_save=True, keep_last=None, include_memory=True)
+    agent = make_agent()
+    agent.remember(np.ones(SIM.state_size, np.float32), 1, 2.0, np.ones(SIM.state_size, np.float32), False)
+    expected = {name: value.clone() for name, value in agent.q_network.state_dict().items()}
+    path = manager.save_model(agent, 1)
+
+    # the training loop keeps going while the file is written
+    with torch.no_grad():
+        for param in agent.q_network.parameters():
+            param.add_(1.0)
+    agent.epsilon = 0.5
+    manager.wait()
+
+    loaded = make_agent()
+    manager.load_model(loaded, path)
+    for name, value in loaded.q_network.state_dict().items():
+        assert torch.equal(value, expected[name])
+    assert loaded.epsilon == SIM.epsilon_start
+    assert len(loaded.memory) == 1
+
+
+def test_failed_write_leaves_no_files(tmp_path, monkeypatch):
+    manager = ModelManager(str(tmp_path), async_save=True, keep_last=2, include_memory=False)
+    agent = make_agent()
+    manager.save_model(agent, 1)
+    manager.wait()
+
+    def broken_save(obj, path):
+        with open(path, 'wb') as f:
+            f.write(b'partial')
+        raise OSError('disk full')
+    monkeypatch.setattr(torch, 'save', broken_save)
+    path = manager.save_model(agent, 2)
+    with pytest.raises(RuntimeError, match='writing checkpoint failed'):
+        manager.wait()
+
+    # the earlier checkpoint is untouched, the failed one never appears under its final name
+    assert not os.path.exists(path)
+    assert len(os.listdir(tmp_path)) == 1
+    assert leftovers(tmp_path) == []
+
+
+def test_training_state_rotation(tmp_path):
+    manager = ModelManager(str(tmp_path), async_save=True, keep_last=2)
+    agent = make_agent()
+    env = GameEnvironment(SIM.width, SIM.height, SIM.num_fish, SIM)
+    stats = StatisticsTracker()
+    paths = [manager.save_training_state(agent, env, stats, {'episode': episode}) for episode in range(1, 5)]
+    manager.wait()
+
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(path) for path in paths[-2:])
+    assert manager.latest_training_state() == paths[-1]
+    assert sorted(os.listdir(os.path.join(paths[-1], 'memory'))) == sorted(
+        f"{name}.npy" for name in agent.memory.ARRAYS)
+    assert leftovers(tmp_path) == []
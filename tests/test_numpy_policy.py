@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+import torch
+from torch.nn.utils import parameters_to_vector, vector_to_parameters
+
+from agent import Agent
+from sim_config import SimConfig
+
+SIM = SimConfig.from_config(memory_size=256, batch_size=16, prioritized_replay=False, learning_rate=1e-2)
+
+
+def make_agent():
+    np.random.seed(0)
+    torch.manual_seed(0)
+    agent = Agent(SIM.state_size, SIM.action_size, SIM.learning_rate, SIM)
+    agent.epsilon = 0.0
+    states = np.random.rand(200, SIM.state_size).astype(np.float32)
+    agent.remember_batch(states, np.random.randint(SIM.action_size, size=200), np.random.randn(200),
+                         np.roll(states, 1, axis=0), np.random.rand(200) < 0.05)
+    return agent
+
+
+def torch_actions(agent, states):
+    with torch.no_grad():
+        q_values = agent.q_network(torch.from_numpy(states).to(agent.device))
+    return q_values.cpu().numpy(), q_values.argmax(dim=1).cpu().numpy()
+
+
+def assert_policy_matches(agent):
+    states = np.random.RandomState(1).rand(64, SIM.state_size).astype(np.float32)
+    expected_q, expected = torch_actions(agent, states)
+    np.testing.assert_allclose(agent.policy.q_values(states), expected_q, rtol=1e-5, atol=1e-6)
+    np.testing.assert_array_equal(agent.policy.act_batch(states), expected)
+    assert [agent.policy.act(state) for state in states] == expected.tolist()
+
+    # and through the agent, with the fast path on and off
+    for fast in (True, False):
+        agent.fast_inference = fast
+        np.testing.assert_array_equal(agent.act_batch(states), expected)
+        assert [agent.act(state) for state in states[:8]] == expected[:8].tolist()
+
+
+def test_policy_matches_network():
+    assert_policy_matches(make_agent())
+
+
+def test_policy_follows_training():
+    agent = make_agent()
+    before = agent.policy.q_values(np.ones((1, SIM.state_size), dtype=np.float32)).copy()
+    for _ in range(5):
+        agent.step(SIM.train_every_n_steps)
+    assert agent.updates > 0
+    assert not np.allclose(agent.policy.q_values(np.ones((1, SIM.state_size), dtype=np.float32)), before)
+    assert_policy_matches(agent)
+
+
+def test_policy_follows_load_state_dict():
+    agent = make_agent()
+    other = make_agent()
+    with torch.no_grad():
+        for param in other.q_network.parameters():
+            param.mul_(-0.5)
+    agent.q_network.load_state_dict(other.q_network.state_dict())
+    assert_policy_matches(agent)
+
+
+def test_policy_sync_after_parameters_are_rebound():
+    agent = make_agent()
+    # vector_to_parameters swaps in new tensors, which a NumPy view cannot follow
+    flat = parameters_to_vector(agent.q_network.parameters()).detach() * 2.0
+    vector_to_parameters(flat, agent.q_network.parameters())
+    with pytest.raises(AssertionError):
+        assert_policy_matches(agent)
+    agent.policy.sync()
+    assert_policy_matches(agent)
@@ -0,0 +1,97 @@
+import multiprocessing as mp
+
+import numpy as np
+import torch
+
+from agent import DQNAgent
+from parallel_train import SharedReplayBuffer, SharedWeights
+
+CTX = mp.get_context('spawn')
+STATE_SIZE = 4
+
+
+def batch(start, count):
+    # transition i holds the value i in every field, so a torn row is easy to spot
+    values = np.arange(start, start + count, dtype=np.float32)
+    states = np.repeat(values[:, None], STATE_SIZE, axis=1)
+    return states, values.astype(np.int64), values, states + 0.5, np.zeros(count, dtype=np.float32)
+
+
+def test_cursor_wraps_around():
+    buffer = SharedReplayBuffer(10, STATE_SIZE, CTX)
+    buffer.add_batch(*batch(0, 6))
+    assert (len(buffer), buffer.position) == (6, 6)
+
+    buffer.add_batch(*batch(6, 7))
+    assert (len(buffer), buffer.position) == (10, 3)
+    # slots 0-2 hold the newest transitions 10-12, the rest 3-9
+    np.testing.assert_array_equal(buffer.actions, [10, 11, 12, 3, 4, 5, 6, 7, 8, 9])
+    np.testing.assert_array_equal(buffer.states[:, 0], buffer.rewards)
+
+    buffer.add(*(field[0] for field in batch(13, 1)))
+    assert buffer.position == 4
+    assert buffer.actions[3] == 13
+
+
+def test_state_dict_round_trip():
+    buffer = SharedReplayBuffer(8, STATE_SIZE, CTX)
+    buffer.add_batch(*batch(0, 11))
+    copy = SharedReplayBuffer(8, STATE_SIZE, CTX)
+    copy.load_state_dict(buffer.state_dict())
+    assert (len(copy), copy.position) == (len(buffer), buffer.position)
+    for name in buffer.ARRAYS:
+        np.testing.assert_array_equal(getattr(copy, name), getattr(buffer, name))
+
+
+def write(buffer, start, rounds):
+    for i in range(rounds):
+        buffer.add_batch(*batch(start + 32 * i, 32))
+
+
+def test_get_batch_under_concurrent_adds():
+    buffer = SharedReplayBuffer(256, STATE_SIZE, CTX)
+    buffer.add_batch(*batch(0, 256))
+    writers = [CTX.Process(target=write, args=(buffer, start, 300)) for start in (10**5, 2 * 10**5)]
+    for writer in writers:
+        writer.start()
+
+    torn = 0
+    samples = 0
+    while any(writer.is_alive() for writer in writers) or samples < 20:
+        states, actions, rewards, next_states, dones = buffer.get_batch(buffer.sample_indices(64))
+        whole = (states == rewards[:, None]).all(1) & (next_states == rewards[:, None] + 0.5).all(1) \
+            & (actions.float() == rewards)
+        torn += int((~whole).sum())
+        samples += 1
+    for writer in writers:
+        writer.join()
+
+    assert torn == 0
+    assert len(buffer) == 256
+    assert buffer._cursor.value == 256 + 2 * 300 * 32
+
+
+def test_shared_weights_publish_and_pull():
+    torch.manual_seed(0)
+    learner = DQNAgent(STATE_SIZE, 3)
+    actor = DQNAgent(STATE_SIZE, 3)
+    weights = SharedWeights(learner, CTX)
+
+    weights.publish(learner, 0.25)
+    version = weights.pull(actor, 0)
+    assert version == 1
+    assert weights.epsilon.value == 0.25
+    for mine, theirs in zip(actor.parameters(), learner.parameters()):
+        assert torch.equal(mine, theirs)
+
+    # nothing newer: the actor's parameters are left alone
+    with torch.no_grad():
+        for param in learner.parameters():
+            param.add_(1.0)
+    assert weights.pull(actor, version) == version
+    assert not torch.equal(actor.fc1.weight, learner.fc1.weight)
+
+    weights.publish(learner, 0.1)
+    assert weights.pull(actor, version) == 2
+    for mine, theirs in zip(actor.parameters(), learner.parameters()):
+        assert torch.equal(mine, theirs)
@@ -0,0 +1,94 @@
+import numpy as np
+
+from entity import GENOME_KEYS, Fish, FishPopulation
+from sim_config import SimConfig
+
+SIM = SimConfig.from_config(width=300, height=200)
+
+
+def make_population(count=8):
+    np.random.seed(0)
+    positions = np.column_stack((np.arange(count) * 10.0 + 5, np.arange(count) * 5.0 + 5))
+    population = FishPopulation(positions, SIM.width, SIM.height, sim=SIM)
+    population.age[:] = np.arange(count)
+    return population
+
+
+def test_views_follow_the_arrays():
+    population = make_population()
+    views = population.views
+    assert [fish.x for fish in views] == population.x.tolist()
+
+    views[3].x = 123.0
+    views[3].flee_speed = 2.5
+    assert population.x[3] == 123.0
+    assert population.flee_speed[3] == 2.5
+    population.vy[5] = -1.0
+    assert views[5].vy == -1.0
+    assert views[2].genome == population.genome(2)
+
+
+def test_remove_keeps_views_consistent():
+    population = make_population()
+    views = list(population.views)
+    ages = population.age.copy()
+    mask = np.zeros(len(population), dtype=bool)
+    mask[[1, 4, 7]] = True
+
+    removed = population.remove(mask)
+    assert [fish.age for fish in removed] == [1, 4, 7]
+    assert len(population) == 5
+    np.testing.assert_array_equal(population.age, ages[~mask])
+
+    # surviving views were re-indexed and still write through to the arrays
+    survivors = population.views
+    assert survivors == [views[i] for i in (0, 2, 3, 5, 6)]
+    assert [fish.age for fish in survivors] == population.age.tolist()
+    survivors[2].x = 77.0
+    assert population.x[2] == 77.0
+
+    # removed fish are detached: they keep their values and no longer touch the population
+    removed[0].x = -5.0
+    assert removed[0].x == -5.0
+    assert -5.0 not in population.x
+
+
+def test_remove_without_views():
+    population = make_population()
+    assert population.remove(population.age % 2 == 0) == []
+    np.testing.assert_array_equal(population.age, [1, 3, 5, 7])
+    assert [fish.age for fish in population.views] == [1, 3, 5, 7]
+
+
+def test_take_copies():
+    population = make_population()
+    taken = population.take([6, 2])
+    np.testing.assert_array_equal(taken.age, [6, 2])
+    taken.x[0] = -1.0
+    assert population.x[6] != -1.0
+    assert taken.sim is population.sim
+
+
+def test_state_dict_round_trip():
+    population = make_population()
+    views = population.views
+    state = population.state_dict()
+    population.x += 50.0
+    population.remove(population.age < 3)
+
+    population.load_state_dict(state)
+    assert len(population) == 8
+    for name in FishPopulation.ARRAYS:
+        np.testing.assert_array_equal(getattr(population, name), state[name])
+        assert getattr(population, name) is not state[name]
+    # views are rebuilt for the restored fish
+    assert population.views is not views
+    assert [fish.x for fish in population.views] == state['x'].tolist()
+
+
+def test_fish_is_a_one_fish_population():
+    np.random.seed(0)
+    fish = Fish((10, 20), SIM.width, SIM.height, genome={'flee_speed': 3.0}, sim=SIM)
+    assert (fish.x, fish.y) == (10, 20)
+    assert fish.flee_speed == 3.0
+    assert set(fish.genome) == set(GENOME_KEYS)
@@ -0,0 +1,87 @@
+import numpy as np
+
+from replay_buffer import PrioritizedReplayBuffer, SumTree
+
+STATE_SIZE = 2
+
+
+def add(buffer, count):
+    states = np.zeros((count, STATE_SIZE), dtype=np.float32)
+    buffer.add_batch(states, np.zeros(count, dtype=np.int64), np.zeros(count), states, np.zeros(count))
+
+
+def leaf_sum(tree):
+    return tree.tree[tree.leaf_count:].sum()
+
+
+def test_sum_tree_total_after_batched_updates():
+    rng = np.random.RandomState(0)
+    tree = SumTree(13)  # not a power of two
+    for _ in range(50):
+        indices = rng.randint(0, 13, size=6)
+        tree.update(indices, rng.rand(6))
+        assert np.isclose(tree.total(), leaf_sum(tree))
+
+
+def test_sum_tree_duplicate_indices_in_one_update():
+    tree = SumTree(8)
+    tree.update(np.arange(8), np.ones(8))
+    tree.update(np.array([3, 3, 5]), np.array([4.0, 2.0, 0.5]))
+    # one value per leaf wins; the ancestors agree with whatever the leaves hold
+    assert np.isclose(tree.total(), leaf_sum(tree))
+    for node in range(1, tree.leaf_count):
+        assert np.isclose(tree.tree[node], tree.tree[2 * node] + tree.tree[2 * node + 1])
+
+
+def test_sum_tree_find_follows_prefix_sums():
+    tree = SumTree(4)
+    tree.update(np.arange(4), np.array([1.0, 2.0, 3.0, 4.0]))
+    np.testing.assert_array_equal(tree.find([0.0, 0.99, 1.0, 2.99, 3.0, 5.99, 6.0, 9.99]),
+                                  [0, 0, 1, 1, 2, 2, 3, 3])
+
+
+def test_sampled_indices_below_size():
+    np.random.seed(0)
+    buffer = PrioritizedReplayBuffer(16, STATE_SIZE)
+    add(buffer, 5)
+    for _ in range(200):
+        indices = buffer.sample_indices(32)
+        assert indices.min() >= 0 and indices.max() < buffer.size
+        buffer.update_priorities(indices, np.random.rand(32) * 10)
+
+
+def test_largest_importance_weight_is_one():
+    np.random.seed(1)
+    buffer = PrioritizedReplayBuffer(64, STATE_SIZE)
+    add(buffer, 64)
+    buffer.update_priorities(np.arange(64), np.random.rand(64) * 5)
+    for _ in range(5):
+        weights = buffer.importance_weights(buffer.sample_indices(16)).numpy()
+        assert np.isclose(weights.max(), 1.0)
+        assert (weights > 0).all()
+
+
+def test_beta_anneals_to_one():
+    buffer = PrioritizedReplayBuffer(8, STATE_SIZE, beta_start=0.4, beta_steps=10)
+    add(buffer, 8)
+    assert np.isclose(buffer.beta(), 0.4)
+    for _ in range(5):
+        buffer.importance_weights(np.arange(4))
+    assert np.isclose(buffer.beta(), 0.7)
+    for _ in range(20):
+        buffer.importance_weights(np.arange(4))
+    assert buffer.beta() == 1.0
+
+
+def test_new_transitions_get_current_max_priority():
+    buffer = PrioritizedReplayBuffer(8, STATE_SIZE, alpha=0.5, epsilon=0.0)
+    add(buffer, 4)
+    np.testing.assert_allclose(buffer.tree.get(np.arange(4)), 1.0)
+    buffer.update_priorities(np.array([0, 1]), np.array([9.0, 0.25]))
+    assert buffer.max_priority == 9.0
+
+    add(buffer, 2)
+    np.testing.assert_allclose(buffer.tree.get([4, 5]), 9.0 ** 0.5)
+    buffer.add(np.zeros(STATE_SIZE), 0, 0.0, np.zeros(STATE_SIZE), False)
+    np.testing.assert_allclose(buffer.tree.get([6]), 9.0 ** 0.5)
+    np.testing.assert_allclose(buffer.tree.get([1]), 0.25 ** 0.5)
@@ -0,0 +1,116 @@
+import numpy as np
+import torch
+
+from replay_buffer import ReplayBuffer
+
+STATE_SIZE = 3
+
+
+def transitions(start, count):
+    # distinguishable rows: transition i has state i, action i, reward i / 2, ...
+    ids = np.arange(start, start + count)
+    states = np.repeat(ids[:, None], STATE_SIZE, axis=1).astype(np.float32)
+    return states, ids, ids / 2.0, states + 0.5, (ids % 2).astype(np.float32)
+
+
+class ListReference:
+    """Plain-list ring buffer the array version must agree with"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.rows = [None] * capacity
+        self.position = 0
+        self.size = 0
+
+    def add(self, row):
+        self.rows[self.position] = row
+        self.position = (self.position + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+
+def assert_matches(buffer, reference):
+    assert len(buffer) == reference.size
+    assert buffer.position == reference.position
+    for i in range(reference.size):
+        state, action, reward, next_state, done = reference.rows[i]
+        np.testing.assert_array_equal(buffer.states[i], state)
+        assert buffer.actions[i] == action
+        assert buffer.rewards[i] == np.float32(reward)
+        np.testing.assert_array_equal(buffer.next_states[i], next_state)
+        assert buffer.dones[i] == done
+
+
+def fill(buffer, reference, start, count, batched):
+    arrays = transitions(start, count)
+    if batched:
+        buffer.add_batch(*arrays)
+    else:
+        for row in zip(*arrays):
+            buffer.add(*row)
+    for row in zip(*arrays):
+        reference.add(row)
+
+
+def test_add_wraps_at_capacity():
+    buffer, reference = ReplayBuffer(5, STATE_SIZE), ListReference(5)
+    fill(buffer, reference, 0, 4, batched=False)
+    assert_matches(buffer, reference)
+    fill(buffer, reference, 4, 3, batched=False)
+    assert (buffer.size, buffer.position) == (5, 2)
+    assert_matches(buffer, reference)
+
+
+def test_add_batch_spanning_the_end():
+    buffer, reference = ReplayBuffer(5, STATE_SIZE), ListReference(5)
+    fill(buffer, reference, 0, 3, batched=True)
+    fill(buffer, reference, 3, 4, batched=True)
+    assert (buffer.size, buffer.position) == (5, 2)
+    assert_matches(buffer, reference)
+    # a batch longer than the capacity leaves its newest rows
+    fill(buffer, reference, 7, 12, batched=True)
+    assert_matches(buffer, reference)
+
+
+def test_load_state_dict_of_wrapped_buffer():
+    buffer, reference = ReplayBuffer(6, STATE_SIZE), ListReference(6)
+    fill(buffer, reference, 0, 9, batched=True)
+    restored = ReplayBuffer(6, STATE_SIZE)
+    restored.load_state_dict(buffer.state_dict())
+    assert_matches(restored, reference)
+
+    # both continue overwriting the same slots
+    fill(buffer, reference, 9, 2, batched=False)
+    arrays = transitions(9, 2)
+    for row in zip(*arrays):
+        restored.add(*row)
+    assert_matches(restored, reference)
+
+
+def test_load_state_dict_of_partial_buffer():
+    buffer = ReplayBuffer(8, STATE_SIZE)
+    buffer.add_batch(*transitions(0, 3))
+    restored = ReplayBuffer(8, STATE_SIZE)
+    restored.load_state_dict(buffer.state_dict())
+    assert (restored.size, restored.position) == (3, 3)
+
+
+def test_sample_indices_within_size():
+    np.random.seed(0)
+    buffer = ReplayBuffer(100, STATE_SIZE)
+    buffer.add_batch(*transitions(0, 7))
+    indices = buffer.sample_indices(1000)
+    assert indices.min() >= 0 and indices.max() < 7
+
+
+def test_get_batch_dtypes_and_shapes():
+    buffer = ReplayBuffer(10, STATE_SIZE)
+    buffer.add_batch(*transitions(0, 10))
+    indices = np.array([1, 4, 4, 9])
+    states, actions, rewards, next_states, dones = buffer.get_batch(indices)
+    assert states.shape == (4, STATE_SIZE) and states.dtype == torch.float32
+    assert actions.shape == (4,) and actions.dtype == torch.int64
+    assert rewards.shape == (4,) and rewards.dtype == torch.float32
+    assert next_states.shape == (4, STATE_SIZE) and next_states.dtype == torch.float32
+    assert dones.shape == (4,) and dones.dtype == torch.float32
+    np.testing.assert_array_equal(actions.numpy(), indices)
+    np.testing.assert_array_equal(states[:, 0].numpy(), indices)
@@ -0,0 +1,120 @@
+import os
+import random
+
+import numpy as np
+import pytest
+import torch
+
+from agent import Agent
+from GameEnvironment import GameEnvironment
+from sim_config import SimConfig
+from utills import ModelManager, StatisticsTracker
+from vector_env import VectorGameEnvironment
+
+# small enough that replay starts, the buffer wraps and episodes end within the test;
+# a gentle distance reward and learning rate keep the weights finite (NaN != NaN)
+SIM = SimConfig.from_config(width=300, height=200, num_fish=6, max_steps=40, memory_size=64, batch_size=8,
+                            prioritized_replay=False, reward_distance_multiplier=0.01, learning_rate=1e-4)
+
+
+def seed(value):
+    random.seed(value)
+    np.random.seed(value)
+    torch.manual_seed(value)
+
+
+def build(vector, sim=SIM):
+    if vector:
+        env = VectorGameEnvironment(3, sim.width, sim.height, sim.num_fish, sim)
+    else:
+        env = GameEnvironment(sim.width, sim.height, sim.num_fish, sim)
+    return env, Agent(sim.state_size, sim.action_size, sim.learning_rate, sim)
+
+
+def run(env, agent, stats, steps, vector):
+    """Train for `steps` steps; returns the chosen actions and rewards"""
+    actions, rewards = [], []
+    for _ in range(steps):
+        if vector:
+            states = env.get_states()
+            action = agent.act_batch(states)
+            next_states, reward, dones = env.step(action)
+            agent.remember_batch(states, action, reward, np.where(dones[:, None], env.final_states, next_states), dones)
+            agent.step(env.num_envs)
+            for i in np.flatnonzero(dones):
+                stats.record_episode(reward[i], int(env.final_fish_eaten[i]), int(env.final_steps[i]))
+                stats.record_generation(int(env.generation[i]), env.genomes[i])
+        else:
+            state = env.get_state()
+            action = agent.act(state)
+            next_state, reward, done = env.step(action)
+            agent.remember(state, action, reward, next_state, done)
+            agent.step()
+            if done:
+                stats.record_episode(reward, env.fish_eaten, env.steps)
+                env.reset(survivors=len(env.population))
+                stats.record_generation(env.generation, env.population.genome_array())
+        actions.append(np.copy(action))
+        rewards.append(np.copy(reward))
+    return np.array(actions), np.array(rewards)
+
+
+@pytest.mark.parametrize('prioritized', [False, True])
+@pytest.mark.parametrize('vector', [False, True])
+def test_resume_matches_uninterrupted_run(tmp_path, vector, prioritized):
+    sim = SIM.replace(prioritized_replay=prioritized)
+    seed(3)
+    env, agent = build(vector, sim)
+    stats = StatisticsTracker(str(tmp_path / 'logs'), chunk_size=4)
+    manager = ModelManager(str(tmp_path / 'models'), async_save=False)
+
+    run(env, agent, stats, 90, vector)
+    path = manager.save_training_state(agent, env, stats, {'episode': 7})
+    expected_actions, expected_rewards = run(env, agent, stats, 60, vector)
+
+    # a new process: fresh objects (and RNG draws) before the state is loaded
+    seed(99)
+    resumed_env, resumed_agent = build(vector, sim)
+    state = manager.read_training_state(path)
+    resumed_stats = StatisticsTracker.from_state(state['stats'], chunk_size=4)
+    progress = manager.load_training_state(path, resumed_agent, resumed_env, resumed_stats, state)
+    assert progress == {'episode': 7}
+    actions, rewards = run(resumed_env, resumed_agent, resumed_stats, 60, vector)
+
+    np.testing.assert_array_equal(actions, expected_actions)
+    np.testing.assert_array_equal(rewards, expected_rewards)
+    for param, expected in zip(resumed_agent.q_network.parameters(), agent.q_network.parameters()):
+        assert torch.isfinite(expected).all()
+        assert torch.equal(param, expected)
+    assert resumed_agent.epsilon == agent.epsilon
+    assert resumed_stats.get_summary() == stats.get_summary()
+
+
+def test_resumed_tracker_reuses_run_directory(tmp_path):
+    log_dir = str(tmp_path / 'logs')
+    stats = StatisticsTracker(log_dir, chunk_size=2)
+    for i in range(5):
+        stats.record_episode(float(i), 1, 10)
+    resumed = StatisticsTracker.from_state(stats.state_dict(), chunk_size=2)
+    resumed.record_episode(5.0, 1, 10)
+    resumed.flush()
+
+    assert resumed.log_dir == stats.log_dir
+    assert os.listdir(log_dir) == [os.path.basename(stats.log_dir)]
+    np.testing.assert_array_equal(resumed.episode_rewards, np.arange(6.0))
+
+
+def test_load_state_dict_rejects_other_arena():
+    np.random.seed(0)
+    env = GameEnvironment(SIM.width, SIM.height, SIM.num_fish, SIM)
+    state = env.state_dict()
+    with pytest.raises(ValueError):
+        GameEnvironment(SIM.width, SIM.height, SIM.num_fish + 2, SIM).load_state_dict(state)
+    with pytest.raises(ValueError):
+        GameEnvironment(SIM.width * 2, SIM.height, SIM.num_fish, SIM).load_state_dict(state)
+
+    # a state without the arena entry is still checked through its fish count
+    del state['arena']
+    with pytest.raises(ValueError):
+        GameEnvironment(SIM.width, SIM.height, SIM.num_fish + 2, SIM).load_state_dict(state)
+    GameEnvironment(SIM.width, SIM.height, SIM.num_fish, SIM).load_state_dict(state)
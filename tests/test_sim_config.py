@@ -0,0 +1,85 @@
+import dataclasses
+import math
+
+import pytest
+
+import config
+import entity
+from sim_config import SimConfig, parse_overrides
+
+
+def test_from_config_reads_config_values():
+    sim = SimConfig.from_config()
+    assert sim.width == config.WINDOW_WIDTH
+    assert sim.height == config.WINDOW_HEIGHT
+    assert sim.num_fish == config.NUM_FISH
+    assert sim.flee_distance == config.FLEE_DISTANCE
+
+
+def test_from_config_rejects_unknown_keys():
+    with pytest.raises(ValueError, match='num_fishes'):
+        SimConfig.from_config(num_fishes=3)
+    # derived values are not settings either
+    with pytest.raises(ValueError, match='diag'):
+        SimConfig.from_config(diag=1.0)
+
+
+def test_parse_overrides_coerces_types():
+    overrides = parse_overrides(['num_fish=50', 'ball_speed=2.5', 'ball_auto_chase=true', ' fast_inference = false',
+                                 'name=fish', 'empty='])
+    assert overrides == {'num_fish': 50, 'ball_speed': 2.5, 'ball_auto_chase': True, 'fast_inference': False,
+                         'name': 'fish', 'empty': ''}
+    assert type(overrides['num_fish']) is int
+    assert type(overrides['ball_speed']) is float
+
+
+def test_parse_overrides_requires_equals():
+    with pytest.raises(ValueError, match='name=value'):
+        parse_overrides(['num_fish'])
+
+
+def test_derived_diag():
+    sim = SimConfig.from_config(width=300, height=400)
+    assert sim.diag == 500.0
+    assert math.isclose(SimConfig.from_config(width=640, height=480).diag, 800.0)
+
+
+def test_derived_genome_bounds():
+    sim = SimConfig.from_config(fish_perception_min=10, fish_perception_max=90, fish_panic_min=1, fish_panic_max=2,
+                                flee_min_speed=0.5, flee_max_speed=4, fish_max_speed=6, fish_steering_min=0.1,
+                                fish_steering_max=0.9)
+    assert sim.genome_init_lower == (10.0, 1.0, 0.5, 3.0, 0.1)
+    assert sim.genome_init_upper == (90.0, 2.0, 4.0, 6.0, 0.9)
+    assert sim.genome_lower == (10.0, 1.0, 0.5, 0.1, 0.1)
+    assert sim.genome_upper == (90.0, 2.0, 4.0, 6.0, 0.9)
+    assert len(sim.genome_lower) == len(entity.GENOME_KEYS)
+
+
+def test_overrides_reach_genome_defaults():
+    sim = SimConfig.from_config(flee_distance=77, panic_multiplier=3, flee_min_speed=0.25, fish_max_speed=9,
+                                fish_accel=0.2)
+    assert sim.genome_defaults == (77.0, 3.0, 0.25, 9.0, 0.2)
+
+    array = entity.genomes_to_array([{'panic_multiplier': 1.0}, {}], sim)
+    assert array.tolist() == [[77.0, 1.0, 0.25, 9.0, 0.2], [77.0, 3.0, 0.25, 9.0, 0.2]]
+
+    fish = entity.Fish((10, 10), 100, 100, sim=sim)
+    fish.genome = {'flee_speed': 2.0}
+    assert fish.genome == {'perception_radius': 77.0, 'panic_multiplier': 3.0, 'flee_speed': 2.0,
+                           'max_speed': 9.0, 'steering_smoothness': 0.2}
+
+
+def test_replace_recomputes_derived_values():
+    sim = SimConfig.from_config(width=300, height=400)
+    wider = sim.replace(width=600, fish_max_speed=8, flee_distance=50)
+    assert wider.diag == math.hypot(600, 400)
+    assert wider.genome_upper[3] == 8.0
+    assert wider.genome_defaults[0] == 50.0
+    assert sim.diag == 500.0
+    assert sim.with_arena(300, 400, sim.num_fish) is sim
+
+
+def test_frozen():
+    sim = SimConfig.from_config()
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        sim.num_fish = 3
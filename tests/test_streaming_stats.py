@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from utills import RollingAverage, RunningStats, StreamingQuantile
+
+
+def test_running_stats_matches_numpy():
+    values = np.random.RandomState(0).normal(50.0, 12.0, size=5000)
+    stats = RunningStats()
+    for value in values:
+        stats.add(value)
+
+    assert stats.count == len(values)
+    assert stats.mean == pytest.approx(np.mean(values), rel=1e-12)
+    assert stats.variance == pytest.approx(np.var(values), rel=1e-9)
+    assert stats.std == pytest.approx(np.std(values), rel=1e-9)
+    assert stats.total == pytest.approx(np.sum(values), rel=1e-12)
+    assert (stats.min, stats.max) == (values.min(), values.max())
+
+
+def test_running_stats_empty():
+    stats = RunningStats()
+    assert stats.variance == 0.0
+
+
+@pytest.mark.parametrize('draw', [
+    lambda rng, n: rng.normal(0.0, 1.0, n),
+    lambda rng, n: rng.exponential(3.0, n),
+    lambda rng, n: rng.uniform(-10.0, 10.0, n),
+])
+def test_p2_median_close_to_numpy(draw):
+    values = draw(np.random.RandomState(1), 20000)
+    median = StreamingQuantile(0.5)
+    for value in values:
+        median.add(value)
+
+    spread = np.percentile(values, 75) - np.percentile(values, 25)
+    assert abs(median.value - np.median(values)) < 0.02 * spread
+
+
+def test_p2_exact_for_first_values():
+    median = StreamingQuantile(0.5)
+    assert np.isnan(median.value)
+    for value in (5.0, 1.0, 3.0):
+        median.add(value)
+    assert median.value == 3.0
+
+
+def test_rolling_average_after_wraps():
+    values = np.random.RandomState(2).uniform(0.0, 100.0, size=53)
+    rolling = RollingAverage(10)
+    for count, value in enumerate(values, start=1):
+        rolling.add(value)
+        window = values[max(0, count - 10):count]
+        assert len(rolling) == len(window)
+        np.testing.assert_array_equal(rolling.values, window)
+        assert rolling.get_average() == pytest.approx(window.mean(), rel=1e-12)
+        assert rolling.get_variance() == pytest.approx(window.var(), rel=1e-6, abs=1e-9)
+    assert rolling.full
+
+
+def test_running_stats_add_batch_matches_numpy():
+    rng = np.random.RandomState(3)
+    parts = [rng.normal(5.0, 2.0, size=n) for n in (1, 7, 1000, 0, 250)]
+    stats = RunningStats()
+    stats.add(4.0)
+    for part in parts:
+        stats.add_batch(part)
+    values = np.concatenate([[4.0]] + parts)
+
+    assert stats.count == len(values)
+    assert stats.mean == pytest.approx(np.mean(values), rel=1e-12)
+    assert stats.variance == pytest.approx(np.var(values), rel=1e-9)
+    assert stats.total == pytest.approx(np.sum(values), rel=1e-12)
+    assert (stats.min, stats.max) == (values.min(), values.max())
@@ -0,0 +1,71 @@
+import os
+
+import numpy as np
+import pytest
+
+from GameEnvironment import GameEnvironment
+from sim_config import SimConfig
+from trajectory import FILE_HEADER, FRAME_HEADER, TrajectoryReader, TrajectoryRecorder, complete_length
+
+SIM = SimConfig.from_config(width=300, height=200, num_fish=5, max_steps=1000)
+
+
+def record(path, env, ticks):
+    recorder = TrajectoryRecorder(str(path), env.width, env.height)
+    steps = []
+    for _ in range(ticks):
+        env.step(0)
+        recorder.record(env)
+        steps.append(env.steps)
+    recorder.close()
+    return steps
+
+
+def test_frames_round_trip(tmp_path):
+    np.random.seed(0)
+    env = GameEnvironment(SIM.width, SIM.height, SIM.num_fish, SIM)
+    path = tmp_path / 'run.traj'
+    steps = record(path, env, 3)
+
+    frames = list(TrajectoryReader(str(path)))
+    assert [frame.step for frame in frames] == steps
+    np.testing.assert_array_equal(frames[-1].x, env.population.x.astype(np.float32))
+    np.testing.assert_array_equal(frames[-1].vy, env.population.vy.astype(np.float32))
+
+
+def test_reopen_after_partial_record(tmp_path):
+    np.random.seed(0)
+    env = GameEnvironment(SIM.width, SIM.height, SIM.num_fish, SIM)
+    path = tmp_path / 'run.traj'
+    steps = record(path, env, 4)
+    complete = os.path.getsize(path)
+
+    # a crash part-way through the next record: its header and a few fish values
+    with open(path, 'ab') as f:
+        f.write(FRAME_HEADER.pack(0, 99, SIM.num_fish, 1.0, 2.0, 3.0, 0, 0.0))
+        f.write(np.zeros(7, dtype=np.float32).tobytes())
+
+    steps += record(path, env, 3)
+    frames = list(TrajectoryReader(str(path)))
+    assert [frame.step for frame in frames] == steps
+    # the partial record is gone: the new frames follow the old ones directly
+    assert complete_length(str(path)) == os.path.getsize(path) > complete
+    np.testing.assert_array_equal(frames[-1].x, env.population.x.astype(np.float32))
+
+
+def test_reopen_after_partial_frame_header(tmp_path):
+    np.random.seed(0)
+    env = GameEnvironment(SIM.width, SIM.height, SIM.num_fish, SIM)
+    path = tmp_path / 'run.traj'
+    steps = record(path, env, 2)
+    with open(path, 'ab') as f:
+        f.write(b'\x01\x02\x03')
+    steps += record(path, env, 2)
+    assert [frame.step for frame in TrajectoryReader(str(path))] == steps
+
+
+def test_reopen_rejects_other_arena(tmp_path):
+    path = tmp_path / 'run.traj'
+    path.write_bytes(FILE_HEADER.pack(b'FBTRAJ1\x00', 640, 480))
+    with pytest.raises(ValueError):
+        TrajectoryRecorder(str(path), 300, 200)
@@ -0,0 +1,61 @@
+import numpy as np
+
+from sim_config import SimConfig
+from torch_env import check_parity
+from vector_env import VectorGameEnvironment
+
+SIM = SimConfig.from_config(width=300, height=200, num_fish=5)
+
+
+def test_action_repeat_sums_the_ticks():
+    # no episode ends, so both environments draw the same random numbers
+    np.random.seed(0)
+    single = VectorGameEnvironment(3, 300, 200, 5, SIM.replace(max_steps=1000, action_repeat=1))
+    np.random.seed(0)
+    repeated = VectorGameEnvironment(3, 300, 200, 5, SIM.replace(max_steps=1000, action_repeat=3))
+    actions = np.array([0, 2, 3])
+
+    expected = np.zeros(3)
+    for _ in range(3):
+        states, rewards, dones = single.step(actions)
+        expected += rewards
+    repeated_states, repeated_rewards, repeated_dones = repeated.step(actions)
+
+    np.testing.assert_allclose(repeated_rewards, expected)
+    np.testing.assert_array_equal(repeated_states, states)
+    assert not repeated_dones.any()
+    np.testing.assert_array_equal(repeated.steps, 3)
+
+
+def test_action_repeat_stops_at_episode_end():
+    np.random.seed(0)
+    env = VectorGameEnvironment(2, 300, 200, 5, SIM.replace(max_steps=4, action_repeat=3, ball_grow_on_eat=False))
+    env.step(np.array([1, 1]))
+    states, rewards, dones = env.step(np.array([1, 1]))
+
+    assert dones.all()
+    np.testing.assert_array_equal(env.final_steps, 4)
+    # the finished arenas were reset for their next generation
+    np.testing.assert_array_equal(env.steps, 0)
+    np.testing.assert_array_equal(env.generation, 1)
+
+
+def test_torch_env_matches_with_action_repeat():
+    result = check_parity(num_envs=4, num_fish=6, steps=300, sim=SIM.replace(max_steps=20, action_repeat=3))
+    assert result['episodes'] > 0
+    assert result['max_state_diff'] < 1e-9
+    assert result['max_reward_diff'] < 1e-9
+
+
+def test_eaten_fish_stay_put():
+    np.random.seed(0)
+    env = VectorGameEnvironment(2, 300, 200, 5, SIM.replace(max_steps=1000))
+    env.alive[0, :2] = False
+    eaten = ~env.alive.ravel()
+    population = env.population
+    before = {name: getattr(population, name)[eaten].copy()
+              for name in ('x', 'y', 'vx', 'vy', 'age', 'fitness', 'direction_change_counter')}
+    for _ in range(20):
+        env.step(np.array([0, 3]))
+    for name, values in before.items():
+        np.testing.assert_array_equal(getattr(population, name)[eaten], values, err_msg=name)
@@ -0,0 +1,461 @@
+"""Batched environment whose whole simulation lives in torch tensors.
+
+`TorchVectorEnvironment` follows the `VectorGameEnvironment` rules (and so
+`GameEnvironment.step` / `get_state` / `compute_reward`): action repeat, ball
+movement as in `Ball.get_position`, predictive fish fleeing, ball-fish
+collisions with eaten fish masked out, the per-tick distance cache and
+auto-reset of finished arenas.
+Every per-tick quantity is a (K,) or (K, num_fish) tensor, so a step is a fixed
+sequence of tensor ops; the only host work is evolving an arena's genomes when
+its episode ends.
+
+Run `python torch_env.py` to check it against `VectorGameEnvironment` under a
+fixed seed.
+"""
+
+import numpy as np
+import torch
+
+import config
+import entity
+import evolution
+from sim_config import SimConfig
+
+
+class TorchVectorEnvironment:
+    """K arenas in lockstep on (K, num_fish) tensors.
+
+    Random draws come from a `torch.Generator` seeded with `seed`, or, with
+    `rng='numpy'`, from `np.random` in exactly the order `VectorGameEnvironment`
+    makes them, which is what the parity check relies on. `step` takes one
+    action per arena and returns (states (K, STATE_SIZE) float32, rewards (K,),
+    dones (K,) bool) tensors on `device`. Settings come from `sim` (a `SimConfig`,
+    config.py when not given).
+    """
+
+    def __init__(self, num_envs, width, height, num_fish, device='cpu', dtype=torch.float64, seed=None, rng='torch',
+                 sim=None):
+        self._allocate(num_envs, width, height, num_fish, device, dtype, seed, rng, sim)
+        self.genomes[:] = torch.as_tensor(entity.random_genomes(num_envs * num_fish, self.sim),
+                                          dtype=dtype).reshape(num_envs, num_fish, -1).to(self.device)
+        self._reset_arenas(torch.arange(num_envs, device=self.device))
+
+    def _allocate(self, num_envs, width, height, num_fish, device, dtype, seed, rng, sim):
+        self.sim = (sim or SimConfig.from_config()).with_arena(width, height, num_fish)
+        self.num_envs = num_envs
+        self.width = width
+        self.height = height
+        self.num_fish = num_fish
+        self.Max_steps = self.sim.max_steps
+        self.action_repeat = max(1, self.sim.action_repeat)
+        self.diag = self.sim.diag
+        self.device = torch.device(device)
+        self.dtype = dtype
+        self.numpy_rng = rng == 'numpy'
+        self.generator = torch.Generator(device=self.device)
+        if seed is not None:
+            self.generator.manual_seed(seed)
+
+        def zeros(*shape, dtype=dtype):
+            return torch.zeros(shape, dtype=dtype, device=self.device)
+
+        # ball state, one entry per arena
+        self.ball_x = zeros(num_envs)
+        self.ball_y = zeros(num_envs)
+        self.ball_vx = zeros(num_envs)
+        self.ball_vy = zeros(num_envs)
+        self.ball_radius = zeros(num_envs)
+        self.ball_speed = self.sim.ball_speed
+
+        # action -> ball velocity lookup (up, down, left, right)
+        speed = self.ball_speed
+        self.action_vx = torch.tensor([0, 0, -speed, speed], dtype=dtype, device=self.device)
+        self.action_vy = torch.tensor([-speed, speed, 0, 0], dtype=dtype, device=self.device)
+
+        # fish state, row k is arena k; genome columns are in entity.GENOME_KEYS order
+        self.fish_x = zeros(num_envs, num_fish)
+        self.fish_y = zeros(num_envs, num_fish)
+        self.fish_vx = zeros(num_envs, num_fish)
+        self.fish_vy = zeros(num_envs, num_fish)
+        self.direction_change_counter = zeros(num_envs, num_fish, dtype=torch.int64)
+        self.age = zeros(num_envs, num_fish, dtype=torch.int64)
+        self.fitness = zeros(num_envs, num_fish)
+        self.genomes = zeros(num_envs, num_fish, len(entity.GENOME_KEYS))
+        self.alive = zeros(num_envs, num_fish, dtype=torch.bool)
+
+        # end-of-tick ball-to-fish distance cache shared by reward and state
+        self.distance_origin_x = zeros(num_envs)
+        self.distance_origin_y = zeros(num_envs)
+        self.fish_distances = torch.full((num_envs, num_fish), float('inf'), dtype=dtype, device=self.device)
+        self.closest_fish = zeros(num_envs, dtype=torch.int64)
+
+        # per-arena counters
+        self.generation = zeros(num_envs, dtype=torch.int64)
+        self.steps = zeros(num_envs, dtype=torch.int64)
+        self.fish_eaten = zeros(num_envs, dtype=torch.int64)
+        self.reward = zeros(num_envs)
+
+        # outcome of the episodes that finished on the last step (valid where done)
+        self.final_states = zeros(num_envs, self.sim.state_size, dtype=torch.float32)
+        self.final_fish_eaten = zeros(num_envs, dtype=torch.int64)
+        self.final_survivors = zeros(num_envs, dtype=torch.int64)
+        self.final_steps = zeros(num_envs, dtype=torch.int64)
+
+    @classmethod
+    def from_vector_env(cls, vector_env, device='cpu', dtype=torch.float64, seed=None, rng='torch'):
+        """Build an environment holding a copy of a `VectorGameEnvironment`'s current state"""
+        env = cls.__new__(cls)
+        env._allocate(vector_env.num_envs, vector_env.width, vector_env.height, vector_env.num_fish,
+                      device, dtype, seed, rng, vector_env.sim)
+        env.Max_steps = vector_env.Max_steps
+
+        def load(target, source):
+            target.copy_(torch.as_tensor(np.asarray(source)).reshape(target.shape))
+
+        for name in ('ball_x', 'ball_y', 'ball_vx', 'ball_vy', 'ball_radius', 'alive', 'distance_origin_x',
+                     'distance_origin_y', 'fish_distances', 'closest_fish', 'generation', 'steps',
+                     'fish_eaten', 'reward'):
+            load(getattr(env, name), getattr(vector_env, name))
+        population = vector_env.population
+        for name, source in (('fish_x', population.x), ('fish_y', population.y), ('fish_vx', population.vx),
+                             ('fish_vy', population.vy), ('direction_change_counter', population.direction_change_counter),
+                             ('age', population.age), ('fitness', population.fitness)):
+            load(getattr(env, name), source)
+        load(env.genomes, vector_env.genomes)
+        return env
+
+    # random draws, from torch or (for parity) from np.random in the reference order
+
+    def _randint(self, low, high, shape):
+        if self.numpy_rng:
+            return torch.from_numpy(np.random.randint(low, high, size=shape)).to(self.device)
+        return torch.randint(low, high, shape, generator=self.generator, device=self.device)
+
+    def _uniform(self, low, high, shape):
+        if self.numpy_rng:
+            return torch.from_numpy(np.random.uniform(low, high, size=shape)).to(self.device, self.dtype)
+        return torch.empty(shape, dtype=self.dtype, device=self.device).uniform_(low, high, generator=self.generator)
+
+    def _uniform_where(self, mask, low, high, values):
+        # `values` with the entries under `mask` redrawn from U(low, high)
+        if self.numpy_rng:
+            values = values.clone()
+            values[mask] = self._uniform(low, high, (int(mask.sum()),))
+            return values
+        return torch.where(mask, self._uniform(low, high, values.shape), values)
+
+    def _reset_arenas(self, envs):
+        # respawn fish at random positions, keeping the arenas' current genomes
+        shape = (len(envs), self.num_fish)
+        self.fish_x[envs] = self._randint(0, self.width, shape).to(self.dtype)
+        self.fish_y[envs] = self._randint(0, self.height, shape).to(self.dtype)
+        self.fish_vx[envs] = self._uniform(self.sim.fish_min_speed, self.sim.fish_max_speed, shape)
+        self.fish_vy[envs] = self._uniform(self.sim.fish_min_speed, self.sim.fish_max_speed, shape)
+        self.direction_change_counter[envs] = 0
+        self.age[envs] = 0
+        self.fitness[envs] = 0.0
+        self.alive[envs] = True
+
+        # reset ball with a fresh initial velocity
+        self.ball_x[envs] = float(self.width // 2)
+        self.ball_y[envs] = float(self.height // 2)
+        self.ball_vx[envs] = self._uniform(-1.0, 1.0, (len(envs),)) * self.ball_speed
+        self.ball_vy[envs] = self._uniform(-1.0, 1.0, (len(envs),)) * self.ball_speed
+        self.ball_radius[envs] = float(self.sim.ball_radius)
+
+        # Compute reward to clear any immediate overlaps
+        self._advance_balls(envs)
+        self._update_fish_distances(envs)
+        self._compute_reward(envs)
+        self.steps[envs] = 0
+        self.reward[envs] = 0
+        self.fish_eaten[envs] = 0
+
+    def _evolve(self, envs):
+        # genomes evolve on the host once per finished episode, through the shared evolution code
+        for env in envs.tolist():
+            alive = self.alive[env].cpu().numpy()
+            genomes = self.genomes[env].cpu().numpy()
+            new_genomes = evolution.next_generation(genomes[alive], self.fitness[env].cpu().numpy()[alive],
+                                                    genomes[~alive], self.age[env].cpu().numpy()[~alive],
+                                                    self.num_fish, int(self.generation[env]), self.sim)
+            self.genomes[env] = torch.as_tensor(new_genomes, dtype=self.dtype, device=self.device)
+            self.generation[env] += 1
+
+    def reset(self):
+        """Evolve and reset every arena, return the (K, STATE_SIZE) initial states"""
+        envs = torch.arange(self.num_envs, device=self.device)
+        self._evolve(envs)
+        self._reset_arenas(envs)
+        return self.get_states()
+
+    def _advance_balls(self, envs=slice(None)):
+        # Ball.get_position for every selected arena: move, reflect off the bounds, clamp speed
+        x = self.ball_x[envs] + self.ball_vx[envs]
+        y = self.ball_y[envs] + self.ball_vy[envs]
+        vx = self.ball_vx[envs]
+        vy = self.ball_vy[envs]
+        r = self.ball_radius[envs]
+
+        left = x - r < 0
+        right = ~left & (x + r > self.width)
+        x = torch.where(left, r, torch.where(right, self.width - r, x))
+        vx = torch.where(left, vx.abs(), torch.where(right, -vx.abs(), vx))
+        top = y - r < 0
+        bottom = ~top & (y + r > self.height)
+        y = torch.where(top, r, torch.where(bottom, self.height - r, y))
+        vy = torch.where(top, vy.abs(), torch.where(bottom, -vy.abs(), vy))
+
+        max_speed = float(self.sim.ball_max_speed)
+        vel_mag = torch.sqrt(vx * vx + vy * vy)
+        over = (vel_mag > max_speed) & (vel_mag > 1e-8)
+        scale = torch.where(over, max_speed / torch.where(over, vel_mag, torch.ones_like(vel_mag)), torch.ones_like(vel_mag))
+
+        self.ball_x[envs] = x
+        self.ball_y[envs] = y
+        self.ball_vx[envs] = vx * scale
+        self.ball_vy[envs] = vy * scale
+
+    def _update_fish_distances(self, envs=slice(None)):
+        # the one ball-to-fish distance pass of a tick, inf for eaten fish
+        ball_x = torch.trunc(self.ball_x[envs])
+        ball_y = torch.trunc(self.ball_y[envs])
+        dists = torch.hypot(self.fish_x[envs] - ball_x[:, None], self.fish_y[envs] - ball_y[:, None])
+        dists = dists.masked_fill(~self.alive[envs], float('inf'))
+        self.distance_origin_x[envs] = ball_x
+        self.distance_origin_y[envs] = ball_y
+        self.fish_distances[envs] = dists
+        self.closest_fish[envs] = torch.argmin(dists, dim=1)
+
+    def _compute_reward(self, envs=slice(None)):
+        # distance-based and survival reward (does NOT remove fish)
+        reward = self.sim.reward_survival + torch.sum(self.sim.reward_distance_multiplier / (self.fish_distances[envs] + 1e-5), dim=1)
+        self.reward[envs] = reward
+        return reward
+
+    def get_states(self, envs=slice(None)):
+        """States of the selected arenas as a (len(envs), STATE_SIZE) float32 tensor"""
+        ball_x = self.distance_origin_x[envs]
+        ball_y = self.distance_origin_y[envs]
+        dists = self.fish_distances[envs]
+        alive = self.alive[envs]
+        has_fish = alive.any(dim=1)
+
+        closest = self.closest_fish[envs][:, None]
+        min_dist = dists.gather(1, closest).squeeze(1)
+        zero = torch.zeros_like(ball_x)
+        closest_fish_x = torch.where(has_fish, self.fish_x[envs].gather(1, closest).squeeze(1) - ball_x, zero)
+        closest_fish_y = torch.where(has_fish, self.fish_y[envs].gather(1, closest).squeeze(1) - ball_y, zero)
+
+        # normalize fish position
+        return torch.stack((
+            ball_x / self.width,
+            ball_y / self.height,
+            self.ball_vx[envs] / 5.0,
+            self.ball_vy[envs] / 5.0,
+            closest_fish_x / self.width,
+            closest_fish_y / self.height,
+            min_dist / self.diag,
+            alive.sum(dim=1) / self.num_fish
+        ), dim=1).to(torch.float32)
+
+    def _update_fish_positions(self):
+        # FishPopulation.update_positions for the live fish: move, re-pick wander velocities, reflect off the bounds
+        alive = self.alive
+        self.fish_x += torch.where(alive, self.fish_vx, torch.zeros_like(self.fish_vx))
+        self.fish_y += torch.where(alive, self.fish_vy, torch.zeros_like(self.fish_vy))
+
+        sim = self.sim
+        self.direction_change_counter += alive
+        low, high = sim.fish_direction_change_min, sim.fish_direction_change_max
+        thresholds = low + (self._uniform(0.0, 1.0, self.fish_x.shape) * (high - low)).to(torch.int64)
+        change = (self.direction_change_counter >= thresholds) & alive
+        self.fish_vx = self._uniform_where(change, sim.fish_min_speed, sim.fish_max_speed, self.fish_vx)
+        self.fish_vy = self._uniform_where(change, sim.fish_min_speed, sim.fish_max_speed, self.fish_vy)
+        self.direction_change_counter.masked_fill_(change, 0)
+
+        r = sim.fish_size
+        hit_x = (self.fish_x - r < 0) | (self.fish_x + r > self.width)
+        self.fish_vx = torch.where(hit_x, -self.fish_vx, self.fish_vx)
+        self.fish_x.clamp_(r, self.width - r)
+        hit_y = (self.fish_y - r < 0) | (self.fish_y + r > self.height)
+        self.fish_vy = torch.where(hit_y, -self.fish_vy, self.fish_vy)
+        self.fish_y.clamp_(r, self.height - r)
+
+    def _flee(self):
+        # FishPopulation.flee for every live fish, each reacting to its own arena's ball
+        sim = self.sim
+        ball_x = self.ball_x[:, None]
+        ball_y = self.ball_y[:, None]
+        ball_vx = self.ball_vx[:, None]
+        ball_vy = self.ball_vy[:, None]
+        dx = self.fish_x - ball_x
+        dy = self.fish_y - ball_y
+        dist = torch.sqrt(dx * dx + dy * dy)
+
+        # update fitness: reward survival and distance from ball
+        alive = self.alive
+        gain = sim.fish_fitness_survival_weight + (dist / (self.diag + 1e-6)) * sim.fish_fitness_distance_weight
+        self.age += alive
+        self.fitness += torch.where(alive, gain, torch.zeros_like(gain))
+        perceived = (dist < self.genomes[..., 0]) & alive
+
+        # predict where the ball will be shortly
+        fx = self.fish_x - (ball_x + ball_vx * sim.prediction_time)
+        fy = self.fish_y - (ball_y + ball_vy * sim.prediction_time)
+        fdist = torch.sqrt(fx * fx + fy * fy)
+
+        # flee away from the predicted position, or in a random direction when on top of it
+        degenerate = fdist <= 1e-6
+        safe_dist = torch.where(degenerate, torch.ones_like(fdist), fdist)
+        nx = self._uniform_where(degenerate & perceived, -1.0, 1.0, fx / safe_dist)
+        ny = self._uniform_where(degenerate & perceived, -1.0, 1.0, fy / safe_dist)
+
+        # compute approach dot to scale panic
+        ball_speed = torch.sqrt(ball_vx * ball_vx + ball_vy * ball_vy)
+        moving = ball_speed > 1e-6
+        approach_dot = torch.where(moving, (ball_vx * dx + ball_vy * dy)
+                                   / (torch.where(moving, ball_speed, torch.ones_like(ball_speed)) * (dist + 1e-6)),
+                                   torch.zeros_like(dist))
+        panic = 1.0 + torch.where(approach_dot > 0.0, self.genomes[..., 1] * approach_dot, torch.zeros_like(dist))
+
+        # desired flee velocity using fish-specific flee_speed and panic
+        max_speed = self.genomes[..., 3]
+        desired_speed = torch.minimum(self.genomes[..., 2] * panic, max_speed)
+
+        # smooth steering using fish-specific steering_smoothness
+        steering = self.genomes[..., 4]
+        vx = self.fish_vx + (nx * desired_speed - self.fish_vx) * steering
+        vy = self.fish_vy + (ny * desired_speed - self.fish_vy) * steering
+
+        # clamp fish speed to their per-fish max_speed
+        fvel = torch.sqrt(vx * vx + vy * vy)
+        over = (fvel > max_speed) & (fvel > 1e-8)
+        scale = torch.where(over, max_speed / torch.where(over, fvel, torch.ones_like(fvel)), torch.ones_like(fvel))
+        self.fish_vx = torch.where(perceived, vx * scale, self.fish_vx)
+        self.fish_vy = torch.where(perceived, vy * scale, self.fish_vy)
+
+    def step(self, actions):
+        """Hold each arena's action for `action_repeat` ticks, return (states, summed rewards, dones) tensors"""
+        actions = torch.as_tensor(actions, device=self.device)
+        rewards = torch.zeros(self.num_envs, dtype=self.dtype, device=self.device)
+        dones = torch.zeros(self.num_envs, dtype=torch.bool, device=self.device)
+        for _ in range(self.action_repeat):
+            tick_rewards, tick_dones = self._tick(actions)
+            # an arena that finished earlier in this step stops collecting reward; its
+            # leftover ticks are discarded by the reset below
+            rewards += torch.where(dones, torch.zeros_like(tick_rewards), tick_rewards)
+            finished = torch.nonzero(tick_dones & ~dones).squeeze(1)
+            if len(finished):
+                self.final_states[finished] = self.get_states(finished)
+                self.final_fish_eaten[finished] = self.fish_eaten[finished]
+                self.final_survivors[finished] = self.alive[finished].sum(dim=1)
+                self.final_steps[finished] = self.steps[finished]
+                self._evolve(finished)
+                dones |= tick_dones
+            # (a host sync, skipped without action repeat)
+            if self.action_repeat > 1 and bool(dones.all()):
+                break
+
+        states = self.get_states()
+        finished = torch.nonzero(dones).squeeze(1)
+        if len(finished):
+            # auto-reset finished arenas with their next generation
+            self._reset_arenas(finished)
+            states[finished] = self.get_states(finished)
+        return states, rewards, dones
+
+    def _tick(self, actions):
+        # advance every arena by one simulation tick, return (rewards, dones)
+        sim = self.sim
+
+        #update ball velocity based on action
+        valid = (actions >= 0) & (actions < len(self.action_vx))
+        index = actions.clamp(0, len(self.action_vx) - 1)
+        self.ball_vx = torch.where(valid, self.action_vx[index], self.ball_vx)
+        self.ball_vy = torch.where(valid, self.action_vy[index], self.ball_vy)
+
+        # update the fish positions (baseline wandering update)
+        self._update_fish_positions()
+        self.steps += 1
+
+        # optional assist: nudge each ball toward the live fish closest to it now that the fish have moved
+        if sim.ball_auto_chase:
+            has_fish = self.alive.any(dim=1)
+            dists = torch.hypot(self.fish_x - self.ball_x[:, None], self.fish_y - self.ball_y[:, None])
+            closest = torch.argmin(dists.masked_fill(~self.alive, float('inf')), dim=1)[:, None]
+            dx = self.fish_x.gather(1, closest).squeeze(1) - self.ball_x
+            dy = self.fish_y.gather(1, closest).squeeze(1) - self.ball_y
+            dist = torch.sqrt(dx * dx + dy * dy) + 1e-6
+
+            # blend current velocity toward the desired velocity
+            speed = self.ball_speed
+            zero = torch.zeros_like(dist)
+            self.ball_vx = self.ball_vx + torch.where(has_fish, (dx / dist * speed - self.ball_vx) * sim.ball_chase_strength, zero)
+            self.ball_vy = self.ball_vy + torch.where(has_fish, (dy / dist * speed - self.ball_vy) * sim.ball_chase_strength, zero)
+
+        # apply movement limits (clamping / bouncing)
+        self._advance_balls()
+
+        # Fish behavior: predictive fleeing, then move
+        self._flee()
+        self._update_fish_positions()
+
+        # Detect collisions: fish attempt to flee but can still be eaten on contact
+        touching = torch.hypot(self.fish_x - self.ball_x[:, None], self.fish_y - self.ball_y[:, None]) \
+            < (self.ball_radius[:, None] + sim.fish_size)
+        eaten = self.alive & touching
+        num_eaten = eaten.sum(dim=1)
+        self.alive &= ~eaten
+        self.fish_eaten += num_eaten
+        if sim.ball_grow_on_eat:
+            self.ball_radius = torch.clamp(self.ball_radius + sim.ball_grow_amount * num_eaten, max=sim.ball_max_radius)
+
+        # the balls advance once more for each of the reward and observation
+        # passes, keeping their per-tick travel; then distances are taken once
+        self._advance_balls()
+        self._advance_balls()
+        self._update_fish_distances()
+
+        # compute remaining reward components (distance/survival)
+        rewards = self._compute_reward() + sim.reward_eaten * num_eaten
+        dones = (self.steps >= self.Max_steps) | ~self.alive.any(dim=1)
+        return rewards, dones
+
+
+def check_parity(num_envs=8, num_fish=config.NUM_FISH, steps=3000, seed=0, sim=None):
+    """Step `VectorGameEnvironment` and a copy of it in `TorchVectorEnvironment` side by side.
+
+    Both draw from np.random in the same order (the stream is rewound before the
+    torch step), get the same actions, and must agree on states, rewards and
+    dones, including across auto-resets. `sim` sets the rules (config.py when
+    not given). Returns the largest absolute state and reward differences seen.
+    """
+    from vector_env import VectorGameEnvironment
+
+    np.random.seed(seed)
+    reference = VectorGameEnvironment(num_envs, config.WINDOW_WIDTH, config.WINDOW_HEIGHT, num_fish, sim)
+    env = TorchVectorEnvironment.from_vector_env(reference, rng='numpy')
+    actions = np.random.RandomState(seed + 1).randint(config.ACTION_SIZE, size=(steps, num_envs))
+
+    max_state_diff = 0.0
+    max_reward_diff = 0.0
+    episodes = 0
+    for t in range(steps):
+        rng_state = np.random.get_state()
+        ref_states, ref_rewards, ref_dones = reference.step(actions[t])
+        np.random.set_state(rng_state)
+        states, rewards, dones = env.step(actions[t])
+
+        if not np.array_equal(dones.numpy(), ref_dones):
+            raise AssertionError(f"done flags diverged at step {t}")
+        max_state_diff = max(max_state_diff, float(np.abs(states.numpy() - ref_states).max()))
+        max_reward_diff = max(max_reward_diff, float(np.abs(rewards.numpy() - ref_rewards).max()))
+        episodes += int(ref_dones.sum())
+    return {'steps': steps, 'episodes': episodes, 'max_state_diff': max_state_diff, 'max_reward_diff': max_reward_diff}
+
+
+if __name__ == "__main__":
+    result = check_parity()
+    print(f"{result['steps']} steps, {result['episodes']} episodes | "
+          f"max state diff {result['max_state_diff']:.3g} | max reward diff {result['max_reward_diff']:.3g}")
@@ -0,0 +1,124 @@
+"""Compact binary trajectory files of ball and fish positions.
+
+A file starts with an 8-byte magic and the arena size, followed by one
+record per recorded tick:
+
+    FRAME header  generation, step, fish count, ball x, ball y, ball radius,
+                  fish eaten, reward (little-endian u32/f32, 32 bytes)
+    fish block    float32 array of shape (4, fish count): x, y, vx, vy
+
+Records are appended as they are made, so a file can be extended across runs.
+A partially written last record (e.g. after a crash) is skipped by the reader
+and cut off by the recorder before it appends to the file again.
+`replay_trajectory.py` renders these files offline.
+"""
+
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b'FBTRAJ1\x00'
+FILE_HEADER = struct.Struct('<8sII')
+FRAME_HEADER = struct.Struct('<IIIfffIf')
+
+
+def complete_length(path):
+    """Bytes of `path` up to the end of its last complete record"""
+    size = os.path.getsize(path)
+    offset = FILE_HEADER.size
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        while offset + FRAME_HEADER.size <= size:
+            count = FRAME_HEADER.unpack(f.read(FRAME_HEADER.size))[2]
+            end = offset + FRAME_HEADER.size + 16 * count
+            if end > size:
+                break
+            f.seek(end)
+            offset = end
+    return offset
+
+
+class TrajectoryRecorder:
+    """Append per-tick ball and fish positions of a `GameEnvironment` to a trajectory file"""
+
+    def __init__(self, path, width, height, every=1, buffer_size=1 << 20):
+        self.path = path
+        self.every = max(1, every)
+        self.frames = 0
+        self._ticks = 0
+
+        exists = os.path.exists(path) and os.path.getsize(path) >= FILE_HEADER.size
+        if exists:
+            with open(path, 'rb') as f:
+                magic, file_width, file_height = FILE_HEADER.unpack(f.read(FILE_HEADER.size))
+            if magic != MAGIC or (file_width, file_height) != (width, height):
+                raise ValueError(f"{path} is not a {width}x{height} trajectory file")
+            # drop a record cut short by a crash so new frames start on a record boundary
+            end = complete_length(path)
+            if end != os.path.getsize(path):
+                os.truncate(path, end)
+        elif os.path.exists(path):
+            os.truncate(path, 0)  # not even a complete file header
+        self._file = open(path, 'ab', buffering=buffer_size)
+        if not exists:
+            self._file.write(FILE_HEADER.pack(MAGIC, width, height))
+
+    def record(self, env):
+        """Write the environment's current ball and fish state (every `every`-th call)"""
+        self._ticks += 1
+        if self._ticks % self.every:
+            return
+        population = env.population
+        ball = env.ball
+        count = len(population)
+        self._file.write(FRAME_HEADER.pack(env.generation, env.steps, count, ball.x, ball.y, ball.radius,
+                                           env.fish_eaten, env.reward))
+        fish = np.empty((4, count), dtype=np.float32)
+        fish[0] = population.x
+        fish[1] = population.y
+        fish[2] = population.vx
+        fish[3] = population.vy
+        self._file.write(fish.tobytes())
+        self.frames += 1
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+class TrajectoryFrame:
+    """One recorded tick; fish arrays are read-only views into the memory-mapped file"""
+
+    __slots__ = ('generation', 'step', 'ball_x', 'ball_y', 'ball_radius', 'fish_eaten', 'reward',
+                 'x', 'y', 'vx', 'vy')
+
+    def __init__(self, header, fish):
+        (self.generation, self.step, _, self.ball_x, self.ball_y, self.ball_radius,
+         self.fish_eaten, self.reward) = header
+        self.x, self.y, self.vx, self.vy = fish
+
+
+class TrajectoryReader:
+    """Iterate over the frames of a trajectory file without loading it into memory"""
+
+    def __init__(self, path):
+        self.path = path
+        self._data = np.memmap(path, dtype=np.uint8, mode='r')
+        magic, self.width, self.height = FILE_HEADER.unpack(self._data[:FILE_HEADER.size].tobytes())
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a trajectory file")
+
+    def __iter__(self):
+        data = self._data
+        offset = FILE_HEADER.size
+        while offset + FRAME_HEADER.size <= len(data):
+            header = FRAME_HEADER.unpack(data[offset:offset + FRAME_HEADER.size].tobytes())
+            count = header[2]
+            start = offset + FRAME_HEADER.size
+            end = start + 16 * count
+            if end > len(data):
+                break  # truncated last record
+            fish = np.frombuffer(data[start:end], dtype=np.float32).reshape(4, count)
+            yield TrajectoryFrame(header, fish)
+            offset = end
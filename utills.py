@@ -1,98 +1,417 @@
 """Utility functions and helpers"""
 
+import copy
+import glob
 import os
 import json
+import random
+import shutil
+import threading
 import numpy as np
-import torch
 from datetime import datetime
 
+import config
+from log_store import ColumnLog
+
+# torch is imported inside the ModelManager functions that use it, so the statistics
+# helpers (and tools built on them) load without paying for it
+
 class ModelManager:
-    """Manage saving and loading model checkpoints"""
+    """Manage saving and loading model checkpoints.
+
+    `save_model` snapshots the agent (networks, optimizer, epsilon and, with
+    `include_memory`, the replay buffer) into CPU memory and, when `async_save`
+    is set, writes it on a background thread so training keeps stepping while
+    the file is written. Files are written under a temporary name and renamed
+    into place, so a crash never leaves a half-written checkpoint, and only the
+    newest `keep_last` checkpoints are kept (None keeps all).
+    `save_training_state` / `load_training_state` do the same for a complete,
+    resumable snapshot of a training run.
+    """
     
-    def __init__(self, save_dir='models'):
+    def __init__(self, save_dir='models', async_save=None, keep_last=None, include_memory=None):
         self.save_dir = save_dir
+        self.async_save = config.CHECKPOINT_ASYNC if async_save is None else async_save
+        self.keep_last = config.CHECKPOINT_KEEP if keep_last is None else keep_last
+        self.include_memory = config.CHECKPOINT_REPLAY_BUFFER if include_memory is None else include_memory
+        self._writer = None
+        self._error = None
         if not os.path.exists(save_dir):
             os.makedirs(save_dir)
     
-    def save_model(self, agent, episode, stats=None):
-        """Save agent model and training stats"""
+    def save_model(self, agent, episode, stats=None, include_memory=None):
+        """Save agent model and training stats; returns the checkpoint path"""
+        import torch
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"model_ep{episode}_{timestamp}.pt"
         filepath = os.path.join(self.save_dir, filename)
+        if include_memory is None:
+            include_memory = self.include_memory
         
-        checkpoint = {
-            'state_dict': agent.q_network.state_dict(),
-            'target_state_dict': agent.target_network.state_dict(),
-            'epsilon': agent.epsilon,
-            'episode': episode,
-            'stats': stats
-        }
-        
-        torch.save(checkpoint, filepath)
-        print(f"Model saved: {filepath}")
+        # copy everything the training loop keeps mutating before handing it to the writer
+        checkpoint = _snapshot_agent(agent)
+        checkpoint['episode'] = episode
+        checkpoint['stats'] = stats
+        if include_memory:
+            checkpoint['memory'] = {name: torch.from_numpy(value) if isinstance(value, np.ndarray) else value
+                                    for name, value in agent.memory.state_dict().items()}
         
+        self._submit(self._write, checkpoint, filepath)
         return filepath
+
+    def save_training_state(self, agent, env, stats_tracker, progress):
+        """Save everything needed to resume training; returns the resume directory.
+
+        The directory holds `state.pt` (networks, optimizer, epsilon, environment
+        and fish population, statistics, RNG states and the training loop's
+        `progress` counters) and the replay buffer as one `.npy` file per array,
+        which `load_training_state` memory-maps so large buffers reload quickly.
+        """
+        import torch
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(self.save_dir, f"resume_ep{progress['episode']}_{timestamp}")
+
+        state = {
+            'agent': _snapshot_agent(agent),
+            'env_type': type(env).__name__,
+            'env': env.state_dict(),
+            'stats': stats_tracker.state_dict(),
+            'progress': dict(progress),
+            'rng': {
+                'numpy': np.random.get_state(),
+                'python': random.getstate(),
+                'torch': torch.get_rng_state(),
+                'cuda': torch.cuda.get_rng_state_all() if torch.cuda.is_available() else None,
+            },
+        }
+        memory = agent.memory.state_dict()
+        arrays = {name: value for name, value in memory.items() if isinstance(value, np.ndarray)}
+        state['memory'] = {name: value for name, value in memory.items() if name not in arrays}
+
+        self._submit(self._write_training_state, state, arrays, path)
+        return path
+
+    def read_training_state(self, path, device='cpu'):
+        """The `state.pt` dict of a resume directory (without the replay buffer arrays)"""
+        import torch
+        # our own file: it holds NumPy arrays and RNG tuples, not just tensors
+        return torch.load(os.path.join(path, 'state.pt'), map_location=device, weights_only=False)
+
+    def load_training_state(self, path, agent, env, stats_tracker=None, state=None):
+        """Restore a directory written by `save_training_state`; returns its `progress` dict.
+
+        `state` is the directory's already read `read_training_state` dict, if any;
+        the statistics are restored into `stats_tracker` when given (see also
+        `StatisticsTracker.from_state`).
+        """
+        import torch
+        if state is None:
+            state = self.read_training_state(path, agent.device)
+        if state.get('env_type', type(env).__name__) != type(env).__name__:
+            raise ValueError(f"{path} was saved from a {state['env_type']}, not a {type(env).__name__} "
+                             f"(check NUM_ENVS)")
+
+        checkpoint = state['agent']
+        agent.q_network.load_state_dict(checkpoint['state_dict'])
+        agent.target_network.load_state_dict(checkpoint['target_state_dict'])
+        agent.policy.sync()
+        agent.optimizer.load_state_dict(checkpoint['optimizer_state_dict'])
+        agent.epsilon = checkpoint['epsilon']
+        agent.env_steps = checkpoint['env_steps']
+
+        memory = dict(state['memory'])
+        for array_path in glob.glob(os.path.join(path, 'memory', '*.npy')):
+            memory[os.path.basename(array_path)[:-len('.npy')]] = np.load(array_path, mmap_mode='r')
+        agent.memory.load_state_dict(memory)
+
+        env.load_state_dict(state['env'])
+        if stats_tracker is not None:
+            stats_tracker.load_state_dict(state['stats'])
+
+        rng = state['rng']
+        np.random.set_state(rng['numpy'])
+        random.setstate(rng['python'])
+        torch.set_rng_state(rng['torch'])
+        if rng['cuda'] is not None and torch.cuda.is_available():
+            torch.cuda.set_rng_state_all(rng['cuda'])
+
+        print(f"Training state loaded: {path}")
+        return state['progress']
+
+    def latest_model(self):
+        """Newest model checkpoint in `save_dir`, or None"""
+        paths = glob.glob(os.path.join(self.save_dir, 'model_ep*.pt'))
+        return max(paths, key=os.path.getmtime) if paths else None
+
+    def latest_training_state(self):
+        """Newest resume directory in `save_dir`, or None"""
+        paths = glob.glob(os.path.join(self.save_dir, 'resume_ep*'))
+        paths = [path for path in paths if not path.endswith('.tmp')]
+        return max(paths, key=os.path.getmtime) if paths else None
+
+    def _submit(self, write, *args):
+        # one write in flight at a time: a slow disk delays the next save, not every step
+        self.wait()
+        if self.async_save:
+            self._writer = threading.Thread(target=write, args=args, name='checkpoint-writer')
+            self._writer.start()
+        else:
+            write(*args)
+            self._raise_error()
+
+    def _write(self, checkpoint, filepath):
+        import torch
+        try:
+            tmp_path = filepath + '.tmp'
+            torch.save(checkpoint, tmp_path)
+            os.replace(tmp_path, filepath)
+            print(f"Model saved: {filepath}")
+            self._rotate('model_ep*.pt')
+        except Exception as e:
+            self._error = e
+            self._discard(filepath + '.tmp')
+
+    def _write_training_state(self, state, arrays, path):
+        import torch
+        try:
+            tmp_path = path + '.tmp'
+            os.makedirs(os.path.join(tmp_path, 'memory'))
+            for name, array in arrays.items():
+                np.save(os.path.join(tmp_path, 'memory', f"{name}.npy"), array)
+            torch.save(state, os.path.join(tmp_path, 'state.pt'))
+            os.replace(tmp_path, path)
+            print(f"Training state saved: {path}")
+            self._rotate('resume_ep*[0-9]')
+        except Exception as e:
+            self._error = e
+            self._discard(path + '.tmp')
+
+    @staticmethod
+    def _discard(path):
+        # leftovers of a failed write
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        elif os.path.exists(path):
+            os.remove(path)
+
+    def _rotate(self, pattern):
+        # drop the oldest checkpoints beyond keep_last
+        if not self.keep_last:
+            return
+        paths = sorted(glob.glob(os.path.join(self.save_dir, pattern)), key=os.path.getmtime)
+        for path in paths[:-self.keep_last]:
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise RuntimeError("writing checkpoint failed") from error
+
+    def wait(self):
+        """Block until the pending checkpoint write (if any) is on disk"""
+        if self._writer is not None:
+            self._writer.join()
+            self._writer = None
+        self._raise_error()
     
     def load_model(self, agent, filepath):
-        """Load agent model from checkpoint"""
-        checkpoint = torch.load(filepath)
+        """Load agent model (and optimizer / replay buffer when saved) from checkpoint"""
+        import torch
+        checkpoint = torch.load(filepath, map_location=agent.device)
         agent.q_network.load_state_dict(checkpoint['state_dict'])
         agent.target_network.load_state_dict(checkpoint['target_state_dict'])
+        agent.policy.sync()
+        if 'optimizer_state_dict' in checkpoint:
+            agent.optimizer.load_state_dict(checkpoint['optimizer_state_dict'])
+        if 'memory' in checkpoint:
+            agent.memory.load_state_dict({name: value.numpy() if isinstance(value, torch.Tensor) else value
+                                          for name, value in checkpoint['memory'].items()})
         agent.epsilon = checkpoint['epsilon']
         
         print(f"Model loaded: {filepath}")
         return checkpoint.get('stats', None)
     
     def save_stats(self, stats, filename='training_stats.json'):
-        """Save training statistics"""
+        """Save training statistics (a summary dict; full histories live in the StatisticsTracker logs)"""
         filepath = os.path.join(self.save_dir, filename)
         with open(filepath, 'w') as f:
             json.dump(stats, f, indent=4)
         print(f"Stats saved: {filepath}")
 
 
+def _snapshot(obj):
+    """Deep copy of a (nested) state dict with every tensor cloned to CPU"""
+    import torch
+    if isinstance(obj, torch.Tensor):
+        return obj.detach().to('cpu', copy=True)
+    if isinstance(obj, dict):
+        return {key: _snapshot(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_snapshot(value) for value in obj)
+    return copy.deepcopy(obj)
+
+
+def _snapshot_agent(agent):
+    """CPU copies of the agent's networks and optimizer, plus epsilon"""
+    return {
+        'state_dict': _snapshot(agent.q_network.state_dict()),
+        'target_state_dict': _snapshot(agent.target_network.state_dict()),
+        'optimizer_state_dict': _snapshot(agent.optimizer.state_dict()),
+        'epsilon': agent.epsilon,
+        'env_steps': agent.env_steps,
+    }
+
+
 class StatisticsTracker:
-    """Track training statistics"""
-    
-    def __init__(self):
-        self.episode_rewards = []
-        self.episode_fish_eaten = []
-        self.episode_fish_survived = []
-        self.episode_steps = []
-        self.average_rewards = []
+    """Track training statistics.
+
+    Episodes and generation genome summaries are appended to `ColumnLog`s
+    (chunked .npy files under a per-run directory of `log_dir`, or memory when
+    `log_dir` is None) while the summary aggregates are kept up to date on
+    every record, so recording and `get_summary` cost the same at episode ten
+    and episode ten million.
+    """
+
+    EPISODE_COLUMNS = (('reward', 'f8'), ('fish_eaten', 'i8'), ('fish_survived', 'i8'),
+                       ('steps', 'i8'), ('avg_reward_10', 'f8'))
+    GENOME_FIELDS = ('perception_radius', 'panic_multiplier', 'flee_speed', 'max_speed', 'steering_smoothness')
+    GENERATION_COLUMNS = (('generation', 'i8'), ('n', 'i8')) + tuple(
+        (f'{k}_{stat}', 'f8') for k in GENOME_FIELDS for stat in ('mean', 'median', 'min', 'max'))
+
+    def __init__(self, log_dir=None, chunk_size=4096, run_dir=None):
+        # logs go to `run_dir` when given (a resumed run), else to a new run_<timestamp> under `log_dir`
+        self.log_dir = run_dir
+        if run_dir is None and log_dir is not None:
+            self.log_dir = os.path.join(log_dir, f"run_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        self.episodes = ColumnLog(self.EPISODE_COLUMNS, self.log_dir, 'episodes', chunk_size)
         # per-generation genome statistics
-        self.generation_stats = []
+        self.generations = ColumnLog(self.GENERATION_COLUMNS, self.log_dir, 'generations', chunk_size)
+
+        # streaming aggregates behind get_summary
+        self.rewards = RunningStats()
+        self.reward_median = StreamingQuantile(0.5)
+        self.recent_rewards = RollingAverage(10)
+        self.total_fish_eaten = 0
+        self.total_fish_survived = 0
+        self.total_steps = 0
+        # genome fields over every recorded generation
+        self.genome_stats = {k: RunningStats() for k in self.GENOME_FIELDS}
+        self.genome_medians = {k: StreamingQuantile(0.5) for k in self.GENOME_FIELDS}
     
     def record_episode(self, reward, fish_eaten, steps, fish_survived=None):
         """Record episode statistics"""
-        self.episode_rewards.append(reward)
-        self.episode_fish_eaten.append(fish_eaten)
-        # record survivors if provided
+        reward = float(reward)
+        self.rewards.add(reward)
+        self.reward_median.add(reward)
+        self.total_fish_eaten += fish_eaten
+        # record survivors if provided (-1 in the log when not)
         if fish_survived is not None:
-            self.episode_fish_survived.append(fish_survived)
-        self.episode_steps.append(steps)
-        
+            self.total_fish_survived += fish_survived
+        self.total_steps += steps
+
         # Calculate moving average
-        if len(self.episode_rewards) >= 10:
-            avg = np.mean(self.episode_rewards[-10:])
-            self.average_rewards.append(avg)
+        self.recent_rewards.add(reward)
+        avg = self.recent_rewards.get_average() if self.recent_rewards.full else np.nan
+
+        self.episodes.append((reward, fish_eaten, -1 if fish_survived is None else fish_survived, steps, avg))
+
+    # streaming state carried over when training resumes
+    AGGREGATES = ('rewards', 'reward_median', 'recent_rewards', 'total_fish_eaten', 'total_fish_survived',
+                  'total_steps', 'genome_stats', 'genome_medians')
+
+    def state_dict(self):
+        """Aggregates and log positions, for resumable training"""
+        state = {name: copy.deepcopy(getattr(self, name)) for name in self.AGGREGATES}
+        state['log_dir'] = self.log_dir
+        state['episodes'] = self.episodes.state_dict()
+        state['generations'] = self.generations.state_dict()
+        return state
+
+    @classmethod
+    def from_state(cls, state, chunk_size=4096):
+        """Tracker continuing the run saved with `state_dict`, logging to that run's directory"""
+        tracker = cls(chunk_size=chunk_size, run_dir=state['log_dir'])
+        tracker.load_state_dict(state)
+        return tracker
+
+    def load_state_dict(self, state):
+        """Continue the tracker (and its run's logs) saved with `state_dict`"""
+        for name in self.AGGREGATES:
+            setattr(self, name, copy.deepcopy(state[name]))
+        self.log_dir = state['log_dir']
+        chunk_size = self.episodes.chunk_size
+        self.episodes = ColumnLog(self.EPISODE_COLUMNS, self.log_dir, 'episodes', chunk_size)
+        self.episodes.load_state_dict(state['episodes'])
+        self.generations = ColumnLog(self.GENERATION_COLUMNS, self.log_dir, 'generations', chunk_size)
+        self.generations.load_state_dict(state['generations'])
+
+    # full histories, loaded on demand for analysis
+    @property
+    def episode_rewards(self):
+        return self.episodes.load('reward')
+
+    @property
+    def episode_fish_eaten(self):
+        return self.episodes.load('fish_eaten')
+
+    @property
+    def episode_fish_survived(self):
+        survived = self.episodes.load('fish_survived')
+        return survived[survived >= 0]
+
+    @property
+    def episode_steps(self):
+        return self.episodes.load('steps')
+
+    @property
+    def average_rewards(self):
+        averages = self.episodes.load('avg_reward_10')
+        return averages[~np.isnan(averages)]
+
+    @property
+    def generation_stats(self):
+        rows = self.generations.load()
+        return [{name: row[name].item() for name in rows.dtype.names} for row in rows]
     
     def get_summary(self):
         """Get summary statistics"""
-        if not self.episode_rewards:
+        count = len(self.episodes)
+        if not count:
             return {}
-        gen_summary = None
-        if self.generation_stats:
-            gen_summary = self.generation_stats[-1]
-        return {
-            'total_episodes': len(self.episode_rewards),
-            'avg_reward': np.mean(self.episode_rewards),
-            'max_reward': max(self.episode_rewards),
-            'min_reward': min(self.episode_rewards),
-            'total_fish_eaten': sum(self.episode_fish_eaten),
-            'total_fish_survived': int(np.sum(self.episode_fish_survived)) if self.episode_fish_survived else 0,
-            'avg_steps': np.mean(self.episode_steps)
+        summary = {
+            'total_episodes': count,
+            'avg_reward': self.rewards.mean,
+            'reward_std': self.rewards.std,
+            'median_reward': self.reward_median.value,
+            'max_reward': self.rewards.max,
+            'min_reward': self.rewards.min,
+            'total_fish_eaten': int(self.total_fish_eaten),
+            'total_fish_survived': int(self.total_fish_survived),
+            'avg_steps': self.total_steps / count
         }
+        if len(self.generations):
+            summary['genomes'] = self.genome_summary()
+        if self.log_dir is not None:
+            summary['log_dir'] = self.log_dir
+        return summary
+
+    def genome_summary(self):
+        """Mean, std, min and max of each genome field over all recorded genomes, and the
+        median of the per-generation medians (P-square estimate)"""
+        summary = {}
+        for k in self.GENOME_FIELDS:
+            stats = self.genome_stats[k]
+            summary[k] = {'mean': stats.mean, 'std': stats.std, 'median': self.genome_medians[k].value,
+                          'min': stats.min, 'max': stats.max}
+        return summary
+
+    def flush(self):
+        """Write all logged rows to the log directory"""
+        self.episodes.flush()
+        self.generations.flush()
     
     def print_summary(self):
         """Print summary to console"""
@@ -100,6 +419,8 @@ class StatisticsTracker:
         if summary:
             print("\n=== Training Summary ===")
             for key, value in summary.items():
+                if isinstance(value, dict):
+                    continue  # nested breakdowns (genomes) are in the saved stats
                 if isinstance(value, float):
                     print(f"{key}: {value:.2f}")
                 else:
@@ -109,27 +430,37 @@ class StatisticsTracker:
     def record_generation(self, generation, genomes):
         """Record summary statistics for a generation's genomes.
 
-        `genomes` is expected to be a list of genome dicts (or objects with numeric fields).
+        `genomes` is expected to be an (N, 5) genome array in `entity.GENOME_KEYS` order,
+        or a list of genome dicts (or objects with numeric fields).
         """
-        if not genomes:
+        if len(genomes) == 0:
             return
 
         # collect numeric fields
-        keys = ['perception_radius', 'panic_multiplier', 'flee_speed', 'max_speed', 'steering_smoothness']
-        stats = {'generation': generation, 'n': len(genomes)}
-        for k in keys:
-            vals = [float(g.get(k, 0.0)) if isinstance(g, dict) else float(getattr(g, k, 0.0)) for g in genomes]
-            stats[f'{k}_mean'] = float(np.mean(vals))
-            stats[f'{k}_median'] = float(np.median(vals))
-            stats[f'{k}_min'] = float(np.min(vals))
-            stats[f'{k}_max'] = float(np.max(vals))
-
-        self.generation_stats.append(stats)
-        # Convenience printout when verbose
-        try:
-            print(f"Gen {generation}: n={stats['n']} | flee_speed_mean={stats['flee_speed_mean']:.2f} | perception_mean={stats['perception_radius_mean']:.1f}")
-        except Exception:
-            pass
+        keys = self.GENOME_FIELDS
+        if isinstance(genomes, np.ndarray):
+            values = genomes.reshape(len(genomes), len(keys))
+        else:
+            values = np.array([[float(g.get(k, 0.0)) if isinstance(g, dict) else float(getattr(g, k, 0.0)) for k in keys]
+                               for g in genomes])
+        means = values.mean(axis=0)
+        medians = np.median(values, axis=0)
+        mins = values.min(axis=0)
+        maxs = values.max(axis=0)
+        row = [generation, len(genomes)]
+        for i in range(len(keys)):
+            row += [means[i], medians[i], mins[i], maxs[i]]
+        self.generations.append(tuple(row))
+
+        # fold this generation into the run-wide genome statistics: moments merged in one
+        # vectorized step per field, the median tracked over the generation medians
+        for i, k in enumerate(keys):
+            self.genome_stats[k].add_batch(values[:, i])
+            self.genome_medians[k].add(medians[i])
+
+        # Convenience printout when verbose, at the episode printout's pace
+        if config.VERBOSE and generation % 10 == 0:
+            print(f"Gen {generation}: n={len(genomes)} | flee_speed_mean={means[2]:.2f} | perception_mean={means[0]:.1f}")
 
 
 class ActionMapper:
@@ -154,20 +485,180 @@ class ActionMapper:
 
 
 class RollingAverage:
-    """Calculate rolling average of values"""
+    """Rolling mean and variance over the last `window_size` values.
+
+    Values sit in a ring buffer with running sums, so `add` and the getters are
+    O(1); the sums are recomputed from the buffer each time it wraps around so
+    float error cannot build up over long runs.
+    """
     
     def __init__(self, window_size=10):
         self.window_size = window_size
-        self.values = []
+        self._buffer = np.zeros(window_size)
+        self._next = 0
+        self._count = 0
+        self._sum = 0.0
+        self._sum_sq = 0.0
+    
+    def __len__(self):
+        return self._count
+
+    @property
+    def full(self):
+        return self._count == self.window_size
+
+    @property
+    def values(self):
+        """Window contents, oldest first"""
+        if not self.full:
+            return self._buffer[:self._count].copy()
+        return np.roll(self._buffer, -self._next)
     
     def add(self, value):
         """Add value to rolling window"""
-        self.values.append(value)
-        if len(self.values) > self.window_size:
-            self.values.pop(0)
+        value = float(value)
+        if self.full:
+            old = self._buffer[self._next]
+            self._sum -= old
+            self._sum_sq -= old * old
+        else:
+            self._count += 1
+        self._buffer[self._next] = value
+        self._sum += value
+        self._sum_sq += value * value
+        self._next += 1
+        if self._next == self.window_size:
+            self._next = 0
+            self._sum = float(self._buffer.sum())
+            self._sum_sq = float(np.dot(self._buffer, self._buffer))
     
     def get_average(self):
         """Get current average"""
-        if not self.values:
+        if not self._count:
             return 0
-        return np.mean(self.values)
\ No newline at end of file
+        return self._sum / self._count
+
+    def get_variance(self):
+        """Get current (population) variance"""
+        if not self._count:
+            return 0
+        mean = self._sum / self._count
+        return max(self._sum_sq / self._count - mean * mean, 0.0)
+
+    def get_std(self):
+        return self.get_variance() ** 0.5
+
+
+class RunningStats:
+    """Count, mean, variance (Welford), min, max and total of a stream in O(1) memory"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.total = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def add(self, value):
+        value = float(value)
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def add_batch(self, values):
+        """Fold a whole array in at once (Chan et al. parallel merge of count, mean and M2)"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        count = len(values)
+        if not count:
+            return
+        mean = float(values.mean())
+        m2 = float(np.square(values - mean).sum())
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self._m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+        self.total += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    @property
+    def variance(self):
+        """Population variance (as `np.var`)"""
+        return self._m2 / self.count if self.count else 0.0
+
+    @property
+    def std(self):
+        return self.variance ** 0.5
+
+
+class StreamingQuantile:
+    """Estimate the `quantile` of a stream with the P-square algorithm (Jain & Chlamtac, 1985).
+
+    Keeps five markers instead of the data, so memory and `add` are O(1). Exact
+    until five values have been seen, an estimate after that.
+    """
+
+    def __init__(self, quantile=0.5):
+        p = quantile
+        self.quantile = quantile
+        self.count = 0
+        self._heights = []
+        self._positions = [0, 1, 2, 3, 4]
+        self._desired = [0.0, 2 * p, 4 * p, 2 + 2 * p, 4.0]
+        self._increments = (0.0, p / 2, p, (1 + p) / 2, 1.0)
+
+    def add(self, value):
+        value = float(value)
+        self.count += 1
+        q = self._heights
+        if self.count <= 5:
+            q.append(value)
+            q.sort()
+            return
+
+        # cell of the new value, stretching the outer markers if needed
+        if value < q[0]:
+            q[0] = value
+            k = 0
+        elif value >= q[4]:
+            q[4] = value
+            k = 3
+        else:
+            k = 0
+            while value >= q[k + 1]:
+                k += 1
+        n = self._positions
+        for i in range(k + 1, 5):
+            n[i] += 1
+        desired = self._desired
+        for i in range(5):
+            desired[i] += self._increments[i]
+
+        # move the middle markers toward their desired positions
+        for i in (1, 2, 3):
+            d = desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                height = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+                if not q[i - 1] < height < q[i + 1]:
+                    height = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = height
+                n[i] += d
+
+    @property
+    def value(self):
+        if not self.count:
+            return np.nan
+        if self.count <= 5:
+            return float(np.quantile(self._heights, self.quantile))
+        return self._heights[2]
@@ -0,0 +1,306 @@
+from types import SimpleNamespace
+
+import numpy as np
+import entity
+import evolution
+from sim_config import SimConfig
+
+
+class VectorGameEnvironment:
+    """Run K independent arenas in lockstep.
+
+    Every arena has the same rules as `GameEnvironment`, but ball state is held in
+    (K,) arrays and all K * num_fish fish share one flattened `FishPopulation`
+    (row k of the reshaped (K, num_fish) arrays is arena k). Eaten fish stay in
+    place and are masked out by `alive`. `step` takes one action per arena, holds
+    it for `action_repeat` ticks like `GameEnvironment.step` and returns
+    (K, STATE_SIZE) states and summed rewards; arenas that finish are evolved and reset
+    automatically, with their final state and episode totals kept in the
+    `final_*` arrays.
+    """
+
+    def __init__(self, num_envs, width, height, num_fish, sim=None):
+        # runtime settings shared by every arena (config.py snapshot unless given)
+        self.sim = (sim or SimConfig.from_config()).with_arena(width, height, num_fish)
+        self.num_envs = num_envs
+        self.width = width
+        self.height = height
+        self.num_fish = num_fish
+        self.Max_steps = self.sim.max_steps
+        self.action_repeat = max(1, self.sim.action_repeat)
+        self.diag = self.sim.diag
+
+        # ball state, one entry per arena
+        self.ball_x = np.zeros(num_envs)
+        self.ball_y = np.zeros(num_envs)
+        self.ball_vx = np.zeros(num_envs)
+        self.ball_vy = np.zeros(num_envs)
+        self.ball_radius = np.zeros(num_envs)
+        self.ball_speed = self.sim.ball_speed
+
+        # fish state for all arenas; genomes live in the population's genome arrays
+        self.population = entity.FishPopulation(np.zeros((num_envs * num_fish, 2)), width, height, sim=self.sim)
+        self.alive = np.zeros((num_envs, num_fish), dtype=bool)
+
+        # end-of-tick ball-to-fish distance cache shared by reward and state
+        self.distance_origin_x = np.zeros(num_envs)
+        self.distance_origin_y = np.zeros(num_envs)
+        self.fish_distances = np.full((num_envs, num_fish), np.inf)
+        self.closest_fish = np.zeros(num_envs, dtype=np.int64)
+
+        # per-arena counters
+        self.generation = np.zeros(num_envs, dtype=np.int64)
+        self.steps = np.zeros(num_envs, dtype=np.int64)
+        self.fish_eaten = np.zeros(num_envs, dtype=np.int64)
+        self.reward = np.zeros(num_envs)
+
+        # outcome of the episodes that finished on the last step (valid where done)
+        self.final_states = np.zeros((num_envs, self.sim.state_size), dtype=np.float32)
+        self.final_fish_eaten = np.zeros(num_envs, dtype=np.int64)
+        self.final_survivors = np.zeros(num_envs, dtype=np.int64)
+        self.final_steps = np.zeros(num_envs, dtype=np.int64)
+
+        self._reset_arenas(np.arange(num_envs))
+
+    def _fish(self, name):
+        # (K, num_fish) view of a population array
+        return getattr(self.population, name).reshape(self.num_envs, self.num_fish)
+
+    @property
+    def genomes(self):
+        """Genomes of every fish as a (K, num_fish, len(GENOME_KEYS)) array"""
+        return np.stack([self._fish(key) for key in entity.GENOME_KEYS], axis=-1)
+
+    def state_dict(self):
+        """Copies of every per-arena array and the fish population, for resumable training"""
+        state = {name: value.copy() for name, value in vars(self).items() if isinstance(value, np.ndarray)}
+        state['population'] = self.population.state_dict()
+        return state
+
+    def load_state_dict(self, state):
+        """Restore a state saved with `state_dict` (same num_envs and num_fish)"""
+        if state['alive'].shape != self.alive.shape:
+            raise ValueError(f"state has {state['alive'].shape} arenas x fish, this environment {self.alive.shape}")
+        for name, value in state.items():
+            if name == 'population':
+                self.population.load_state_dict(value)
+            else:
+                getattr(self, name)[...] = value
+
+    def _arena_slice(self, env):
+        return slice(env * self.num_fish, (env + 1) * self.num_fish)
+
+    def _reset_arenas(self, envs):
+        # respawn fish at random positions, keeping the arenas' current genomes
+        count = len(envs) * self.num_fish
+        rows = np.repeat(envs, self.num_fish) * self.num_fish + np.tile(np.arange(self.num_fish), len(envs))
+        population = self.population
+        population.x[rows] = np.random.randint(0, self.width, size=count)
+        population.y[rows] = np.random.randint(0, self.height, size=count)
+        population.vx[rows] = np.random.uniform(self.sim.fish_min_speed, self.sim.fish_max_speed, size=count)
+        population.vy[rows] = np.random.uniform(self.sim.fish_min_speed, self.sim.fish_max_speed, size=count)
+        population.direction_change_counter[rows] = 0
+        population.age[rows] = 0
+        population.fitness[rows] = 0.0
+        self.alive[envs] = True
+
+        # reset ball with a fresh initial velocity
+        self.ball_x[envs] = self.width // 2
+        self.ball_y[envs] = self.height // 2
+        self.ball_vx[envs] = np.random.uniform(-1.0, 1.0, size=len(envs)) * self.ball_speed
+        self.ball_vy[envs] = np.random.uniform(-1.0, 1.0, size=len(envs)) * self.ball_speed
+        self.ball_radius[envs] = self.sim.ball_radius
+
+        # Compute reward to clear any immediate overlaps
+        self._advance_balls(envs)
+        self._update_fish_distances(envs)
+        self._compute_reward(envs)
+        self.steps[envs] = 0
+        self.reward[envs] = 0
+        self.fish_eaten[envs] = 0
+
+    def _evolve(self, envs):
+        # build the next generation of each finished arena from its survivors and dead fish
+        for env in envs:
+            sl = self._arena_slice(env)
+            alive = self.alive[env]
+            genomes = self.population.genome_array(sl)
+            new_genomes = evolution.next_generation(genomes[alive], self.population.fitness[sl][alive],
+                                                    genomes[~alive], self.population.age[sl][~alive],
+                                                    self.num_fish, int(self.generation[env]), self.sim)
+            for col, key in enumerate(entity.GENOME_KEYS):
+                getattr(self.population, key)[sl] = new_genomes[:, col]
+            self.generation[env] += 1
+
+    def reset(self):
+        """Evolve and reset every arena, return the (K, STATE_SIZE) initial states"""
+        envs = np.arange(self.num_envs)
+        self._evolve(envs)
+        self._reset_arenas(envs)
+        return self.get_states()
+
+    def _advance_balls(self, envs=slice(None)):
+        # vectorized Ball.get_position: move, reflect off the bounds, clamp speed
+        x = self.ball_x[envs] + self.ball_vx[envs]
+        y = self.ball_y[envs] + self.ball_vy[envs]
+        vx = self.ball_vx[envs]
+        vy = self.ball_vy[envs]
+        r = self.ball_radius[envs]
+
+        left = x - r < 0
+        right = ~left & (x + r > self.width)
+        x = np.where(left, r, np.where(right, self.width - r, x))
+        vx = np.where(left, np.abs(vx), np.where(right, -np.abs(vx), vx))
+        top = y - r < 0
+        bottom = ~top & (y + r > self.height)
+        y = np.where(top, r, np.where(bottom, self.height - r, y))
+        vy = np.where(top, np.abs(vy), np.where(bottom, -np.abs(vy), vy))
+
+        max_speed = float(self.sim.ball_max_speed)
+        vel_mag = np.sqrt(vx * vx + vy * vy)
+        over = (vel_mag > max_speed) & (vel_mag > 1e-8)
+        scale = np.where(over, max_speed / np.where(over, vel_mag, 1.0), 1.0)
+
+        self.ball_x[envs] = x
+        self.ball_y[envs] = y
+        self.ball_vx[envs] = vx * scale
+        self.ball_vy[envs] = vy * scale
+
+    def _update_fish_distances(self, envs=slice(None)):
+        # the one ball-to-fish distance pass of a tick, inf for eaten fish
+        ball_x = np.trunc(self.ball_x[envs])
+        ball_y = np.trunc(self.ball_y[envs])
+        dx = self._fish('x')[envs] - ball_x[:, None]
+        dy = self._fish('y')[envs] - ball_y[:, None]
+        dists = np.where(self.alive[envs], np.hypot(dx, dy), np.inf)
+        self.distance_origin_x[envs] = ball_x
+        self.distance_origin_y[envs] = ball_y
+        self.fish_distances[envs] = dists
+        self.closest_fish[envs] = np.argmin(dists, axis=1)
+
+    def _compute_reward(self, envs=slice(None)):
+        # distance-based and survival reward (does NOT remove fish)
+        dists = self.fish_distances[envs]
+        reward = self.sim.reward_survival + np.sum(self.sim.reward_distance_multiplier / (dists + 1e-5), axis=1)
+        self.reward[envs] = reward
+        return reward
+
+    def get_states(self, envs=slice(None)):
+        """States of the selected arenas as a (len(envs), STATE_SIZE) array"""
+        ball_x = self.distance_origin_x[envs]
+        ball_y = self.distance_origin_y[envs]
+        dists = self.fish_distances[envs]
+        alive = self.alive[envs]
+        has_fish = alive.any(axis=1)
+
+        rows = np.arange(len(dists))
+        closest = self.closest_fish[envs]
+        min_dist = dists[rows, closest]
+        closest_fish_x = np.where(has_fish, self._fish('x')[envs][rows, closest] - ball_x, 0.0)
+        closest_fish_y = np.where(has_fish, self._fish('y')[envs][rows, closest] - ball_y, 0.0)
+
+        # normalize fish position
+        return np.column_stack((
+            ball_x / self.width,
+            ball_y / self.height,
+            self.ball_vx[envs] / 5.0,
+            self.ball_vy[envs] / 5.0,
+            closest_fish_x / self.width,
+            closest_fish_y / self.height,
+            min_dist / self.diag,
+            alive.sum(axis=1) / self.num_fish
+        )).astype(np.float32)
+
+    def step(self, actions):
+        """Hold each arena's action for `action_repeat` ticks, return (states, summed rewards, dones)"""
+        actions = np.asarray(actions)
+        rewards = np.zeros(self.num_envs)
+        dones = np.zeros(self.num_envs, dtype=bool)
+        for _ in range(self.action_repeat):
+            tick_rewards, tick_dones = self._tick(actions)
+            # an arena that finished earlier in this step stops collecting reward; its
+            # leftover ticks are discarded by the reset below
+            rewards += np.where(dones, 0.0, tick_rewards)
+            newly_done = tick_dones & ~dones
+            if newly_done.any():
+                finished = np.flatnonzero(newly_done)
+                self.final_states[finished] = self.get_states(finished)
+                self.final_fish_eaten[finished] = self.fish_eaten[finished]
+                self.final_survivors[finished] = self.alive[finished].sum(axis=1)
+                self.final_steps[finished] = self.steps[finished]
+                self._evolve(finished)
+                dones |= newly_done
+            if dones.all():
+                break
+
+        states = self.get_states()
+        if dones.any():
+            # auto-reset finished arenas with their next generation
+            finished = np.flatnonzero(dones)
+            self._reset_arenas(finished)
+            states[finished] = self.get_states(finished)
+        return states, rewards, dones
+
+    def _tick(self, actions):
+        # advance every arena by one simulation tick, return (rewards, dones)
+        sim = self.sim
+
+        #update ball velocity based on action
+        speed = self.ball_speed
+        for action, (vx, vy) in enumerate(((0, -speed), (0, speed), (-speed, 0), (speed, 0))):
+            chosen = actions == action
+            self.ball_vx[chosen] = vx
+            self.ball_vy[chosen] = vy
+
+        # update the live fish positions (baseline wandering update)
+        self.population.update_positions(active=self.alive.ravel())
+        self.steps += 1
+
+        # optional assist: nudge each ball toward the live fish closest to it now that the fish have moved
+        if sim.ball_auto_chase:
+            has_fish = self.alive.any(axis=1)
+            rows = np.arange(self.num_envs)
+            fish_x = self._fish('x')
+            fish_y = self._fish('y')
+            dists = np.where(self.alive, np.hypot(fish_x - self.ball_x[:, None], fish_y - self.ball_y[:, None]), np.inf)
+            closest = np.argmin(dists, axis=1)
+            dx = fish_x[rows, closest] - self.ball_x
+            dy = fish_y[rows, closest] - self.ball_y
+            dist = np.sqrt(dx * dx + dy * dy) + 1e-6
+
+            # blend current velocity toward the desired velocity
+            desired_vx = dx / dist * speed
+            desired_vy = dy / dist * speed
+            self.ball_vx += np.where(has_fish, (desired_vx - self.ball_vx) * sim.ball_chase_strength, 0.0)
+            self.ball_vy += np.where(has_fish, (desired_vy - self.ball_vy) * sim.ball_chase_strength, 0.0)
+
+        # apply movement limits (clamping / bouncing)
+        self._advance_balls()
+
+        # Fish behavior: predictive fleeing, each fish reacting to its own arena's ball
+        ball = SimpleNamespace(x=np.repeat(self.ball_x, self.num_fish), y=np.repeat(self.ball_y, self.num_fish),
+                               vx=np.repeat(self.ball_vx, self.num_fish), vy=np.repeat(self.ball_vy, self.num_fish))
+        alive = self.alive.ravel()
+        self.population.flee(ball, self.diag, active=alive)
+        self.population.update_positions(active=alive)
+
+        # Detect collisions: fish attempt to flee but can still be eaten on contact
+        dx = self._fish('x') - self.ball_x[:, None]
+        dy = self._fish('y') - self.ball_y[:, None]
+        eaten = self.alive & (np.hypot(dx, dy) < (self.ball_radius[:, None] + self.population.radius))
+        num_eaten = eaten.sum(axis=1)
+        self.alive &= ~eaten
+        self.fish_eaten += num_eaten
+        if sim.ball_grow_on_eat:
+            self.ball_radius = np.minimum(sim.ball_max_radius, self.ball_radius + sim.ball_grow_amount * num_eaten)
+
+        # the balls advance once more for each of the reward and observation
+        # passes, keeping their per-tick travel; then distances are taken once
+        self._advance_balls()
+        self._advance_balls()
+        self._update_fish_distances()
+
+        # compute remaining reward components (distance/survival)
+        rewards = self._compute_reward() + sim.reward_eaten * num_eaten
+        dones = (self.steps >= self.Max_steps) | ~self.alive.any(axis=1)
+        return rewards, dones